@@ -0,0 +1,75 @@
+# bench/bench_core.py
+# in-process µs/op for the hot paths behind each request: scoring, pricing, the driver aggregate and the
+# DB helpers the endpoints call. Complements bin/loadgen.py, which measures the same paths over HTTP.
+# runs against a throwaway SQLite file:  python bench/bench_core.py [--drivers 50] [--trips 2000] [--only score,db]
+import argparse, os, pathlib, sys, tempfile, time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from bench.bench_batch_ingest import make_trips
+
+def timeit(label, fn, n, per=1):
+    fn()  # warm-up (model load, statement compile)
+    t = time.perf_counter()
+    for _ in range(n): fn()
+    dt = time.perf_counter() - t
+    print(f"{label:<38}{n*per:>8} ops {dt/(n*per)*1e6:>12.1f} µs/op")
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--drivers", type=int, default=50)
+    ap.add_argument("--trips", type=int, default=2000); ap.add_argument("--only", default="score,price,agg,db")
+    args = ap.parse_args(); only = set(args.only.split(","))
+    tmp = tempfile.mkdtemp(prefix="bench_core_")
+    os.environ["DB_URL"] = f"sqlite:///{tmp}/bench.db"
+    os.environ.setdefault("ML_ALLOW_SYNTHETIC", "true")   # ML timings run on the synthetic dev forest when nothing is trained
+    from src.backend.db.store import DB, get_session, init_db
+    from src.backend.api.pipeline import ingest_trips
+    from src.backend.ml.scoring import score_trip_rules, score_trip_ml, score_trips, aggregate_driver_score, rebuild_driver_aggregate
+    from src.backend.ml.pricing import premium_from_score, premiums_from_scores
+    from src.backend.api.schemas import TripIn
+    init_db(create_schema=True)
+
+    trips = [TripIn.model_validate(t).model_dump() for t in make_trips(args.trips, n_drivers=args.drivers)]
+    feats = [{k: t[k] for k in ("distance_km", "avg_speed", "max_speed", "harsh_brakes", "night_ratio", "speeding_events")} for t in trips]
+    if "score" in only:
+        timeit("score_trip_rules", lambda: score_trip_rules(feats[0]), 20000)
+        timeit("score_trips (rules, 1000)", lambda: score_trips(feats[:1000]), 20, per=1000)
+        timeit("score_trip_ml", lambda: score_trip_ml(feats[0]), 500)
+        timeit("score_trips (ml, 1000)", lambda: score_trips(feats[:1000], use_ml=True), 10, per=1000)
+    if "price" in only:
+        timeit("premium_from_score", lambda: premium_from_score(120.0, 73.5), 50000)
+        timeit("premiums_from_scores (10k)", lambda: premiums_from_scores([120.0]*10000, [73.5]*10000), 20, per=10000)
+
+    with get_session() as s: ingest_trips(s, trips)
+    driver = trips[0]["driver_id"]
+    if "agg" in only:
+        def read_agg():
+            with get_session() as s: aggregate_driver_score(s, driver)
+        def rebuild():
+            with get_session() as s: rebuild_driver_aggregate(s, driver)
+        timeit("aggregate_driver_score", read_agg, 2000)
+        timeit("rebuild_driver_aggregate", rebuild, 200)
+    if "db" in only:
+        # every timed ingest gets trips not stored yet; re-sending stored ones is the duplicate path
+        fresh = iter([TripIn.model_validate(t).model_dump() for t in make_trips(args.trips + 2301, n_drivers=args.drivers)[args.trips:]])
+        def ingest_one():
+            with get_session() as s: ingest_trips(s, [next(fresh)])
+        def ingest_batch():
+            with get_session() as s: ingest_trips(s, [next(fresh) for _ in range(100)])
+        def ingest_dupes():
+            with get_session() as s: ingest_trips(s, trips[:100])
+        def read(fn):
+            def run():
+                with get_session() as s: fn(s, driver)
+            return run
+        timeit("ingest_trips (1 trip)", ingest_one, 200)
+        timeit("ingest_trips (100 trips)", ingest_batch, 20, per=100)
+        timeit("ingest_trips (100 duplicates)", ingest_dupes, 20, per=100)
+        timeit("DB.get_driver_score", read(DB.get_driver_score), 5000)
+        timeit("DB.get_premium", read(DB.get_premium), 5000)
+        timeit("DB.get_trips", read(DB.get_trips), 1000)
+        with get_session() as s:
+            timeit("DB.upsert_driver_score", lambda: DB.upsert_driver_score(s, driver, 71.0, {"k": 1}), 2000)
+            timeit("DB.upsert_premium", lambda: DB.upsert_premium(s, driver, 118.0, {"k": 1}), 2000)
+
+if __name__ == "__main__": main()
@@ -0,0 +1,40 @@
+# bench/bench_forest_inference.py
+# sklearn RandomForestRegressor.predict vs the flat-array backend (ml/forest.py): agreement + latency.
+# uses models/baseline_rf.pkl when present (MODEL_DIR), else the registry's synthetic dev forest.
+#   python bench/bench_forest_inference.py [--reps 500]
+import argparse, os, pathlib, sys, time
+import numpy as np
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("ML_ALLOW_SYNTHETIC", "true")
+from src.backend.ml.forest import FlatForest
+from src.backend.ml.registry import load_model
+
+def latencies(fn, X, reps):
+    out = np.empty(reps)
+    for i in range(reps):
+        t = time.perf_counter(); fn(X); out[i] = time.perf_counter() - t
+    return out*1e3
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--reps", type=int, default=500); ap.add_argument("--tol", type=float, default=1e-6)
+    args = ap.parse_args()
+    st = load_model(); model = st["model"]
+    t = time.perf_counter(); flat = FlatForest.from_sklearn(model); compile_ms = (time.perf_counter() - t)*1e3
+    print(f"model {st['source']} ({st['version']}), {len(model.estimators_)} trees, {flat.value.shape[0]} nodes, "
+          f"depth {flat.max_depth}, compiled in {compile_ms:.1f} ms")
+
+    rng = np.random.default_rng(0); n_feat = model.n_features_in_
+    X = rng.uniform(0, 1, (10000, n_feat)) * np.array([40, 90, 130, 12, 1, 8][:n_feat] if n_feat == 6 else [85, 130, 20, 1, 20])
+    diff = np.abs(model.predict(X) - flat.predict(X)).max()
+    print(f"max |sklearn - flat| over {len(X)} rows: {diff:.3g}")
+    assert diff <= args.tol, diff
+
+    print(f"{'rows':>6} {'sklearn p50':>12} {'p99':>8} {'flat p50':>10} {'p99':>8}  (ms)")
+    for n in (1, 10, 100, 1000, 10000):
+        reps = max(3, args.reps // n) if n > 1 else args.reps
+        a = latencies(model.predict, X[:n], reps); b = latencies(flat.predict, X[:n], reps)
+        print(f"{n:>6} {np.percentile(a, 50):>12.3f} {np.percentile(a, 99):>8.3f} {np.percentile(b, 50):>10.3f} {np.percentile(b, 99):>8.3f}")
+
+if __name__ == "__main__": main()
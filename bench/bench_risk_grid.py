@@ -0,0 +1,48 @@
+# bench/bench_risk_grid.py
+# risk-layer lookups for trip centroids: vectorized batch lookup (backfills, batch ingest) vs the scalar
+# lookup_one, plus load time of the binary layer vs the source CSV.
+#   python bench/bench_risk_grid.py [--cells 2000] [--centroids 1000000,5000000]
+import argparse, pathlib, sys, tempfile, time
+import numpy as np
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from src.backend.ml.risk_grid import RiskGrid
+
+def make_grid(n, cell_deg=0.01, seed=0):
+    rng = np.random.default_rng(seed)
+    crash = rng.random((n, n), dtype=np.float32); crime = rng.random((n, n), dtype=np.float32)
+    crash[rng.random((n, n)) < 0.1] = np.nan   # cells without data
+    return RiskGrid(30.0, -115.0, cell_deg, crash, crime)
+
+def best(fn, reps=3):
+    out = []
+    for _ in range(reps): t = time.perf_counter(); fn(); out.append(time.perf_counter() - t)
+    return min(out)
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--cells", type=int, default=2000, help="grid is cells x cells")
+    ap.add_argument("--centroids", default="1000000,5000000"); args = ap.parse_args()
+    grid = make_grid(args.cells); span = args.cells * grid.cell_deg
+    print(f"{grid}  ({(grid.crash.nbytes + grid.crime.nbytes)/2**20:.1f} MiB)")
+
+    tmp = pathlib.Path(tempfile.mkdtemp(prefix="bench_grid_"))
+    grid.save(tmp / "grid.npz")
+    k = min(args.cells, 400); sub = make_grid(k)   # CSV load on a k x k grid, one row per cell
+    i, j = np.mgrid[0:k, 0:k].reshape(2, -1)
+    np.savetxt(tmp / "grid.csv", np.column_stack([sub.lat0 + (i + .5)*sub.cell_deg, sub.lon0 + (j + .5)*sub.cell_deg,
+                                                  sub.crash.ravel(), sub.crime.ravel()]),
+               delimiter=",", header="lat,lon,crash_rate,crime_index", comments="", fmt="%.6f")
+    print(f"load .npz {args.cells}x{args.cells}: {best(lambda: RiskGrid.load(tmp / 'grid.npz'))*1e3:.1f} ms   "
+          f"load .csv {k}x{k}: {best(lambda: RiskGrid.load(tmp / 'grid.csv'))*1e3:.1f} ms")
+
+    rng = np.random.default_rng(1)
+    for n in [int(x) for x in args.centroids.split(",")]:
+        lat = grid.lat0 - 0.05*span + rng.random(n)*1.1*span; lon = grid.lon0 - 0.05*span + rng.random(n)*1.1*span   # ~10% off-grid
+        dt = best(lambda: grid.lookup(lat, lon))
+        print(f"batch lookup {n:>9,} centroids: {dt*1e3:8.1f} ms  {n/dt/1e6:6.1f} M lookups/s")
+    m = 200_000; la, lo = lat[:m].tolist(), lon[:m].tolist(); one = grid.lookup_one
+    dt = best(lambda: [one(a, b) for a, b in zip(la, lo)])
+    print(f"lookup_one   {m:>9,} centroids: {dt*1e3:8.1f} ms  {m/dt/1e6:6.1f} M lookups/s  ({dt/m*1e9:.0f} ns/op)")
+
+if __name__ == "__main__": main()
@@ -0,0 +1,68 @@
+# bench/bench_startup.py
+# cold-start latency of one API worker, each run in a fresh interpreter against a fresh SQLite file: process start,
+# import of the app module, lifespan startup (engine + schema, model, risk layer, background threads) and the
+# first request. "preloaded" rows run preload() first, as the gunicorn master does before forking (gunicorn.conf.py),
+# so their lifespan is what each forked worker still pays. Also checks that importing the app touches no database.
+#   python bench/bench_startup.py [--runs 5] [--importtime 15]
+import argparse, json, os, pathlib, statistics, subprocess, sys, tempfile, time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+CHILD = r"""
+import json, os, time
+t0 = time.perf_counter()
+from src.backend.api.app import app, preload
+t1 = time.perf_counter()
+touched = os.path.exists(os.environ["BENCH_DB"])
+from fastapi.testclient import TestClient
+t2 = time.perf_counter()
+if os.environ["BENCH_PRELOAD"] == "1": preload()
+t3 = time.perf_counter()
+with TestClient(app) as c:
+    t4 = time.perf_counter(); c.get("/health").raise_for_status(); t5 = time.perf_counter()
+print(json.dumps({"import": t1-t0, "preload": t3-t2, "lifespan": t4-t3, "first_request": t5-t4, "db_on_import": touched}))
+"""
+
+def run_once(use_ml: bool, preloaded: bool) -> dict:
+    tmp = pathlib.Path(tempfile.mkdtemp(prefix="bench_startup_")); db = tmp / "bench.db"
+    env = dict(os.environ, PYTHONPATH=str(ROOT), DB_URL=f"sqlite:///{db}", BENCH_DB=str(db), INGEST_SPILL_DIR=str(tmp / "spill"),
+               USE_ML="true" if use_ml else "false", BENCH_PRELOAD="1" if preloaded else "0")
+    env.setdefault("ML_ALLOW_SYNTHETIC", "true")
+    t = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=tmp, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - t
+    if out.returncode: raise SystemExit(out.stderr)
+    return dict(json.loads(out.stdout.strip().splitlines()[-1]), process=wall)
+
+def import_profile(top: int):
+    """Slowest direct imports of the app module by cumulative time (python -X importtime)."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import src.backend.api.app"], cwd=ROOT,
+                         env=dict(os.environ, PYTHONPATH=str(ROOT)), capture_output=True, text=True).stderr
+    rows, children = [], []   # importtime lists a module's imports before the module itself
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        _, cum, name = line[len("import time:"):].split("|"); depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1: children.append((int(cum), name.strip()))
+        elif depth == 0:
+            if name.strip() == "src.backend.api.app": rows = children
+            children = []
+    print(f"\ntop {top} imports of src.backend.api.app (cumulative, -X importtime):")
+    for cum, name in sorted(rows, reverse=True)[:top]: print(f"  {cum/1e3:8.1f} ms  {name}")
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--importtime", type=int, default=0, help="also list the N slowest direct imports of the app")
+    args = ap.parse_args()
+    cols = ["process", "import", "preload", "lifespan", "first_request"]
+    print(f"{'median of ' + str(args.runs) + ' runs (ms)':<28}" + "".join(f"{c:>15}" for c in cols))
+    touched = False
+    for use_ml in (False, True):
+        for preloaded in (False, True):
+            runs = [run_once(use_ml, preloaded) for _ in range(args.runs)]
+            touched |= any(r["db_on_import"] for r in runs)
+            label = f"USE_ML={str(use_ml).lower()}" + (" preloaded" if preloaded else "")
+            print(f"{label:<28}" + "".join(f"{statistics.median(r[c] for r in runs)*1e3:>15.1f}" for c in cols))
+    print(f"database touched by import: {'YES' if touched else 'no'}")
+    if args.importtime: import_profile(args.importtime)
+
+if __name__ == "__main__": main()
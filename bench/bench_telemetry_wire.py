@@ -0,0 +1,38 @@
+# bench/bench_telemetry_wire.py
+# POST /ingest/telemetry body -> trip summary, per content type: JSON points vs columnar JSON vs TLM1 frame.
+# Times the server-side decode + summarize (what runs before the DB write) and reports body size.
+#   python bench/bench_telemetry_wire.py [--sizes 600,3600,36000]
+import argparse, json, pathlib, sys, time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from bench.bench_trip_summary import make_points, best_of
+from src.backend.api.app import _decode_telemetry
+from src.backend.api.wire import encode_frame
+from src.backend.ml.trip_summary import EPOCH, summarize_columns
+
+def bodies(n):
+    pts = make_points(n)
+    ts = [int((p.ts - EPOCH).total_seconds() * 1000) for p in pts]
+    vals = {k: [getattr(p, k) for p in pts] for k in ("speed_kph", "accel_mps2", "lat", "lon")}
+    return {"json": json.dumps({"driver_id": "B1", "points": [p.model_dump(mode="json") for p in pts]}).encode(),
+            "columns": json.dumps({"driver_id": "B1", "ts": ts, **vals}).encode(),
+            "frame": encode_frame("B1", ts, vals),
+            "frame_f32": encode_frame("B1", ts, vals, float32=True)}
+
+def decode_and_summarize(arg):
+    kind, body = arg
+    _, cols, _ = _decode_telemetry(body, "frame" if kind.startswith("frame") else kind)
+    return summarize_columns(cols)
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--sizes", default="600,3600,36000"); args = ap.parse_args()
+    print(f"{'points':>8} {'format':<10}{'body KB':>10}{'ms':>10}{'speedup':>9}")
+    for n in [int(x) for x in args.sizes.split(",")]:
+        base = None
+        for kind, body in bodies(n).items():
+            dt, _ = best_of(decode_and_summarize, (kind, body))
+            base = base or dt
+            print(f"{n:>8} {kind:<10}{len(body)/1024:>10.1f}{dt*1e3:>10.2f}{base/dt:>8.1f}x")
+
+if __name__ == "__main__": main()
@@ -0,0 +1,59 @@
+# bench/bench_trip_summary.py
+# per-point Python loops (old /ingest/telemetry body) vs ml/trip_summary.py at 1k/10k/100k points.
+#   python bench/bench_trip_summary.py [--sizes 1000,10000,100000]
+import argparse, math, pathlib, random, sys, time
+from datetime import datetime, timedelta
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from src.backend.api.app import TripPoint
+from src.backend.ml.scoring import coaching_hints, hints_from_counts
+from src.backend.ml.trip_summary import columns_from_points, summarize_columns
+
+def make_points(n, seed=3):
+    rng = random.Random(seed); t0 = datetime(2024, 1, 1, 21, 30); lat, lon = 33.4255, -111.94; out = []
+    for i in range(n):
+        lat += rng.uniform(-5e-4, 5e-4); lon += rng.uniform(-5e-4, 5e-4)
+        out.append(TripPoint(ts=t0 + timedelta(seconds=i), speed_kph=max(0, rng.gauss(55 + 10*math.sin(i/10), 8)),
+                             accel_mps2=rng.gauss(-0.2, 1.2) if rng.random() > 0.1 else -5.0, lat=lat, lon=lon))
+    return out
+
+def legacy(pts):
+    pts_sorted = sorted(pts, key=lambda p: p.ts); distance_km = 0.0
+    for i in range(1, len(pts_sorted)):
+        dt_min = (pts_sorted[i].ts - pts_sorted[i-1].ts).total_seconds()/60.0
+        distance_km += pts_sorted[i-1].speed_kph * (dt_min/60.0)
+    feats = {"distance_km": distance_km, "avg_speed": sum(p.speed_kph for p in pts)/len(pts),
+             "max_speed": max(p.speed_kph for p in pts), "harsh_brakes": sum(1 for p in pts if p.accel_mps2 < -3.5),
+             "night_ratio": sum(1 for p in pts if p.ts.hour < 6 or p.ts.hour >= 22)/len(pts),
+             "speeding_events": sum(1 for p in pts if p.speed_kph > 70),
+             "centroid_lat": sum(p.lat for p in pts)/len(pts), "centroid_lon": sum(p.lon for p in pts)/len(pts),
+             "start_ts": min(p.ts for p in pts), "end_ts": max(p.ts for p in pts)}
+    return feats, coaching_hints([p.model_dump() for p in pts])
+
+def vectorized(pts):
+    s = summarize_columns(columns_from_points(pts))
+    return s, hints_from_counts(**s["coaching"])
+
+def best_of(fn, arg, reps=3):
+    best = float("inf")
+    for _ in range(reps):
+        t = time.perf_counter(); out = fn(arg); best = min(best, time.perf_counter() - t)
+    return best, out
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--sizes", type=str, default="1000,10000,100000"); args = ap.parse_args()
+    # "numpy ms" includes building the arrays from TripPoints; "kernel ms" is summarize_columns alone
+    print(f"{'points':>8} {'legacy ms':>11} {'numpy ms':>10} {'speedup':>8} {'kernel ms':>10}")
+    for n in [int(x) for x in args.sizes.split(",")]:
+        pts = make_points(n)
+        t_old, (old, old_hints) = best_of(legacy, pts)
+        t_new, (new, new_hints) = best_of(vectorized, pts)
+        for k in ("distance_km", "avg_speed", "max_speed", "night_ratio", "centroid_lat", "centroid_lon"):
+            assert math.isclose(old[k], new[k], rel_tol=1e-9, abs_tol=1e-9), (k, old[k], new[k])
+        assert old["harsh_brakes"] == new["harsh_brakes"] and old["speeding_events"] == new["speeding_events"]
+        assert old["start_ts"] == pts[new["start_idx"]].ts and old["end_ts"] == pts[new["end_idx"]].ts and old_hints == new_hints
+        t_kernel, _ = best_of(summarize_columns, columns_from_points(pts))
+        print(f"{n:>8} {t_old*1e3:>11.2f} {t_new*1e3:>10.2f} {t_old/t_new:>7.1f}x {t_kernel*1e3:>10.2f}")
+
+if __name__ == "__main__": main()
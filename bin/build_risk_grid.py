@@ -0,0 +1,28 @@
+# bin/build_risk_grid.py
+# builds the binary risk layer (src/backend/ml/risk_grid.py) that ingest reads from RISK_GRID_PATH.
+#   python bin/build_risk_grid.py regions.csv --cell-deg 0.01 --out data/risk_grid.npz   # CSV: lat,lon,crash_rate,crime_index
+#   python bin/build_risk_grid.py --demo --out data/risk_grid.npz                         # synthetic layer around the simulator's area
+import argparse, pathlib, sys
+import numpy as np
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from src.backend.ml.risk_grid import RISK_GRID_PATH, RiskGrid
+
+def demo_grid(center=(33.4255, -111.94), half_deg=0.5, cell_deg=0.01, seed=7) -> RiskGrid:
+    """Smooth synthetic crash/crime surfaces (0..1) peaking near the centre, ~1 km cells."""
+    rng = np.random.default_rng(seed); n = int(round(2*half_deg / cell_deg))
+    y, x = np.mgrid[0:n, 0:n] / n - 0.5
+    base = np.exp(-(x**2 + y**2) / 0.08)
+    crash = np.clip(0.6*base + 0.1*rng.random((n, n)), 0, 1); crime = np.clip(0.4*base + 0.2*rng.random((n, n)), 0, 1)
+    return RiskGrid(center[0] - half_deg, center[1] - half_deg, cell_deg, crash, crime)
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("csv", nargs="?", help="lat,lon,crash_rate,crime_index (one row per cell)")
+    ap.add_argument("--cell-deg", type=float, default=0.01); ap.add_argument("--out", default=RISK_GRID_PATH)
+    ap.add_argument("--demo", action="store_true", help="write a synthetic layer instead of reading a CSV")
+    args = ap.parse_args()
+    if not args.demo and not args.csv: ap.error("pass a CSV or --demo")
+    grid = demo_grid(cell_deg=args.cell_deg) if args.demo else RiskGrid.from_csv(args.csv, args.cell_deg)
+    pathlib.Path(args.out).parent.mkdir(parents=True, exist_ok=True); grid.save(args.out)
+    print(f"wrote {grid} -> {args.out}")
+
+if __name__ == "__main__": main()
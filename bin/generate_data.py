@@ -4,20 +4,24 @@ import requests, os, math
 
 API = os.environ.get("API_URL", "http://localhost:8000")
 
-def simulate_trip(driver_id: str, start: datetime, minutes: int = 30):
+def simulate_points(driver_id: str, start: datetime, n_points: int = 30, step_s: float = 60.0):
     rng = random.Random(driver_id + start.isoformat())
     points = []
     lat, lon = 33.4255, -111.94
     hour = start.hour
-    for i in range(minutes):
-        base = 55 + 10*math.sin(i/10.0)
+    for i in range(n_points):
+        base = 55 + 10*math.sin(i*step_s/600.0)
         speed = max(0, rng.gauss(base + (5 if hour>=22 or hour<6 else 0), 8))
         accel = rng.gauss(-0.2, 1.2)
         if rng.random() < 0.10 and speed > 50:
             accel = -5.0 - 2.0*rng.random()
         lat += rng.uniform(-0.0005, 0.0005); lon += rng.uniform(-0.0005, 0.0005)
-        points.append({"ts": (start + timedelta(minutes=i)).isoformat(),
+        points.append({"ts": (start + timedelta(seconds=i*step_s)).isoformat(),
                        "speed_kph": speed, "accel_mps2": accel, "lat": lat, "lon": lon})
+    return points
+
+def simulate_trip(driver_id: str, start: datetime, minutes: int = 30):
+    points = simulate_points(driver_id, start, n_points=minutes)
     r = requests.post(f"{API}/ingest/telemetry",
                       json={"driver_id": driver_id, "points": points},
                       headers={"x-api-key": os.getenv("API_KEY","devkey")},
@@ -0,0 +1,98 @@
+# bin/loadgen.py
+# concurrent load generator for the API (asyncio + httpx), built on generate_data.simulate_points.
+#   python bin/loadgen.py --drivers 200 --concurrency 64 --requests 5000 --points 600 \
+#       --mix telemetry=6,trip=2,score=1,premium=1,trips=1
+# Reports requests/s and p50/p90/p99/max latency per endpoint.
+import argparse, asyncio, json, os, pathlib, random, sys, time
+from datetime import datetime, timedelta, timezone
+import httpx
+from generate_data import simulate_points
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from src.backend.api.wire import COLUMNS_JSON, FRAME, VALUE_COLUMNS, encode_frame
+
+API = os.environ.get("API_URL", "http://localhost:8000")
+KINDS = ("telemetry", "trip", "score", "premium", "trips")
+
+def parse_mix(spec: str):
+    mix = {}
+    for part in spec.split(","):
+        k, _, w = part.partition("=")
+        if k not in KINDS: raise SystemExit(f"unknown request kind {k!r}; choose from {', '.join(KINDS)}")
+        mix[k] = float(w or 1)
+    return mix
+
+def trip_summary(driver_id, start, rng):
+    return {"driver_id": driver_id, "start_ts": start.isoformat(), "end_ts": (start + timedelta(minutes=25)).isoformat(),
+            "distance_km": rng.uniform(1, 40), "avg_speed": rng.uniform(30, 90), "max_speed": rng.uniform(60, 140),
+            "harsh_brakes": rng.randint(0, 6), "night_ratio": rng.random(), "speeding_events": rng.randint(0, 5),
+            "centroid_lat": 33.42, "centroid_lon": -111.94}
+
+def telemetry_body(driver_id, points, wire):
+    """(content, content-type) for POST /ingest/telemetry in the chosen wire format (see src/backend/api/wire.py)."""
+    if wire == "json": return json.dumps({"driver_id": driver_id, "points": points}).encode(), "application/json"
+    ts = [int(datetime.fromisoformat(p["ts"]).replace(tzinfo=timezone.utc).timestamp()*1000) for p in points]
+    vals = {k: [p[k] for p in points] for k in VALUE_COLUMNS}
+    if wire == "columns": return json.dumps({"driver_id": driver_id, "ts": ts, **vals}).encode(), COLUMNS_JSON
+    return encode_frame(driver_id, ts, vals), FRAME
+
+def pct(sorted_ms, q):
+    return sorted_ms[min(len(sorted_ms)-1, int(q*len(sorted_ms)))] if sorted_ms else float("nan")
+
+async def run(args):
+    mix = parse_mix(args.mix); kinds, weights = list(mix), list(mix.values())
+    rng = random.Random(args.seed); headers = {"x-api-key": os.getenv("API_KEY", "devkey")}
+    drivers = [f"{args.prefix}{i:05d}" for i in range(args.drivers)]
+    t0 = datetime(2024, 1, 1); counter = iter(range(args.requests))
+    lat = {k: [] for k in kinds}; errors = {k: 0 for k in kinds}
+    # point sets are built before the clock starts so generating them does not skew latencies. A (driver, point set)
+    # pair sent again is the same trip, answered as a duplicate: raise --drivers/--point-sets to keep telemetry writing
+    point_sets = [simulate_points(f"P{i}", t0 + timedelta(hours=7*i), n_points=args.points, step_s=args.step_s)
+                  for i in range(args.point_sets)] if "telemetry" in mix else []
+    bodies = {(d, i): telemetry_body(d, pts, args.wire) for d in drivers for i, pts in enumerate(point_sets)} \
+        if len(drivers)*len(point_sets) <= 4096 else None
+
+    async def worker(client):
+        for n in counter:
+            kind = rng.choices(kinds, weights)[0]; driver = rng.choice(drivers)
+            start = t0 + timedelta(minutes=37*n)
+            if kind == "telemetry":
+                i = n % len(point_sets)
+                content, ctype = bodies[(driver, i)] if bodies is not None else telemetry_body(driver, point_sets[i], args.wire)
+                req = client.build_request("POST", "/ingest/telemetry", content=content, headers={**headers, "content-type": ctype})
+            elif kind == "trip":
+                req = client.build_request("POST", "/ingest/trip", json=trip_summary(driver, start, rng), headers=headers)
+            else:
+                req = client.build_request("GET", f"/drivers/{driver}/{kind}")
+            t = time.perf_counter()
+            try:
+                r = await client.send(req)
+                if r.status_code >= 400 and r.status_code != 404: errors[kind] += 1
+            except httpx.HTTPError:
+                errors[kind] += 1
+            lat[kind].append((time.perf_counter() - t)*1e3)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.api, timeout=args.timeout, limits=limits) as client:
+        t = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+        wall = time.perf_counter() - t
+
+    total = sum(len(v) for v in lat.values())
+    print(f"{total} requests in {wall:.2f}s -> {total/wall:.1f} req/s  (concurrency {args.concurrency}, {args.drivers} drivers, {args.points} pts/trip, {args.wire})")
+    print(f"{'endpoint':<10}{'n':>7}{'err':>6}{'rps':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (ms)")
+    for k in kinds:
+        v = sorted(lat[k])
+        print(f"{k:<10}{len(v):>7}{errors[k]:>6}{len(v)/wall:>9.1f}{pct(v,.5):>9.1f}{pct(v,.9):>9.1f}{pct(v,.99):>9.1f}{(v[-1] if v else float('nan')):>9.1f}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--api", default=API); ap.add_argument("--drivers", type=int, default=100)
+    ap.add_argument("--concurrency", type=int, default=32); ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--points", type=int, default=300, help="points per telemetry trip"); ap.add_argument("--step-s", type=float, default=1.0)
+    ap.add_argument("--point-sets", type=int, default=32, help="distinct pre-generated telemetry payloads")
+    ap.add_argument("--wire", choices=("json", "columns", "frame"), default="json", help="/ingest/telemetry body format")
+    ap.add_argument("--mix", default="telemetry=4,trip=2,score=2,premium=1,trips=1"); ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--prefix", default="L"); ap.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(ap.parse_args()))
+
+if __name__ == "__main__": main()
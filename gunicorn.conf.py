@@ -0,0 +1,18 @@
+# gunicorn.conf.py — pre-fork serving: the master imports the app and runs preload() (model, risk layer) once,
+# workers fork with both already in shared copy-on-write memory, plus the driver cache's shared invalidation epochs. Each worker's lifespan still builds its own
+# engine and starts its write-behind/reaper threads, after the fork.
+#   gunicorn -c gunicorn.conf.py src.backend.api.app:app
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+
+def when_ready(server):
+    # master, before the first worker is spawned: tables once here instead of racing in every worker's init_db()
+    from src.backend.api.app import preload
+    from src.backend.db.store import DB_CREATE_SCHEMA, create_schema
+    if DB_CREATE_SCHEMA: create_schema()
+    preload()
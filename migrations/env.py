@@ -0,0 +1,21 @@
+# migrations/env.py — runs against DB_URL with the same engine settings (pragmas, pool) as the API
+from logging.config import fileConfig
+from alembic import context
+from src.backend.db.store import Base, DB_URL, make_engine
+
+config = context.config
+if config.config_file_name is not None: fileConfig(config.config_file_name)
+target_metadata = Base.metadata
+
+def run_migrations_offline():
+    context.configure(url=DB_URL, target_metadata=target_metadata, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction(): context.run_migrations()
+
+def run_migrations_online():
+    engine = make_engine(DB_URL)
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=connection.dialect.name == "sqlite")
+        with context.begin_transaction(): context.run_migrations()
+
+if context.is_offline_mode(): run_migrations_offline()
+else: run_migrations_online()
@@ -0,0 +1,57 @@
+"""initial schema (tables as created by store.py before migrations existed)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def _missing(name): return name not in sa.inspect(op.get_bind()).get_table_names()
+
+def upgrade():
+    # databases created by Base.metadata.create_all already have some or all of these tables
+    if _missing("drivers"):
+        op.create_table("drivers", sa.Column("id", sa.String(), primary_key=True), sa.Column("name", sa.String(), nullable=False),
+                        sa.Column("base_rate", sa.Float(), nullable=False), sa.Column("vehicle", sa.String(), nullable=False))
+    if _missing("trips"):
+        op.create_table("trips", sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+                        sa.Column("driver_id", sa.String(), sa.ForeignKey("drivers.id"), nullable=False),
+                        sa.Column("start_ts", sa.DateTime(), nullable=False), sa.Column("end_ts", sa.DateTime(), nullable=False),
+                        sa.Column("distance_km", sa.Float(), nullable=False), sa.Column("avg_speed", sa.Float(), nullable=False),
+                        sa.Column("max_speed", sa.Float(), nullable=False),
+                        sa.Column("harsh_brakes", sa.Integer(), nullable=False), sa.Column("night_ratio", sa.Float(), nullable=False),
+                        sa.Column("speeding_events", sa.Integer(), nullable=False), sa.Column("centroid_lat", sa.Float(), nullable=False),
+                        sa.Column("centroid_lon", sa.Float(), nullable=False))
+    if _missing("trip_scores"):
+        op.create_table("trip_scores", sa.Column("trip_id", sa.Integer(), sa.ForeignKey("trips.id"), primary_key=True),
+                        sa.Column("score", sa.Float(), nullable=False), sa.Column("contrib", sa.String(), nullable=False))
+    if _missing("driver_scores"):
+        op.create_table("driver_scores", sa.Column("driver_id", sa.String(), sa.ForeignKey("drivers.id"), primary_key=True),
+                        sa.Column("score", sa.Float(), nullable=False), sa.Column("breakdown", sa.String(), nullable=False),
+                        sa.Column("updated_at", sa.DateTime(), nullable=False))
+    if _missing("driver_aggregates"):
+        op.create_table("driver_aggregates", sa.Column("driver_id", sa.String(), sa.ForeignKey("drivers.id"), primary_key=True),
+                        sa.Column("weighted_sum", sa.Float(), nullable=False), sa.Column("total_distance", sa.Float(), nullable=False),
+                        sa.Column("window", sa.String(), nullable=False), sa.Column("updated_at", sa.DateTime(), nullable=False))
+    if _missing("premiums"):
+        op.create_table("premiums", sa.Column("driver_id", sa.String(), sa.ForeignKey("drivers.id"), primary_key=True),
+                        sa.Column("monthly_premium", sa.Float(), nullable=False), sa.Column("breakdown", sa.String(), nullable=False),
+                        sa.Column("updated_at", sa.DateTime(), nullable=False))
+    if _missing("enrichment"):
+        op.create_table("enrichment", sa.Column("driver_id", sa.String(), sa.ForeignKey("drivers.id"), primary_key=True),
+                        *[sa.Column(c, sa.Float(), nullable=False)
+                          for c in ("vehicle_risk","driver_history_risk","local_crime_index","local_crash_rate","weather_risk")])
+    if _missing("gamification"):
+        op.create_table("gamification", sa.Column("driver_id", sa.String(), sa.ForeignKey("drivers.id"), primary_key=True),
+                        sa.Column("safe_streak_days", sa.Integer(), nullable=False),
+                        sa.Column("last_safe_date", sa.String(), nullable=False), sa.Column("points", sa.Integer(), nullable=False))
+
+def downgrade():
+    for t in ("gamification","enrichment","premiums","driver_aggregates","driver_scores","trip_scores","trips","drivers"):
+        op.drop_table(t)
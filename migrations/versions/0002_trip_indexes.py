@@ -0,0 +1,23 @@
+"""composite indexes for per-driver trip scans
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = {"ix_trips_driver_id_id": ["driver_id", "id"], "ix_trips_driver_id_start_ts": ["driver_id", "start_ts"]}
+
+def upgrade():
+    existing = {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes("trips")}
+    for name, cols in INDEXES.items():
+        if name not in existing: op.create_index(name, "trips", cols)
+
+def downgrade():
+    for name in INDEXES: op.drop_index(name, table_name="trips")
@@ -0,0 +1,22 @@
+"""ingest_jobs: outcomes of trips accepted by the write-behind queue
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if "ingest_jobs" in sa.inspect(op.get_bind()).get_table_names(): return
+    op.create_table("ingest_jobs", sa.Column("id", sa.String(), primary_key=True), sa.Column("driver_id", sa.String(), nullable=False),
+                    sa.Column("status", sa.String(), nullable=False), sa.Column("trip_id", sa.Integer(), nullable=True),
+                    sa.Column("error", sa.String(), nullable=True), sa.Column("updated_at", sa.DateTime(), nullable=False))
+
+def downgrade():
+    op.drop_table("ingest_jobs")
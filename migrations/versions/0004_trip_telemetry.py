@@ -0,0 +1,27 @@
+"""trip_telemetry: packed raw points per trip
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if "trip_telemetry" in sa.inspect(op.get_bind()).get_table_names(): return
+    op.create_table("trip_telemetry", sa.Column("trip_id", sa.Integer(), sa.ForeignKey("trips.id"), primary_key=True),
+                    sa.Column("driver_id", sa.String(), nullable=False), sa.Column("n_points", sa.Integer(), nullable=False),
+                    sa.Column("start_ms", sa.BigInteger(), nullable=False),
+                    sa.Column("tz_offset_s", sa.Integer(), nullable=False), sa.Column("ts_ms", sa.LargeBinary(), nullable=False),
+                    *[sa.Column(c, sa.LargeBinary(), nullable=False) for c in ("speed_kph","accel_mps2","lat","lon")],
+                    sa.Column("nbytes", sa.Integer(), nullable=False))
+    op.create_index("ix_trip_telemetry_driver_id_trip_id", "trip_telemetry", ["driver_id", "trip_id"])
+
+def downgrade():
+    op.drop_index("ix_trip_telemetry_driver_id_trip_id", table_name="trip_telemetry")
+    op.drop_table("trip_telemetry")
@@ -0,0 +1,31 @@
+"""trip_sessions: open streamed trips with running accumulators
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if "trip_sessions" in sa.inspect(op.get_bind()).get_table_names(): return
+    op.create_table("trip_sessions", sa.Column("id", sa.String(), primary_key=True), sa.Column("driver_id", sa.String(), nullable=False),
+                    sa.Column("status", sa.String(), nullable=False), sa.Column("tz_offset_s", sa.Integer(), nullable=False),
+                    sa.Column("opened_at", sa.DateTime(), nullable=False), sa.Column("last_seen_at", sa.DateTime(), nullable=False),
+                    sa.Column("closed_at", sa.DateTime(), nullable=True), sa.Column("chunks", sa.Integer(), nullable=False),
+                    sa.Column("trip_id", sa.Integer(), nullable=True),
+                    *[sa.Column(c, sa.Integer(), nullable=False) for c in ("n_points", "late_points")],
+                    *[sa.Column(c, sa.Float(), nullable=True) for c in ("first_t", "last_t")],
+                    *[sa.Column(c, sa.Float(), nullable=False) for c in ("last_speed", "distance_km", "speed_sum", "speed_max")],
+                    *[sa.Column(c, sa.Integer(), nullable=False) for c in ("harsh_brakes", "speeding_events", "over_count", "night_count")],
+                    *[sa.Column(c, sa.Float(), nullable=False) for c in ("lat_sum", "lon_sum")])
+    op.create_index("ix_trip_sessions_status_last_seen_at", "trip_sessions", ["status", "last_seen_at"])
+
+def downgrade():
+    op.drop_index("ix_trip_sessions_status_last_seen_at", table_name="trip_sessions")
+    op.drop_table("trip_sessions")
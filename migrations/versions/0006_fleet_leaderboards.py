@@ -0,0 +1,43 @@
+"""fleet top-K: (value, driver_id) indexes, premium change columns, sharded score histogram
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+import zlib
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+INDEXES = {"driver_scores": ("ix_driver_scores_score_driver_id", ["score", "driver_id"]),
+           "premiums": ("ix_premiums_premium_change_driver_id", ["premium_change", "driver_id"]),
+           "gamification": ("ix_gamification_points_driver_id", ["points", "driver_id"])}
+BUCKET_WIDTH, BUCKETS, SHARDS = 5.0, 20, 16  # = db/store.py HIST_*
+
+def upgrade():
+    bind = op.get_bind(); insp = sa.inspect(bind)
+    cols = {c["name"] for c in insp.get_columns("premiums")}
+    for c in ("previous_premium", "premium_change"):
+        if c not in cols: op.add_column("premiums", sa.Column(c, sa.Float(), nullable=True))
+    for table, (name, columns) in INDEXES.items():
+        if name not in {ix["name"] for ix in insp.get_indexes(table)}: op.create_index(name, table, columns)
+    if "score_histogram" not in insp.get_table_names():
+        op.create_table("score_histogram", sa.Column("bucket", sa.Integer(), primary_key=True),
+                        sa.Column("shard", sa.Integer(), primary_key=True), sa.Column("count", sa.Integer(), nullable=False))
+    # (re)build the histogram from driver_scores; from here on DB.upsert_driver_score keeps it current
+    counts = {(b, k): 0 for b in range(BUCKETS) for k in range(SHARDS)}
+    for driver_id, score in bind.execute(sa.text("SELECT driver_id, score FROM driver_scores")).yield_per(10000):
+        counts[(min(max(int(score // BUCKET_WIDTH), 0), BUCKETS - 1), zlib.crc32(driver_id.encode()) % SHARDS)] += 1
+    hist = sa.table("score_histogram", sa.column("bucket", sa.Integer), sa.column("shard", sa.Integer), sa.column("count", sa.Integer))
+    op.execute(hist.delete())
+    op.bulk_insert(hist, [{"bucket": b, "shard": k, "count": n} for (b, k), n in counts.items()])
+
+def downgrade():
+    op.drop_table("score_histogram")
+    for table, (name, _) in INDEXES.items(): op.drop_index(name, table_name=table)
+    with op.batch_alter_table("premiums") as batch:
+        batch.drop_column("premium_change"); batch.drop_column("previous_premium")
@@ -0,0 +1,20 @@
+"""enrichment.location_km: km of trips blended into the risk-grid location enrichment
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if "location_km" not in {c["name"] for c in sa.inspect(op.get_bind()).get_columns("enrichment")}:
+        op.add_column("enrichment", sa.Column("location_km", sa.Float(), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table("enrichment") as batch: batch.drop_column("location_km")
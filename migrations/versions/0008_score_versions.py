@@ -0,0 +1,38 @@
+"""score_versions, trip_score_versions, driver_score_versions: versioned historical rescoring
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if "score_versions" not in tables:
+        op.create_table("score_versions", sa.Column("version", sa.String(), primary_key=True), sa.Column("scorer", sa.String(), nullable=False),
+                        sa.Column("model_version", sa.String(), nullable=True), sa.Column("status", sa.String(), nullable=False),
+                        *[sa.Column(c, sa.Integer(), nullable=False) for c in ("target_trip_id", "after_trip_id")],
+                        sa.Column("after_driver_id", sa.String(), nullable=True),
+                        *[sa.Column(c, sa.Integer(), nullable=False) for c in ("trips_scored", "drivers_staged")],
+                        sa.Column("created_at", sa.DateTime(), nullable=False), sa.Column("updated_at", sa.DateTime(), nullable=False),
+                        sa.Column("cutover_at", sa.DateTime(), nullable=True))
+    if "trip_score_versions" not in tables:
+        op.create_table("trip_score_versions", sa.Column("version", sa.String(), primary_key=True),
+                        sa.Column("trip_id", sa.Integer(), primary_key=True), sa.Column("score", sa.Float(), nullable=False),
+                        sa.Column("contrib", sa.String(), nullable=False))
+    if "driver_score_versions" not in tables:
+        op.create_table("driver_score_versions", sa.Column("version", sa.String(), primary_key=True),
+                        sa.Column("driver_id", sa.String(), primary_key=True),
+                        *[sa.Column(c, sa.Float(), nullable=False) for c in ("weighted_sum", "total_distance")],
+                        sa.Column("window", sa.String(), nullable=False),
+                        sa.Column("score", sa.Float(), nullable=False), sa.Column("breakdown", sa.String(), nullable=False),
+                        sa.Column("monthly_premium", sa.Float(), nullable=False), sa.Column("premium_breakdown", sa.String(), nullable=False))
+
+def downgrade():
+    for t in ("driver_score_versions", "trip_score_versions", "score_versions"): op.drop_table(t)
@@ -0,0 +1,23 @@
+"""trips (driver_id, start_ts, id) index: keyset pages of a driver's trips, newest first
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    existing = {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes("trips")}
+    if "ix_trips_driver_id_start_ts_id" not in existing: op.create_index("ix_trips_driver_id_start_ts_id", "trips", ["driver_id", "start_ts", "id"])
+    # (driver_id, start_ts) is a prefix of the new index
+    if "ix_trips_driver_id_start_ts" in existing: op.drop_index("ix_trips_driver_id_start_ts", table_name="trips")
+
+def downgrade():
+    op.create_index("ix_trips_driver_id_start_ts", "trips", ["driver_id", "start_ts"])
+    op.drop_index("ix_trips_driver_id_start_ts_id", table_name="trips")
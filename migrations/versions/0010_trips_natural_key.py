@@ -0,0 +1,36 @@
+"""unique trips (driver_id, start_ts, end_ts): a retried ingest cannot store the same trip twice
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+# trips repeating an earlier trip (lower id) of the same driver, start and end: retries stored before this index
+DUPES = ("SELECT t.id FROM trips t WHERE EXISTS (SELECT 1 FROM trips k WHERE k.driver_id = t.driver_id "
+         "AND k.start_ts = t.start_ts AND k.end_ts = t.end_ts AND k.id < t.id)")
+KEEP = ("(SELECT MIN(k.id) FROM trips k JOIN trips t ON k.driver_id = t.driver_id AND k.start_ts = t.start_ts "
+        "AND k.end_ts = t.end_ts WHERE t.id = {table}.trip_id)")
+
+def upgrade():
+    bind = op.get_bind()
+    if "uq_trips_driver_id_start_ts_end_ts" in {ix["name"] for ix in sa.inspect(bind).get_indexes("trips")}: return
+    tables = sa.inspect(bind).get_table_names()
+    # keep the first copy; rows that point at a removed copy are dropped or repointed at it. The affected drivers'
+    # aggregates, scores and premiums still count the removed copies until
+    # `python -m src.backend.jobs.rebuild_aggregates --refresh-scores` recomputes them from trip_scores.
+    for table in ("trip_scores", "trip_telemetry", "trip_score_versions"):
+        if table in tables: op.execute(f"DELETE FROM {table} WHERE trip_id IN ({DUPES})")
+    for table in ("ingest_jobs", "trip_sessions"):
+        if table in tables: op.execute(f"UPDATE {table} SET trip_id = {KEEP.format(table=table)} WHERE trip_id IN ({DUPES})")
+    op.execute(f"DELETE FROM trips WHERE id IN ({DUPES})")
+    op.create_index("uq_trips_driver_id_start_ts_end_ts", "trips", ["driver_id", "start_ts", "end_ts"], unique=True)
+
+def downgrade():
+    op.drop_index("uq_trips_driver_id_start_ts_end_ts", table_name="trips")
@@ -0,0 +1,51 @@
+"""NOT NULL on the columns the models declare non-optional, for databases migrated before 0001-0010 declared it
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+NOT_NULL = {
+    "drivers": ("name", "base_rate", "vehicle"),
+    "trips": ("driver_id", "start_ts", "end_ts", "distance_km", "avg_speed", "max_speed", "harsh_brakes", "night_ratio",
+              "speeding_events", "centroid_lat", "centroid_lon"),
+    "trip_scores": ("score", "contrib"),
+    "driver_scores": ("score", "breakdown", "updated_at"),
+    "driver_aggregates": ("weighted_sum", "total_distance", "window", "updated_at"),
+    "premiums": ("monthly_premium", "breakdown", "updated_at"),
+    "enrichment": ("vehicle_risk", "driver_history_risk", "local_crime_index", "local_crash_rate", "weather_risk"),
+    "gamification": ("safe_streak_days", "last_safe_date", "points"),
+    "ingest_jobs": ("driver_id", "status", "updated_at"),
+    "trip_telemetry": ("driver_id", "n_points", "start_ms", "tz_offset_s", "ts_ms", "speed_kph", "accel_mps2", "lat", "lon", "nbytes"),
+    "trip_sessions": ("driver_id", "status", "tz_offset_s", "opened_at", "last_seen_at", "chunks", "n_points", "late_points",
+                      "last_speed", "distance_km", "speed_sum", "speed_max", "harsh_brakes", "speeding_events", "over_count",
+                      "night_count", "lat_sum", "lon_sum"),
+    "score_histogram": ("count",),
+    "score_versions": ("scorer", "status", "target_trip_id", "after_trip_id", "trips_scored", "drivers_staged", "created_at", "updated_at"),
+    "trip_score_versions": ("score", "contrib"),
+    "driver_score_versions": ("weighted_sum", "total_distance", "window", "score", "breakdown", "monthly_premium", "premium_breakdown"),
+}
+
+def _nullable(insp, table):
+    return {c["name"]: c["type"] for c in insp.get_columns(table) if c["nullable"] and c["name"] in NOT_NULL[table]}
+
+def upgrade():
+    bind = op.get_bind(); insp = sa.inspect(bind)
+    todo = {t: cols for t in NOT_NULL if t in insp.get_table_names() and (cols := _nullable(insp, t))}
+    nulls = [f"{t}.{c}" for t, cols in todo.items() for c in cols
+             if bind.execute(sa.text(f'SELECT 1 FROM {t} WHERE "{c}" IS NULL LIMIT 1')).first()]
+    if nulls: raise RuntimeError(f"cannot make these columns NOT NULL, they hold NULLs: {', '.join(nulls)}")
+    for table, cols in todo.items():
+        # SQLite rebuilds the table (batch mode); other dialects ALTER ... SET NOT NULL in place
+        with op.batch_alter_table(table) as b:
+            for c, type_ in cols.items(): b.alter_column(c, existing_type=type_, nullable=False)
+
+def downgrade():
+    pass  # 0001-0010 now create these columns NOT NULL too; nothing to undo
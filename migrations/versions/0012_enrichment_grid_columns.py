@@ -0,0 +1,28 @@
+"""enrichment.grid_crash_rate/grid_crime_index: risk-grid location risk apart from the values set through /enrich
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    cols = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("enrichment")}
+    if "grid_crash_rate" in cols: return
+    for c in ("grid_crash_rate", "grid_crime_index"):
+        op.add_column("enrichment", sa.Column(c, sa.Float(), nullable=False, server_default="0"))
+    # rows the grid has blended into hold grid values in local_*: move them, so /enrich values and grid values stop mixing
+    op.execute("UPDATE enrichment SET grid_crash_rate = local_crash_rate, grid_crime_index = local_crime_index, "
+               "local_crash_rate = 0, local_crime_index = 0 WHERE COALESCE(location_km, 0) > 0")
+
+def downgrade():
+    op.execute("UPDATE enrichment SET local_crash_rate = grid_crash_rate, local_crime_index = grid_crime_index "
+               "WHERE COALESCE(location_km, 0) > 0 AND local_crash_rate = 0 AND local_crime_index = 0")
+    with op.batch_alter_table("enrichment") as batch:
+        batch.drop_column("grid_crash_rate"); batch.drop_column("grid_crime_index")
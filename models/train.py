@@ -1,11 +1,19 @@
 # models/train.py
-# trains the baseline RF on synthetic telematics features and saves artifacts to /models
-import json, os, pathlib, math, random
+# trains the baseline RF and saves artifacts to /models (baseline_rf.pkl, feature_list.json, metrics.json, VERSION).
+# Rows come from synthetic telematics features (default), the trips table or Parquet files, streamed in chunks
+# into float32 matrices spilled to disk (.npy memmaps): float32 is what the forest trains on, so fit() makes no
+# copy, and the source rows are never held in memory at once. Hyperparameter candidates are fitted in parallel
+# worker processes that map the same matrices read-only.
+#   python models/train.py                                                   # 8,000 synthetic rows, one forest
+#   python models/train.py --source db [--db-url sqlite:///./telematics.db]  # scored trips; target = stored trip score
+#   python models/train.py --source parquet data/trips/ [--target score]     # *.parquet with FEATURES + target column
+#   python models/train.py --source db --grid "n_estimators=100,250 max_depth=10,16 min_samples_leaf=2,8" --workers 4
+import argparse, itertools, json, os, pathlib, shutil, sys, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
 
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
 
@@ -19,6 +27,10 @@ FEATURES = [
     "night_ratio",
     "speeding_events",
 ]
+DEFAULT_PARAMS = {"n_estimators": 250, "max_depth": 10, "min_samples_leaf": 2}
+# row i of the stream goes to test / val / train by i % SPLIT_BUCKETS: deterministic, and the size of every
+# split is known from the row count before the first chunk is read
+SPLIT_BUCKETS = 100
 
 def synthesize(n=8000, seed=42):
     rng = np.random.default_rng(seed)
@@ -72,29 +84,174 @@ def synthesize(n=8000, seed=42):
 
     return df, score
 
+# --- sources: (row count upper bound, iterator of (X float32 [m, len(FEATURES)], y float64 [m])) ---
+
+def synthetic_source(n=8000, seed=42, chunk=200_000):
+    X, y = synthesize(n=n, seed=seed)
+    X, y = X[FEATURES].to_numpy(np.float32), np.asarray(y, np.float64)
+    return n, ((X[i:i+chunk], y[i:i+chunk]) for i in range(0, n, chunk))
+
+def db_source(url=None, chunk=200_000):
+    """Scored trips in id order, up to the newest one at start; the target is the stored trip score."""
+    sys.path.insert(0, str(HERE.parent))
+    from src.backend.db.store import DB, get_session, init_db
+    init_db(url, create_schema=False)
+    with get_session() as s: n, upto = DB.scored_trip_bounds(s)
+    def chunks():
+        after = 0
+        while True:
+            with get_session() as s: rows = DB.scored_trip_chunk(s, after, upto, chunk)
+            if not rows: return
+            after = rows[-1][0]
+            # flat fromiter: np.array() over Row objects probes each one for array attributes first (several x slower)
+            a = np.fromiter(itertools.chain.from_iterable(rows), np.float64, len(rows)*(len(FEATURES) + 2)).reshape(len(rows), -1)
+            yield a[:, 1:-1].astype(np.float32), a[:, -1]
+    return n, chunks()
+
+def parquet_source(path, target="score", chunk=200_000):
+    """A .parquet file or a directory of them (sorted); rows with a missing target are skipped."""
+    try: import pyarrow.parquet as pq
+    except ImportError: raise SystemExit("[models] --source parquet needs pyarrow (pip install pyarrow)")
+    path = pathlib.Path(path); files = sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+    if not files: raise SystemExit(f"[models] no .parquet files under {path}")
+    n = sum(pq.ParquetFile(f).metadata.num_rows for f in files)
+    def chunks():
+        for f in files:
+            for b in pq.ParquetFile(f).iter_batches(batch_size=chunk, columns=FEATURES + [target]):
+                X = np.empty((b.num_rows, len(FEATURES)), np.float32)
+                for j, k in enumerate(FEATURES): X[:, j] = b.column(k).to_numpy(zero_copy_only=False)
+                y = b.column(target).to_numpy(zero_copy_only=False).astype(np.float64)
+                ok = np.isfinite(y)
+                yield (X, y) if ok.all() else (X[ok], y[ok])
+    return n, chunks()
+
+# --- out-of-core matrices ---
+
+def split_sizes(n, test_size, val_size):
+    t, v = round(test_size*SPLIT_BUCKETS), round(val_size*SPLIT_BUCKETS)
+    def count(lo, hi): return (n // SPLIT_BUCKETS)*(hi - lo) + max(0, min(n % SPLIT_BUCKETS, hi) - lo)
+    return {"test": count(0, t), "val": count(t, t + v), "train": count(t + v, SPLIT_BUCKETS)}, t, v
+
+def load_matrices(source, work: pathlib.Path, test_size=0.2, val_size=0.0):
+    """Stream a source into per-split .npy memmaps: X float32 column-major (the layout the tree splitter scans),
+    y float64. -> ({split: (X path, y path, rows)}, rows read)"""
+    n, chunks = source
+    cap, t, v = split_sizes(n, test_size, val_size)
+    mats = {k: (np.lib.format.open_memmap(work / f"X_{k}.npy", "w+", np.float32, (max(c, 1), len(FEATURES)), fortran_order=True),
+                np.lib.format.open_memmap(work / f"y_{k}.npy", "w+", np.float64, (max(c, 1),))) for k, c in cap.items()}
+    filled = dict.fromkeys(cap, 0); i = 0
+    for X, y in chunks:
+        b = np.arange(i, i + len(y)) % SPLIT_BUCKETS; i += len(y)
+        for k, m in (("test", b < t), ("val", (b >= t) & (b < t + v)), ("train", b >= t + v)):
+            f, rows = filled[k], int(m.sum())
+            if f + rows > cap[k]: raise RuntimeError(f"source returned more than the {n} rows it counted")
+            mats[k][0][f:f+rows] = X[m]; mats[k][1][f:f+rows] = y[m]; filled[k] += rows
+    for Xm, ym in mats.values(): Xm.flush(); ym.flush()
+    return {k: (str(work / f"X_{k}.npy"), str(work / f"y_{k}.npy"), filled[k]) for k in cap}, i
+
+def open_split(splits, k):
+    X, y, rows = splits[k]
+    return np.load(X, mmap_mode="r")[:rows], np.load(y, mmap_mode="r")[:rows]
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss   # KiB on Linux, bytes on macOS
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+def fit_candidate(job):
+    """(params, splits, model path, n_jobs) -> metrics; fits on the mapped train split and dumps the model.
+    Runs in a pool worker when there are several candidates."""
+    params, splits, out, n_jobs = job
+    t0 = time.perf_counter()
+    X, y = open_split(splits, "train")
+    model = RandomForestRegressor(random_state=42, n_jobs=n_jobs, **params).fit(X, y)
+    res = {"params": params, "fit_seconds": round(time.perf_counter() - t0, 3)}
+    for k in ("val", "test"):
+        if not splits[k][2]: continue
+        Xk, yk = open_split(splits, k); pred = model.predict(Xk)
+        res[f"{k}_mae"], res[f"{k}_r2"] = float(mean_absolute_error(yk, pred)), float(r2_score(yk, pred))
+    joblib.dump(model, out)
+    return dict(res, model_path=str(out), peak_rss_mb=peak_rss_mb())
+
+def _value(v):
+    if v == "None": return None
+    for cast in (int, float):
+        try: return cast(v)
+        except ValueError: pass
+    return v
+
+def parse_grid(spec):
+    """'n_estimators=100,250 max_depth=10,None' -> every combination, other keys from DEFAULT_PARAMS."""
+    axes = {k: [v] for k, v in DEFAULT_PARAMS.items()}
+    for item in spec.split():
+        k, _, vals = item.partition("=")
+        if not vals: raise SystemExit(f"[models] bad --grid entry {item!r} (want name=v1,v2)")
+        axes[k] = [_value(v) for v in vals.split(",")]
+    return [dict(zip(axes, combo)) for combo in itertools.product(*axes.values())]
+
 def main():
-    X, y = synthesize(n=8000, seed=42)
-    X_train, X_test, y_train, y_test = train_test_split(X[FEATURES], y, test_size=0.2, random_state=42)
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--source", choices=["synthetic", "db", "parquet"], default="synthetic")
+    ap.add_argument("path", nargs="?", help="--source parquet: a .parquet file or a directory of them")
+    ap.add_argument("--db-url", default=None, help="--source db (default DB_URL)")
+    ap.add_argument("--target", default="score", help="--source parquet: label column")
+    ap.add_argument("--rows", type=int, default=8000, help="--source synthetic: rows to generate")
+    ap.add_argument("--chunk", type=int, default=200_000, help="rows per streamed chunk")
+    ap.add_argument("--grid", default="", help='hyperparameter candidates, e.g. "n_estimators=100,250 max_depth=10,16"')
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes fitting candidates in parallel")
+    ap.add_argument("--test-size", type=float, default=0.2)
+    ap.add_argument("--val-size", type=float, default=0.1, help="held out to pick the best of several candidates")
+    ap.add_argument("--work-dir", default=None, help="where the float32 matrices are spilled (default: system temp)")
+    ap.add_argument("--out", default=str(ARTIFACT_DIR)); ap.add_argument("--version", default="rf_v1.0")
+    args = ap.parse_args()
+    if args.source == "parquet" and not args.path: ap.error("--source parquet needs a path")
 
-    model = RandomForestRegressor(
-        n_estimators=250, max_depth=10, random_state=42, n_jobs=-1, min_samples_leaf=2
-    )
-    model.fit(X_train, y_train)
+    t0 = time.perf_counter()
+    candidates = parse_grid(args.grid); val_size = args.val_size if len(candidates) > 1 else 0.0
+    source, target = {"synthetic": (lambda: synthetic_source(args.rows, chunk=args.chunk), "synthetic rules score"),
+                      "db": (lambda: db_source(args.db_url, args.chunk), "trip_scores.score"),
+                      "parquet": (lambda: parquet_source(args.path, args.target, args.chunk), args.target)}[args.source]
+    out = pathlib.Path(args.out); out.mkdir(parents=True, exist_ok=True)
+    work = pathlib.Path(tempfile.mkdtemp(prefix="train_", dir=args.work_dir))
+    try:
+        splits, n_rows = load_matrices(source(), work, args.test_size, val_size)
+        t_load = time.perf_counter() - t0
+        if not splits["train"][2] or not splits["test"][2]: raise SystemExit(f"[models] {n_rows} row(s): not enough to train and test")
+        pool = len(candidates) > 1 and args.workers > 1
+        # in one process the forest uses every core itself; in the pool each candidate gets one
+        jobs = [(p, splits, work / f"candidate_{i}.pkl", 1 if pool else -1) for i, p in enumerate(candidates)]
+        t1 = time.perf_counter()
+        if pool:
+            with ProcessPoolExecutor(max_workers=min(args.workers, len(jobs))) as ex: results = list(ex.map(fit_candidate, jobs))
+        else: results = [fit_candidate(j) for j in jobs]
+        t_search = time.perf_counter() - t1
+        best = min(results, key=lambda r: r["val_mae" if val_size else "test_mae"])
+        shutil.move(best["model_path"], out / "baseline_rf.pkl")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
 
-    y_pred = model.predict(X_test)
-    mae = float(mean_absolute_error(y_test, y_pred))
-    r2  = float(r2_score(y_test, y_pred))
+    rows = {k: splits[k][2] for k in splits}
+    metrics = {
+        "mae": best["test_mae"], "r2": best["test_r2"], "n_test": rows["test"], "n_train": rows["train"], "n_val": rows["val"],
+        "source": args.source, "target": target, "params": best["params"],
+        "candidates": [{k: v for k, v in r.items() if k != "model_path"} for r in results],
+        "timing_s": {"load": round(t_load, 3), "search": round(t_search, 3), "total": round(time.perf_counter() - t0, 3)},
+        "load_rows_per_s": round(n_rows / max(t_load, 1e-9)),
+        "memory_mb": {"matrices": round(n_rows * (4*len(FEATURES) + 8) / 2**20, 1), "peak_rss_main": peak_rss_mb(),
+                      "peak_rss_workers": max(r["peak_rss_mb"] for r in results) if pool else None},
+        "workers": min(args.workers, len(jobs)) if pool else 1,
+    }
 
     # Save artifacts
-    joblib.dump(model, ARTIFACT_DIR / "baseline_rf.pkl")
-    with open(ARTIFACT_DIR / "feature_list.json", "w") as f:
+    with open(out / "feature_list.json", "w") as f:
         json.dump(FEATURES, f, indent=2)
-    with open(ARTIFACT_DIR / "metrics.json", "w") as f:
-        json.dump({"mae": mae, "r2": r2, "n_test": len(y_test)}, f, indent=2)
-    with open(ARTIFACT_DIR / "VERSION", "w") as f:
-        f.write("rf_v1.0\n")
+    with open(out / "metrics.json", "w") as f:
+        json.dump(metrics, f, indent=2)
+    with open(out / "VERSION", "w") as f:
+        f.write(args.version + "\n")
 
-    print(f"[models] saved baseline_rf.pkl  | MAE={mae:.2f}  R2={r2:.3f}")
+    print(f"[models] saved baseline_rf.pkl  | MAE={metrics['mae']:.2f}  R2={metrics['r2']:.3f}  | {n_rows:,} rows "
+          f"(load {t_load:.1f}s, {len(candidates)} candidate(s) in {t_search:.1f}s, peak RSS {metrics['memory_mb']['peak_rss_main']:.0f} MB)")
 
 if __name__ == "__main__":
     main()
@@ -1,29 +1,54 @@
-import os
-from fastapi import FastAPI, HTTPException, Header
+import base64, json, os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header, Body, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from fastapi.responses import JSONResponse, Response, PlainTextResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from typing import Any, Dict, List
 from datetime import datetime
-from ..db.store import DB, get_session
-from ..ml.scoring import aggregate_driver_score, coaching_hints, score_trip_rules, score_trip_ml
-from ..ml.pricing import premium_from_score
+from ..db.store import DB, get_session, init_db
+from ..db.telemetry import pack_columns, unpack_row
+from ..ml.scoring import coaching_hints, hints_from_counts
+from ..ml.trip_summary import columns_from_points, summarize_columns
+from ..ml.registry import load_model
+from ..ml.risk_grid import get_grid
+from ..utils.cache import CACHE
+from ..utils.idempotency import RECENT, natural_key
+from ..utils import metrics
+from ..utils.metrics import MetricsMiddleware, span, observe_since_request
+from .pipeline import ingest_trips, use_ml
+from .schemas import TripPoint, TripIn, TripPointsIn, TripPointsChunk, TripSessionIn, EnrichmentIn, SUMMARY_FIELDS
+from .writebehind import QUEUE, QueueFull
+from . import sessions
+from .sessions import REAPER, SessionError
+from .wire import COLUMNS_JSON, FRAME, WireError, columns_from_arrays, content_kind, decode_columns_json, decode_frame, ts_at
 
 API_KEY = os.getenv("API_KEY","devkey")
-app = FastAPI(title="Telematics Insurance API", version="0.2.0")
+STORE_TELEMETRY = os.getenv("STORE_TELEMETRY","true").lower()=="true"
 
-app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+def preload():
+    """Fork-safe startup work (model, risk layer; no connections, no threads). Run once in a pre-fork master
+    (gunicorn.conf.py) and workers inherit it copy-on-write; in each worker's lifespan it is then a no-op."""
+    if use_ml(): load_model()   # once per process instead of inside the first ML request
+    get_grid()                  # regional risk layer for location enrichment (None when RISK_GRID_PATH is absent)
+    CACHE.share()               # driver cache invalidations reach every worker forked after this
+
+@asynccontextmanager
+async def lifespan(app):
+    init_db()       # engine (+ tables when DB_CREATE_SCHEMA) per worker, after any fork
+    preload()
+    QUEUE.start()   # also replays trips left in spill files by a crashed worker
+    REAPER.start()  # expires idle streamed-trip sessions
+    yield
+    REAPER.stop(); QUEUE.stop()
 
-class TripPoint(BaseModel):
-    ts: datetime; speed_kph: float; accel_mps2: float; lat: float; lon: float
-class TripIn(BaseModel):
-    driver_id: str = Field(..., json_schema_extra={"examples":["D001"]})
-    start_ts: datetime; end_ts: datetime; distance_km: float; avg_speed: float; max_speed: float
-    harsh_brakes: int; night_ratio: float; speeding_events: int; centroid_lat: float; centroid_lon: float
-class TripPointsIn(BaseModel):
-    driver_id: str; points: List[TripPoint] = Field(min_length=2)
-class EnrichmentIn(BaseModel):
-    vehicle_risk: Optional[float]=0.0; driver_history_risk: Optional[float]=0.0
-    local_crime_index: Optional[float]=0.0; local_crash_rate: Optional[float]=0.0; weather_risk: Optional[float]=0.0
+app = FastAPI(title="Telematics Insurance API", version="0.2.0", lifespan=lifespan)
+
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(MetricsMiddleware, api_key=API_KEY)
 
 @app.get("/health") 
 def health(): return {"status":"ok"}
@@ -31,77 +56,301 @@ def health(): return {"status":"ok"}
 def _auth_or_401(x_api_key: str | None):
     if x_api_key != API_KEY: raise HTTPException(401,"Unauthorized")
 
+def _ingest(trips: List[dict], telemetry=None, duplicates: set | None = None) -> List[int]:
+    # a concurrent ingest of the same trip can commit between our natural-key lookup and insert: the unique
+    # index rejects ours and the retry finds theirs
+    for attempt in (1, 2):
+        try:
+            with get_session() as s: return ingest_trips(s, trips, telemetry, duplicates)
+        except IntegrityError:
+            if attempt == 2: raise
+            if duplicates is not None: duplicates.clear()
+
+def _accept(trip: TripIn, mode: str, telemetry: dict | None = None):
+    # sync: score/price/commit inside the request; async: spill + enqueue for the write-behind consumer
+    if mode == "async":
+        try:
+            with span("ingest.enqueue"): ingest_id = QUEUE.submit(trip, telemetry)
+        except QueueFull as e: raise HTTPException(503, str(e), headers={"Retry-After": "1"})
+        return {"ok": True, "status": "queued", "ingest_id": ingest_id}, 202
+    dup: set = set()
+    trip_id = _ingest([trip.model_dump()], [telemetry], dup)[0]
+    if dup: return {"ok": True, "trip_id": trip_id, "duplicate": True}, 200
+    CACHE.invalidate(trip.driver_id)
+    return {"ok": True, "trip_id": trip_id}, 200
+
+def _not_failed(body: dict) -> bool:
+    # a queued ingest that has since failed is retried rather than replayed
+    return "ingest_id" not in body or (QUEUE.status(body["ingest_id"]) or {}).get("status") != "failed"
+
+def _replay(route: str, *keys):
+    """Response of an earlier attempt at this ingest (Idempotency-Key or natural key) from RECENT, or None."""
+    hit = RECENT.get(route, *keys, valid=_not_failed)
+    return None if hit is None else _respond({**hit[0], "duplicate": True}, hit[1])
+
+def _respond(body: dict, status_code: int):
+    return body if status_code == 200 else JSONResponse(body, status_code=status_code)
+
 @app.post("/ingest/trip")
-def ingest_trip(trip: TripIn, x_api_key: str | None = Header(None)):
+def ingest_trip(trip: TripIn, x_api_key: str | None = Header(None), mode: str = Query("sync", pattern="^(sync|async)$"),
+                idempotency_key: str | None = Header(None)):
+    observe_since_request("trip.parse_validate")
     _auth_or_401(x_api_key)
-    with get_session() as s:
-        if not DB.get_driver(s, trip.driver_id):
-            DB.create_driver(s, driver_id=trip.driver_id, name="Demo Driver", base_rate=120.0, vehicle="Sedan")
-        DB.create_trip(s, **trip.model_dump())
-        use_ml = (os.getenv("USE_ML","false").lower()=="true")
-        features = DB.features_for_trip(trip.model_dump())
-        trip_score, contrib = (score_trip_ml if use_ml else score_trip_rules)(features)
-        DB.upsert_trip_score(s, trip_id=DB.last_trip_id(s), score=trip_score, contrib=contrib)
-        driver_score, driver_breakdown = aggregate_driver_score(s, trip.driver_id)
-        DB.upsert_driver_score(s, driver_id=trip.driver_id, score=driver_score, breakdown=driver_breakdown)
-        DB.update_gamification_on_score(s, trip.driver_id, driver_score)
-        premium, breakdown = premium_from_score(base_rate=DB.get_driver(s, trip.driver_id).base_rate, score=driver_score)
-        DB.upsert_premium(s, driver_id=trip.driver_id, premium=premium, breakdown=breakdown)
-    return {"ok": True}
-
-@app.post("/ingest/telemetry")
-def ingest_points(batch: TripPointsIn, x_api_key: str | None = Header(None)):
+    keys = (idempotency_key, natural_key(trip.driver_id, trip.start_ts, trip.end_ts))
+    replayed = _replay("trip", *keys)
+    if replayed is not None: return replayed
+    body, status_code = _accept(trip, mode)
+    RECENT.put("trip", body, status_code, *keys)
+    return _respond(body, status_code)
+
+MAX_BATCH = int(os.getenv("MAX_BATCH","5000"))
+
+@app.post("/ingest/trips:batch")
+def ingest_trips_batch(trips: List[Dict[str, Any]] = Body(...), x_api_key: str | None = Header(None)):
+    # items are validated one by one so a bad trip does not reject the whole batch
+    _auth_or_401(x_api_key)
+    if len(trips) > MAX_BATCH: raise HTTPException(413, f"Batch larger than {MAX_BATCH} trips")
+    results: List[Dict[str, Any]] = [{"index": i} for i in range(len(trips))]
+    valid, valid_idx = [], []
+    for i, raw in enumerate(trips):
+        try:
+            valid.append(TripIn.model_validate(raw).model_dump()); valid_idx.append(i)
+        except ValidationError as e:
+            results[i].update({"ok": False, "error": e.errors(include_url=False, include_context=False, include_input=False)})
+    if valid:
+        try:
+            dup: set = set()
+            trip_ids = _ingest(valid, duplicates=dup)
+            CACHE.invalidate(*{t["driver_id"] for j, t in enumerate(valid) if j not in dup})
+            for j, (i, tid) in enumerate(zip(valid_idx, trip_ids)):
+                results[i].update({"ok": True, "trip_id": tid, **({"duplicate": True} if j in dup else {})})
+        except SQLAlchemyError as e:
+            for i in valid_idx: results[i].update({"ok": False, "error": f"db error: {e.__class__.__name__}"})
+    accepted = sum(1 for r in results if r["ok"])
+    return {"ok": accepted == len(trips), "accepted": accepted, "rejected": len(trips) - accepted, "results": results}
+
+def _inline_refs(schema: dict) -> dict:
+    defs = schema.pop("$defs", {})
+    def walk(o):
+        if isinstance(o, dict): return walk(defs[o["$ref"].rsplit("/", 1)[1]]) if "$ref" in o else {k: walk(v) for k, v in o.items()}
+        return [walk(v) for v in o] if isinstance(o, list) else o
+    return walk(schema)
+
+_NUMS = {"type": "array", "items": {"type": "number"}}
+_TELEMETRY_BODY = {"requestBody": {"required": True, "content": {
+    "application/json": {"schema": _inline_refs(TripPointsIn.model_json_schema())},
+    COLUMNS_JSON: {"schema": {"type": "object", "required": ["driver_id", "ts", "speed_kph", "accel_mps2", "lat", "lon"], "properties": {
+        "driver_id": {"type": "string"}, "tz_offset_s": {"type": "integer", "default": 0},
+        "ts": {"type": "array", "items": {"type": "integer"}, "description": "UTC epoch milliseconds"},
+        "speed_kph": _NUMS, "accel_mps2": _NUMS, "lat": _NUMS, "lon": _NUMS}}},
+    FRAME: {"schema": {"type": "string", "format": "binary", "description": "TLM1 frame, see src/backend/api/wire.py"}}}}}
+
+@app.post("/ingest/telemetry", openapi_extra=_TELEMETRY_BODY)
+async def ingest_points(request: Request, x_api_key: str | None = Header(None), mode: str = Query("sync", pattern="^(sync|async)$")):
+    # the body is read raw so packed content types (api/wire.py) skip per-point TripPoint objects entirely
+    _auth_or_401(x_api_key)
+    idempotency_key = request.headers.get("idempotency-key")
+    if idempotency_key is not None and (replayed := _replay("telemetry", idempotency_key)) is not None: return replayed
+    body = await request.body()
+    observe_since_request("telemetry.receive")
+    return await run_in_threadpool(_ingest_telemetry, body, request.headers.get("content-type"), mode, idempotency_key)
+
+def _decode_telemetry(body: bytes, kind: str, session_tz: int | None = None):
+    """-> (driver_id, trip_summary columns, ts_of(i) -> datetime of point i); session_tz set = a trip-session chunk."""
+    chunk = session_tz is not None
+    if kind == "json":
+        try: batch = (TripPointsChunk if chunk else TripPointsIn).model_validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError([{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)])
+        pts = batch.points
+        return getattr(batch, "driver_id", None), columns_from_points(pts), lambda i: pts[i].ts
+    try: driver_id, ts_ms, values, tz = (decode_columns_json if kind == "columns" else decode_frame)(body, chunk)
+    except WireError as e: raise HTTPException(400, str(e))
+    if chunk: tz = session_tz
+    return driver_id, columns_from_arrays(ts_ms, values, tz), lambda i: ts_at(ts_ms, i, tz)
+
+def _ingest_telemetry(body: bytes, content_type: str | None, mode: str, idempotency_key: str | None = None):
+    kind = content_kind(content_type)
+    with span(f"telemetry.decode_{kind}"): driver_id, cols, ts_of = _decode_telemetry(body, kind)
+    with span("telemetry.summarize"): summary = summarize_columns(cols)
+    trip=TripIn(driver_id=driver_id, start_ts=ts_of(summary["start_idx"]), end_ts=ts_of(summary["end_idx"]),
+                **{k: summary[k] for k in SUMMARY_FIELDS})
+    key = natural_key(trip.driver_id, trip.start_ts, trip.end_ts)
+    replayed = _replay("telemetry", key)   # same points re-sent without (or under a new) Idempotency-Key
+    if replayed is not None: return replayed
+    with span("telemetry.pack"): packed = pack_columns(cols) if STORE_TELEMETRY else None
+    body, status_code = _accept(trip, mode, packed)
+    body.update({"hints": hints_from_counts(**summary["coaching"])})
+    RECENT.put("telemetry", body, status_code, idempotency_key, key)
+    return _respond(body, status_code)
+
+@app.exception_handler(SessionError)
+def _session_error(request, e: SessionError): return JSONResponse({"detail": e.detail}, status_code=e.status_code)
+
+@app.post("/trips/sessions", status_code=201)
+def open_trip_session(payload: TripSessionIn, x_api_key: str | None = Header(None)):
+    _auth_or_401(x_api_key)
+    return sessions.open_session(payload.driver_id, payload.tz_offset_s)
+
+@app.get("/trips/sessions/{session_id}")
+def trip_session_state(session_id: str, x_api_key: str | None = Header(None)):
+    _auth_or_401(x_api_key)
+    return sessions.get_state(session_id)
+
+_CHUNK_BODY = {"requestBody": {"required": True, "content": {
+    "application/json": {"schema": _inline_refs(TripPointsChunk.model_json_schema())},
+    COLUMNS_JSON: {"schema": {**_TELEMETRY_BODY["requestBody"]["content"][COLUMNS_JSON]["schema"], "required": ["ts", "speed_kph", "accel_mps2", "lat", "lon"]}},
+    FRAME: _TELEMETRY_BODY["requestBody"]["content"][FRAME]}}}
+
+@app.post("/trips/sessions/{session_id}/points", openapi_extra=_CHUNK_BODY)
+async def append_trip_points(session_id: str, request: Request, x_api_key: str | None = Header(None), seq: int | None = Query(None, ge=1)):
+    # same body formats as /ingest/telemetry, driver_id optional; seq makes a retried chunk a no-op
+    _auth_or_401(x_api_key)
+    body = await request.body(); kind = content_kind(request.headers.get("content-type"))
+    def decode(tz: int):
+        with span(f"session.decode_{kind}"): return _decode_telemetry(body, kind, session_tz=tz)[1]
+    return await run_in_threadpool(sessions.append_chunk, session_id, decode, seq)
+
+@app.post("/trips/sessions/{session_id}/close")
+def close_trip_session(session_id: str, x_api_key: str | None = Header(None)):
     _auth_or_401(x_api_key)
-    pts = batch.points
-    if len(pts) < 2: raise HTTPException(400,"Need at least 2 points")
-    pts_sorted = sorted(pts, key=lambda p: p.ts)
-    distance_km=0.0
-    for i in range(1,len(pts_sorted)):
-        dt_min=(pts_sorted[i].ts-pts_sorted[i-1].ts).total_seconds()/60.0
-        distance_km += pts_sorted[i-1].speed_kph * (dt_min/60.0)
-    avg_speed=sum(p.speed_kph for p in pts)/len(pts)
-    max_speed=max(p.speed_kph for p in pts)
-    harsh_brakes=sum(1 for p in pts if p.accel_mps2<-3.5)
-    night_ratio=sum(1 for p in pts if p.ts.hour<6 or p.ts.hour>=22)/len(pts)
-    SPEED_LIMIT=70
-    speeding_events=sum(1 for p in pts if p.speed_kph>SPEED_LIMIT)
-    centroid_lat=sum(p.lat for p in pts)/len(pts); centroid_lon=sum(p.lon for p in pts)/len(pts)
-    trip=TripIn(driver_id=batch.driver_id, start_ts=min(p.ts for p in pts), end_ts=max(p.ts for p in pts),
-                distance_km=distance_km, avg_speed=avg_speed, max_speed=max_speed, harsh_brakes=harsh_brakes,
-                night_ratio=night_ratio, speeding_events=speeding_events, centroid_lat=centroid_lat, centroid_lon=centroid_lon)
-    resp = ingest_trip(trip, x_api_key=x_api_key)
-    hints = coaching_hints([p.model_dump() for p in pts])
-    resp.update({"hints":hints})
-    return resp
+    return sessions.close_session(session_id)
+
+@app.get("/ingest/status/{ingest_id}")
+def ingest_status(ingest_id: str):
+    st = QUEUE.status(ingest_id)
+    if not st: raise HTTPException(404, "Unknown ingest id")
+    return st
+
+@app.get("/ingest/queue")
+def ingest_queue(): return {**QUEUE.snapshot(), "duplicates": RECENT.stats()}
+
+def _cached(driver_id: str, kind: str, loader, if_none_match: str | None, not_found: str):
+    # read-through per-driver cache + ETag/If-None-Match; ingest/enrich invalidate the driver's entries
+    value, etag = CACHE.get_or_load(driver_id, kind, loader)
+    if value is None: raise HTTPException(404, not_found)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(value, headers=headers)
+
+def _load(fn):
+    def loader():
+        with get_session() as s: return fn(s)
+    return loader
 
 @app.get("/drivers/{driver_id}/score")
-def get_score(driver_id:str):
-    with get_session() as s:
-        ds = DB.get_driver_score(s, driver_id)
-        if not ds: raise HTTPException(404,"No score yet for driver")
-        return ds
+def get_score(driver_id:str, if_none_match: str | None = Header(None)):
+    return _cached(driver_id, "score", _load(lambda s: DB.get_driver_score(s, driver_id)), if_none_match, "No score yet for driver")
 
 @app.get("/drivers/{driver_id}/premium")
-def get_premium(driver_id:str):
-    with get_session() as s:
+def get_premium(driver_id:str, if_none_match: str | None = Header(None)):
+    def load(s):
         p = DB.get_premium(s, driver_id)
-        if not p: raise HTTPException(404,"No premium yet for driver")
-        p["gamification"] = DB.get_gamification(s, driver_id)
+        if p: p["gamification"] = DB.get_gamification(s, driver_id)
         return p
+    return _cached(driver_id, "premium", _load(load), if_none_match, "No premium yet for driver")
+
+def _encode_cursor(*key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key), separators=(",", ":")).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str | None, *types):
+    # opaque keyset cursor: the sort key of the last row seen, checked against the expected types
+    if not cursor: return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if isinstance(key, list) and len(key) == len(types) and all(isinstance(v, t) for v, t in zip(key, types)): return tuple(key)
+    except (ValueError, TypeError): pass
+    raise HTTPException(400, "Invalid cursor")
+
+def _trips_before(cursor: str | None):
+    key = _decode_cursor(cursor, str, int)
+    if key is None: return None
+    try: return datetime.fromisoformat(key[0]), key[1]
+    except ValueError: raise HTTPException(400, "Invalid cursor")
+
+def _next_trips_cursor(trips: list, limit: int):
+    return _encode_cursor(trips[-1]["start_ts"], trips[-1]["id"]) if len(trips) == limit else None
+
+def _paged(driver_id: str, kind: str, load, before, if_none_match: str | None, not_found: str):
+    # first pages go through the driver cache (per page size); older pages are one keyset range read each
+    if before is None: return _cached(driver_id, kind, _load(load), if_none_match, not_found)
+    with get_session() as s: value = load(s)
+    if value is None: raise HTTPException(404, not_found)
+    return value
 
 @app.get("/drivers/{driver_id}/trips")
-def get_trips(driver_id:str):
-    with get_session() as s:
-        return {"trips": DB.get_trips(s, driver_id)}
+def get_trips(driver_id:str, limit: int = Query(50, ge=1, le=500), cursor: str | None = None, if_none_match: str | None = Header(None)):
+    before = _trips_before(cursor)
+    def load(s):
+        trips = DB.get_trips(s, driver_id, limit, before)
+        return {"trips": trips, "next_cursor": _next_trips_cursor(trips, limit)}
+    return _paged(driver_id, f"trips:{limit}", load, before, if_none_match, "No trips")
+
+@app.get("/drivers/{driver_id}/summary")
+def get_summary(driver_id:str, trips: int = Query(20, ge=1, le=500), cursor: str | None = None, if_none_match: str | None = Header(None)):
+    # score, premium, gamification and a page of trips (cursor pages the trips) in one request and one DB session
+    before = _trips_before(cursor)
+    def load(s):
+        out = DB.get_driver_summary(s, driver_id, trips, before)
+        if out: out["next_cursor"] = _next_trips_cursor(out["trips"], trips)
+        return out
+    return _paged(driver_id, f"summary:{trips}", load, before, if_none_match, "Unknown driver")
+
+@app.get("/fleet/top")
+def fleet_top(by: str = Query("score", pattern="^(score|premium_change|points)$"), order: str = Query("desc", pattern="^(asc|desc)$"),
+              limit: int = Query(100, ge=1, le=1000), cursor: str | None = None, x_api_key: str | None = Header(None)):
+    # keyset pages over (value, driver_id) indexes: constant cost per page at any fleet size or depth
+    _auth_or_401(x_api_key)
+    after = _decode_cursor(cursor, (int, float), str)
+    with get_session() as s: items = DB.top_drivers(s, by, limit, desc=order == "desc", after=after)
+    next_cursor = _encode_cursor(items[-1][by], items[-1]["driver_id"]) if len(items) == limit else None
+    return {"by": by, "order": order, "items": items, "next_cursor": next_cursor}
+
+@app.get("/fleet/score-histogram")
+def fleet_score_histogram(x_api_key: str | None = Header(None)):
+    _auth_or_401(x_api_key)
+    with get_session() as s: buckets = DB.score_histogram(s)
+    return {"drivers": sum(b["count"] for b in buckets), "buckets": buckets}
+
+@app.get("/cache/stats")
+def cache_stats(): return CACHE.stats()
+
+def _gauges():
+    q, c, r, d = QUEUE.snapshot(), CACHE.stats(), REAPER.stats, RECENT.stats()["suppressed"]
+    return ["# TYPE telematics_ingest_queue_pending gauge", f"telematics_ingest_queue_pending {q['pending']}",
+            "# TYPE telematics_ingest_jobs_total counter"] + \
+           [f'telematics_ingest_jobs_total{{result="{k}"}} {q[k]}' for k in ("accepted", "rejected", "committed", "failed", "replayed")] + \
+           ["# TYPE telematics_cache_requests_total counter",
+            f'telematics_cache_requests_total{{result="hit"}} {c["hits"]}', f'telematics_cache_requests_total{{result="miss"}} {c["misses"]}',
+            "# TYPE telematics_trip_sessions_expired_total counter", f"telematics_trip_sessions_expired_total {r['expired']}",
+            "# TYPE telematics_ingest_duplicates_total counter"] + \
+           [f'telematics_ingest_duplicates_total{{source="{k}"}} {d[k]}' for k in ("cache", "db")]
+metrics.register_collector(_gauges)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str, x_api_key: str | None = Header(None)):
+    _auth_or_401(x_api_key)
+    folded = metrics.PROFILES.get(profile_id)
+    if folded is None: raise HTTPException(404, "Unknown profile id")
+    return folded
 
 @app.get("/drivers/{driver_id}/coach")
 def coach_last_trip(driver_id:str):
     with get_session() as s:
-        trips = DB.get_trips(s, driver_id)
+        trips = DB.get_trips(s, driver_id, limit=1)
         if not trips: raise HTTPException(404,"No trips")
         last = trips[0]
+        tel = DB.get_trip_telemetry(s, last["id"])
+        if tel is not None:
+            return {"hints": hints_from_counts(**summarize_columns(unpack_row(tel))["coaching"]), "source": "telemetry"}
+        # trips ingested as summaries have no stored points: approximate from the trip averages
         pts=[{"ts": datetime.utcnow(), "speed_kph": last["avg_speed"], "accel_mps2": -0.2, "lat": last["centroid"][0], "lon": last["centroid"][1]} for _ in range(10)]
-        return {"hints": coaching_hints(pts)}
+        return {"hints": coaching_hints(pts), "source": "trip_summary"}
 
 @app.post("/enrich/{driver_id}")
 def set_enrichment(driver_id:str, payload: EnrichmentIn, x_api_key: str | None = Header(None)):
@@ -110,4 +359,5 @@ def set_enrichment(driver_id:str, payload: EnrichmentIn, x_api_key: str | None =
         if not DB.get_driver(s, driver_id):
             DB.create_driver(s, driver_id=driver_id, name="Demo Driver", base_rate=120.0, vehicle="Sedan")
         DB.set_enrichment(s, driver_id, **payload.model_dump())
+    CACHE.invalidate(driver_id)
     return {"ok": True, "enrichment": payload.model_dump()}
@@ -0,0 +1,88 @@
+# src/backend/api/pipeline.py
+# shared ingest core: trip rows in -> trip scores -> driver aggregate/score -> gamification -> premium.
+# works on a batch so the per-driver updates run once per batch, not once per trip.
+# Trips already stored under their natural key (driver_id, start_ts, end_ts) are skipped: a retry gets the
+# existing trip id and does not rescore, reprice or count the trip twice.
+import os
+from typing import Dict, List, Optional, Set
+from ..db.store import DB
+from ..ml.scoring import score_trips, update_driver_aggregate, driver_score_from_aggregate
+from ..ml.pricing import premium_from_score
+from ..ml.risk_grid import LOCATION_RISK_HORIZON_KM, location_risk_by_driver
+from ..utils.idempotency import RECENT, utc_naive
+from ..utils.metrics import span
+
+def use_ml() -> bool: return os.getenv("USE_ML","false").lower()=="true"
+
+def ensure_drivers(s, driver_ids) -> Dict:
+    drivers = DB.get_drivers(s, set(driver_ids))
+    missing = [d for d in dict.fromkeys(driver_ids) if d not in drivers]
+    if missing:
+        DB.create_drivers_if_missing(s, [{"id": d, "name": "Demo Driver", "base_rate": 120.0, "vehicle": "Sedan"} for d in missing])
+        s.flush(); drivers.update(DB.get_drivers(s, missing))
+    return drivers
+
+TELEMETRY_MAX_BYTES_PER_DRIVER = int(os.getenv("TELEMETRY_MAX_BYTES_PER_DRIVER", str(16*1024*1024)))
+
+def ingest_trips(s, trips: List[dict], telemetry: Optional[List[Optional[dict]]] = None,
+                 duplicates: Optional[Set[int]] = None) -> List[int]:
+    """trips: TripIn.model_dump() dicts; telemetry: optional packed raw points per trip (db/telemetry.py).
+    Returns the trip ids in input order; positions of trips that were already stored (or repeat an earlier
+    trip of the batch) get the existing id and are added to duplicates."""
+    if not trips: return []
+    with span("pipeline.dedup"):
+        # times are stored as naive UTC, so the same trip sent with another UTC offset has the same natural key
+        trips = [t if t["start_ts"].tzinfo is None and t["end_ts"].tzinfo is None else
+                 dict(t, start_ts=utc_naive(t["start_ts"]), end_ts=utc_naive(t["end_ts"])) for t in trips]
+        keys = [(t["driver_id"], t["start_ts"], t["end_ts"]) for t in trips]
+        known = DB.existing_trip_ids(s, keys); first: Dict[tuple, int] = {}; fresh = []
+        for i, k in enumerate(keys):
+            if k in known or k in first: continue
+            first[k] = i; fresh.append(i)
+        dup = len(trips) - len(fresh)
+        if duplicates is not None: duplicates.update(i for i, k in enumerate(keys) if k in known or first[k] != i)
+        RECENT.count_db(dup)
+    if not dup: return _ingest_new(s, trips, telemetry)
+    new_ids = _ingest_new(s, [trips[i] for i in fresh], [telemetry[i] for i in fresh] if telemetry else None)
+    known.update((keys[i], tid) for i, tid in zip(fresh, new_ids))
+    return [known[k] for k in keys]
+
+def _ingest_new(s, trips: List[dict], telemetry: Optional[List[Optional[dict]]]) -> List[int]:
+    if not trips: return []
+    with span("pipeline.drivers"):
+        drivers = ensure_drivers(s, [t["driver_id"] for t in trips])
+        DB.lock_drivers(s, drivers)   # held to commit: the per-driver updates below read-modify-write
+    with span("pipeline.create_trips"): trip_ids = DB.create_trips(s, trips)
+    if telemetry:
+        with span("pipeline.telemetry"):
+            rows = [dict(tel, trip_id=tid, driver_id=t["driver_id"]) for t, tid, tel in zip(trips, trip_ids, telemetry) if tel]
+            DB.insert_trip_telemetry(s, rows)
+            if TELEMETRY_MAX_BYTES_PER_DRIVER > 0:
+                for driver_id in {r["driver_id"] for r in rows}: DB.enforce_telemetry_retention(s, driver_id, TELEMETRY_MAX_BYTES_PER_DRIVER)
+    with span("pipeline.location_risk"):
+        # trip centroids -> risk grid -> the driver's grid location risk (not the /enrich values), before the driver score reads them
+        for driver_id, (crash, crime, km) in location_risk_by_driver(trips).items():
+            DB.blend_location_risk(s, driver_id, crash, crime, km, LOCATION_RISK_HORIZON_KM)
+    with span("pipeline.score"): scored = score_trips([DB.features_for_trip(t) for t in trips], use_ml=use_ml())
+    with span("pipeline.trip_scores"):
+        DB.insert_trip_scores(s, [{"trip_id":tid,"score":sc,"contrib":contrib} for tid,(sc,contrib) in zip(trip_ids, scored)])
+    by_driver: Dict[str, List[dict]] = {}
+    for t, tid, (sc, contrib) in zip(trips, trip_ids, scored):
+        by_driver.setdefault(t["driver_id"], []).append({"trip_id":tid,"score":sc,"distance_km":t["distance_km"],"breakdown":contrib})
+    for driver_id, entries in by_driver.items():
+        with span("pipeline.aggregate"): agg = update_driver_aggregate(s, driver_id, entries)
+        driver_score = publish_driver_score(s, drivers[driver_id], agg)
+        # points and streak days are earned by ingested trips only, not by jobs republishing a score
+        with span("pipeline.gamification"): DB.update_gamification_on_score(s, driver_id, driver_score)
+    return trip_ids
+
+def publish_driver_score(s, driver, agg: Dict) -> float:
+    """Driver aggregate -> driver score -> premium, for ingest and the jobs that republish scores (rebuild_aggregates,
+    enrich_locations). Gamification is left to ingest."""
+    with span("pipeline.driver_score"):
+        driver_score, driver_breakdown = driver_score_from_aggregate(s, driver.id, agg)
+        DB.upsert_driver_score(s, driver_id=driver.id, score=driver_score, breakdown=driver_breakdown)
+    with span("pipeline.premium"):
+        premium, breakdown = premium_from_score(base_rate=driver.base_rate, score=driver_score)
+        DB.upsert_premium(s, driver_id=driver.id, premium=premium, breakdown=breakdown)
+    return driver_score
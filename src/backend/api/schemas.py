@@ -0,0 +1,22 @@
+# src/backend/api/schemas.py
+# request models shared by the endpoints and the write-behind ingest queue
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+class TripPoint(BaseModel):
+    ts: datetime; speed_kph: float; accel_mps2: float; lat: float; lon: float
+class TripIn(BaseModel):
+    driver_id: str = Field(..., json_schema_extra={"examples":["D001"]})
+    start_ts: datetime; end_ts: datetime; distance_km: float; avg_speed: float; max_speed: float
+    harsh_brakes: int; night_ratio: float; speeding_events: int; centroid_lat: float; centroid_lon: float
+SUMMARY_FIELDS = ("distance_km","avg_speed","max_speed","harsh_brakes","night_ratio","speeding_events","centroid_lat","centroid_lon")
+class TripPointsIn(BaseModel):
+    driver_id: str; points: List[TripPoint] = Field(min_length=2)
+class TripPointsChunk(BaseModel):
+    points: List[TripPoint] = Field(min_length=1)
+class TripSessionIn(BaseModel):
+    driver_id: str; tz_offset_s: int = Field(0, ge=-86399, le=86399)
+class EnrichmentIn(BaseModel):
+    vehicle_risk: Optional[float]=0.0; driver_history_risk: Optional[float]=0.0
+    local_crime_index: Optional[float]=0.0; local_crash_rate: Optional[float]=0.0; weather_risk: Optional[float]=0.0
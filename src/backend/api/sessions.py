@@ -0,0 +1,121 @@
+# src/backend/api/sessions.py
+# streamed trips: open a session, append point chunks, close it (or let the reaper expire it after an idle timeout).
+# Each open trip is one trip_sessions row of running accumulators (ml/trip_summary.ACC_FIELDS), so server memory
+# and storage stay O(1) per trip however long it runs, and open trips survive a worker restart. Closing turns the
+# accumulators into a TripIn and runs it through pipeline.ingest_trips like POST /ingest/trip.
+# Raw points of streamed trips are not kept (trip_telemetry); /coach falls back to the trip summary for them.
+import os, random, threading, time, uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from sqlalchemy.exc import OperationalError
+from ..db.store import DB, get_session
+from ..ml.scoring import hints_from_counts
+from ..ml.trip_summary import ACC_FIELDS, accumulate_columns, empty_accumulator, summarize_accumulator
+from ..utils.cache import CACHE
+from .pipeline import ingest_trips
+from .schemas import TripIn, SUMMARY_FIELDS
+from .wire import ts_from_epoch
+
+class SessionError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail); self.status_code, self.detail = status_code, detail
+
+def _acc(row) -> Dict: return {k: getattr(row, k) for k in ACC_FIELDS}
+
+def _state(row, acc: Optional[Dict] = None, **extra) -> Dict:
+    acc = acc or _acc(row)
+    out = {"session_id": row.id, "driver_id": row.driver_id, "status": row.status, "chunks": row.chunks, "trip_id": row.trip_id,
+           "n_points": acc["n_points"], "late_points": acc["late_points"], "distance_km": acc["distance_km"],
+           "first_ts": ts_from_epoch(acc["first_t"], row.tz_offset_s).isoformat() if acc["first_t"] is not None else None,
+           "last_ts": ts_from_epoch(acc["last_t"], row.tz_offset_s).isoformat() if acc["last_t"] is not None else None}
+    out.update(extra); return out
+
+def open_session(driver_id: str, tz_offset_s: int = 0) -> Dict:
+    with get_session() as s:
+        row = DB.create_trip_session(s, uuid.uuid4().hex, driver_id, tz_offset_s)
+        return _state(row, empty_accumulator())
+
+def get_state(session_id: str) -> Dict:
+    with get_session() as s:
+        row = DB.get_trip_session(s, session_id)
+        if row is None: raise SessionError(404, "Unknown session id")
+        return _state(row)
+
+def append_chunk(session_id: str, decode: Callable[[int], dict], seq: Optional[int] = None, retries: int = 10) -> Dict:
+    """decode(tz_offset_s) -> trip_summary columns of the chunk. seq (1, 2, ...) makes client retries idempotent."""
+    cols = None
+    for attempt in range(retries):
+        if attempt: time.sleep(random.uniform(0, 0.002 * 2**min(attempt, 6)))  # jittered backoff after a lost compare-and-set
+        try:
+            with get_session() as s:
+                row = DB.get_trip_session(s, session_id)
+                if row is None: raise SessionError(404, "Unknown session id")
+                if row.status != "open": raise SessionError(409, f"Session is {row.status}")
+                if seq is not None:
+                    if seq <= row.chunks: return _state(row, duplicate=True)
+                    if seq != row.chunks + 1: raise SessionError(409, f"Expected chunk seq {row.chunks + 1}, got {seq}")
+                if cols is None: cols = decode(row.tz_offset_s)
+                acc = accumulate_columns(_acc(row), cols)
+                if DB.update_trip_session(s, session_id, row.chunks, acc):
+                    return _state(row, acc, duplicate=False)   # the UPDATE synchronized row.chunks to the stored count
+        except OperationalError:
+            pass  # SQLite write-upgrade conflict with a concurrent append: re-read and retry
+    raise SessionError(409, "Concurrent appends to this session, retry")
+
+def close_session(session_id: str, status: str = "closed", idle_before: Optional[datetime] = None) -> Optional[Dict]:
+    """Claim the open session and ingest it as a trip in one transaction. Returns None if idle_before is set
+    and the session was closed or touched in the meantime."""
+    with get_session() as s:
+        if not DB.claim_trip_session(s, session_id, status, idle_before):
+            if idle_before is not None: return None
+            row = DB.get_trip_session(s, session_id)
+            if row is None: raise SessionError(404, "Unknown session id")
+            raise SessionError(409, f"Session is already {row.status}")
+        row = DB.get_trip_session(s, session_id)
+        if row.n_points < 2:
+            DB.finish_trip_session(s, session_id, "discarded", None)
+            return {"ok": False, "session_id": session_id, "status": "discarded", "detail": "Need at least 2 points"}
+        summary = summarize_accumulator(_acc(row))
+        trip = TripIn(driver_id=row.driver_id, start_ts=ts_from_epoch(summary["first_t"], row.tz_offset_s),
+                      end_ts=ts_from_epoch(summary["last_t"], row.tz_offset_s), **{k: summary[k] for k in SUMMARY_FIELDS})
+        trip_id = ingest_trips(s, [trip.model_dump()])[0]
+        DB.finish_trip_session(s, session_id, status, trip_id)
+    CACHE.invalidate(row.driver_id)
+    return {"ok": True, "session_id": session_id, "status": status, "trip_id": trip_id, "hints": hints_from_counts(**summary["coaching"])}
+
+class SessionReaper:
+    """Background thread that closes sessions idle for longer than idle_s (status "expired"). Safe to run in every
+    worker: closing is a conditional UPDATE, so each session is ingested exactly once."""
+    def __init__(self, idle_s: float = 600.0, interval_s: float = 30.0, batch: int = 500):
+        self.idle_s, self.interval_s, self.batch = idle_s, interval_s, batch
+        self._stop = threading.Event(); self._thread: Optional[threading.Thread] = None
+        self.stats = {"expired": 0, "errors": 0}
+
+    def start(self):
+        if self._thread is not None or self.interval_s <= 0: return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="trip-session-reaper", daemon=True); self._thread.start()
+
+    def stop(self):
+        if self._thread is None: return
+        self._stop.set(); self._thread.join(timeout=10.0); self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s): self.reap()
+
+    def reap(self) -> int:
+        idle_before = datetime.utcnow() - timedelta(seconds=self.idle_s); n = 0
+        try:
+            with get_session() as s: ids = DB.idle_trip_session_ids(s, idle_before, self.batch)
+        except Exception:
+            self.stats["errors"] += 1; return 0
+        for sid in ids:
+            try:
+                if close_session(sid, "expired", idle_before) is not None: n += 1
+            except Exception:
+                self.stats["errors"] += 1
+        self.stats["expired"] += n
+        return n
+
+REAPER = SessionReaper(idle_s=float(os.getenv("SESSION_IDLE_TIMEOUT_S", "600")),
+                       interval_s=float(os.getenv("SESSION_REAP_INTERVAL_S", "30")))
@@ -0,0 +1,98 @@
+# src/backend/api/wire.py
+# packed request bodies for POST /ingest/telemetry, decoded straight into trip_summary columns (no per-point objects).
+#
+# application/vnd.telematics.columns+json
+#   {"driver_id": "D001", "tz_offset_s": 0, "ts": [epoch ms, ...], "speed_kph": [...], "accel_mps2": [...], "lat": [...], "lon": [...]}
+# application/vnd.telematics.frame   (little-endian)
+#   header  <4sBBHiI  magic b"TLM1" | version 1 | flags (bit0: values are float32) | len(driver_id) | tz_offset_s | n_points
+#   then    driver_id utf-8 | ts int64[n] epoch ms | speed_kph, accel_mps2, lat, lon  float64[n] (float32 with flag bit0)
+# ts is UTC epoch milliseconds; tz_offset_s (wall clock - UTC) plays the role of the ISO offset in the JSON form,
+# so the same trip sent as points, columns or a frame is summarized identically.
+# Trip-session chunks (POST /trips/sessions/{id}/points) use the same bodies with driver_id optional and >= 1 point;
+# their wall clock comes from the session's tz_offset_s.
+import json, struct
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+import numpy as np
+from ..ml.trip_summary import EPOCH
+
+COLUMNS_JSON = "application/vnd.telematics.columns+json"
+FRAME = "application/vnd.telematics.frame"
+VALUE_COLUMNS = ("speed_kph", "accel_mps2", "lat", "lon")
+_HEADER = struct.Struct("<4sBBHiI")
+_MAGIC, _VERSION, _F32 = b"TLM1", 1, 0x01
+# epoch-ms range that datetime can represent, a day inside each end so a ±1 day tz_offset_s still fits
+_TS_MIN_MS = (datetime.min - EPOCH + timedelta(days=1)) // timedelta(milliseconds=1)
+_TS_MAX_MS = (datetime.max - EPOCH - timedelta(days=1)) // timedelta(milliseconds=1)
+
+class WireError(ValueError): pass
+
+def columns_from_arrays(ts_ms, values: Dict[str, np.ndarray], tz_offset_s: int = 0) -> Dict[str, np.ndarray]:
+    """epoch-ms timestamps + value columns -> trip_summary columns (float64)."""
+    t = np.asarray(ts_ms, dtype=np.int64) / 1000.0
+    cols = {"t": t, "wall": t + tz_offset_s if tz_offset_s else t}
+    for k in VALUE_COLUMNS: cols[k] = np.asarray(values[k], dtype=np.float64)
+    return cols
+
+def ts_at(ts_ms, i: int, tz_offset_s: int = 0) -> datetime:
+    """Timestamp of point i as the JSON form would have parsed it (naive UTC, or aware with the trip's offset)."""
+    return _with_offset(EPOCH + timedelta(milliseconds=int(ts_ms[i])), tz_offset_s)
+
+def ts_from_epoch(t_s: float, tz_offset_s: int = 0) -> datetime:
+    return _with_offset(EPOCH + timedelta(seconds=t_s), tz_offset_s)
+
+def _with_offset(ts: datetime, tz_offset_s: int) -> datetime:
+    if not tz_offset_s: return ts
+    return (ts + timedelta(seconds=tz_offset_s)).replace(tzinfo=timezone(timedelta(seconds=tz_offset_s)))
+
+def _check(driver_id, ts_ms, values, tz_offset_s, chunk) -> Tuple[str, np.ndarray, Dict[str, np.ndarray], int]:
+    if not chunk and (not isinstance(driver_id, str) or not driver_id): raise WireError("driver_id must be a non-empty string")
+    if not isinstance(tz_offset_s, int) or abs(tz_offset_s) >= 86400: raise WireError("tz_offset_s must be an int within ±1 day")
+    n = len(ts_ms)
+    if n < (1 if chunk else 2): raise WireError("Need at least 1 point" if chunk else "Need at least 2 points")
+    if ts_ms.min() < _TS_MIN_MS or ts_ms.max() > _TS_MAX_MS: raise WireError("ts out of range (UTC epoch milliseconds)")
+    for k, v in values.items():
+        if len(v) != n: raise WireError(f"{k} has {len(v)} values, ts has {n}")
+        if not np.isfinite(v).all(): raise WireError(f"{k} contains non-finite values")
+    return driver_id, ts_ms, values, tz_offset_s
+
+def decode_columns_json(body: bytes, chunk: bool = False):
+    """-> (driver_id, ts_ms int64[n], {column: float64[n]}, tz_offset_s). chunk: a trip-session append, driver_id optional."""
+    try: doc = json.loads(body)
+    except ValueError as e: raise WireError(f"invalid JSON: {e}")
+    if not isinstance(doc, dict): raise WireError("body must be a JSON object")
+    missing = [k for k in (() if chunk else ("driver_id",)) + ("ts",) + VALUE_COLUMNS if k not in doc]
+    if missing: raise WireError(f"missing fields: {', '.join(missing)}")
+    try:
+        ts_ms = np.asarray(doc["ts"], dtype=np.int64)
+        values = {k: np.asarray(doc[k], dtype=np.float64) for k in VALUE_COLUMNS}
+    except (TypeError, ValueError, OverflowError) as e: raise WireError(f"columns must be flat numeric arrays: {e}")
+    if ts_ms.ndim != 1 or any(v.ndim != 1 for v in values.values()): raise WireError("columns must be flat numeric arrays")
+    return _check(doc.get("driver_id"), ts_ms, values, doc.get("tz_offset_s", 0), chunk)
+
+def decode_frame(body: bytes, chunk: bool = False):
+    """-> (driver_id, ts_ms int64[n], {column: float64|float32[n]}, tz_offset_s); arrays are views over body."""
+    if len(body) < _HEADER.size: raise WireError("frame shorter than its header")
+    magic, version, flags, id_len, tz_offset_s, n = _HEADER.unpack_from(body)
+    if magic != _MAGIC or version != _VERSION: raise WireError("not a TLM1 v1 frame")
+    vdt = np.dtype("<f4" if flags & _F32 else "<f8")
+    off = _HEADER.size + id_len
+    if len(body) != off + n*(8 + 4*vdt.itemsize): raise WireError(f"frame length {len(body)} does not match {n} points")
+    try: driver_id = body[_HEADER.size:off].decode("utf-8")
+    except UnicodeDecodeError: raise WireError("driver_id is not valid utf-8")
+    ts_ms = np.frombuffer(body, dtype="<i8", count=n, offset=off); off += 8*n
+    values = {}
+    for k in VALUE_COLUMNS:
+        values[k] = np.frombuffer(body, dtype=vdt, count=n, offset=off); off += vdt.itemsize*n
+    return _check(driver_id, ts_ms, values, tz_offset_s, chunk)
+
+def encode_frame(driver_id: str, ts_ms, values: Dict[str, np.ndarray], tz_offset_s: int = 0, float32: bool = False) -> bytes:
+    """Client-side counterpart of decode_frame (used by bin/loadgen.py and the wire benchmark)."""
+    did = driver_id.encode("utf-8"); ts = np.ascontiguousarray(ts_ms, dtype="<i8")
+    vdt = "<f4" if float32 else "<f8"
+    return b"".join([_HEADER.pack(_MAGIC, _VERSION, _F32 if float32 else 0, len(did), tz_offset_s, len(ts)), did, ts.tobytes()] +
+                    [np.ascontiguousarray(values[k], dtype=vdt).tobytes() for k in VALUE_COLUMNS])
+
+def content_kind(content_type: Optional[str]) -> str:
+    base = (content_type or "application/json").split(";")[0].strip().lower()
+    return {COLUMNS_JSON: "columns", FRAME: "frame"}.get(base, "json")
@@ -0,0 +1,191 @@
+# src/backend/api/writebehind.py
+# write-behind ingest: requests validate + enqueue (202), a background thread drains the queue in
+# micro-batches and writes each batch through pipeline.ingest_trips in one transaction (group commit).
+#
+# Durability: every accepted trip is appended to this worker's spill file before the 202 goes out and an
+# ack line is appended after its batch commits. On start, spill files left by dead workers (no flock
+# holder) are replayed; trips whose ingest_jobs row already exists were committed and are only acked.
+# A database error (OperationalError: down, locked) never fails a trip: the batch is held and retried after a
+# queue-level backoff (retry_min_s doubling to retry_max_s) until it commits or the worker stops; what is still
+# unacked then is in the spill file for the next start. Only other errors split a batch to fail the bad trip(s).
+import fcntl, json, os, pathlib, queue, threading, time, uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.exc import OperationalError
+from ..db.store import DB, get_session
+from ..db import telemetry as telemetry_codec
+from ..utils.cache import CACHE
+from .pipeline import ingest_trips
+from .schemas import TripIn
+
+class QueueFull(Exception): pass
+
+class WriteBehindQueue:
+    def __init__(self, max_pending: int = 10000, batch_size: int = 500, max_wait_s: float = 0.05,
+                 spill_dir: Optional[str] = None, fsync: bool = False, max_status: int = 100000,
+                 retry_min_s: float = 0.5, retry_max_s: float = 10.0):
+        self.max_pending, self.batch_size, self.max_wait_s = max_pending, batch_size, max_wait_s
+        self.retry_min_s, self.retry_max_s, self._backoff_s = retry_min_s, retry_max_s, 0.0
+        self.spill_dir, self.fsync, self.max_status = spill_dir, fsync, max_status
+        self._q: "queue.Queue[Tuple[str, dict, Optional[dict]]]" = queue.Queue()
+        self._lock = threading.Lock()            # guards _status, _pending and the spill file
+        self._status: "OrderedDict[str, dict]" = OrderedDict()
+        self._pending = 0
+        self._spill = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {"accepted": 0, "rejected": 0, "committed": 0, "failed": 0, "batches": 0, "replayed": 0, "db_retries": 0}
+
+    # -- lifecycle -------------------------------------------------------------------------------------
+    def start(self):
+        with self._lock:
+            if self._thread is not None: return
+            if self.spill_dir: self._open_spill()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ingest-writebehind", daemon=True)
+            self._thread.start()
+        if self.spill_dir: self._replay_orphans()
+
+    def stop(self, timeout: float = 30.0):
+        """Drain what is queued (bounded by timeout), then stop the consumer."""
+        t = self._thread
+        if t is None: return
+        deadline = time.monotonic() + timeout
+        while self._pending and time.monotonic() < deadline: time.sleep(0.01)
+        self._stop.set(); t.join(timeout=max(0.0, deadline - time.monotonic()) + 1.0)
+        with self._lock:
+            self._thread = None
+            if self._spill is not None:
+                if self._pending == 0: pathlib.Path(self._spill.name).unlink(missing_ok=True)
+                self._spill.close(); self._spill = None
+
+    # -- producer side -----------------------------------------------------------------------------------
+    def submit(self, trip: TripIn, telemetry: Optional[dict] = None) -> str:
+        if self._thread is None: self.start()
+        ingest_id = uuid.uuid4().hex
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.stats["rejected"] += 1; raise QueueFull(f"ingest queue full ({self.max_pending} pending)")
+            self._write_spill({"id": ingest_id, "trip": trip.model_dump(mode="json"),
+                               "telemetry": telemetry_codec.to_json(telemetry) if telemetry else None})
+            self._pending += 1; self.stats["accepted"] += 1
+            self._set_status(ingest_id, {"status": "queued", "driver_id": trip.driver_id})
+        self._q.put((ingest_id, trip.model_dump(), telemetry))
+        return ingest_id
+
+    def status(self, ingest_id: str) -> Optional[dict]:
+        with self._lock:
+            st = self._status.get(ingest_id)
+        if st is not None: return {"ingest_id": ingest_id, **st}
+        with get_session() as s: return DB.get_ingest_job(s, ingest_id)
+
+    def snapshot(self) -> Dict:
+        with self._lock: return {"pending": self._pending, "max_pending": self.max_pending, "backoff_s": self._backoff_s, **self.stats}
+
+    # -- consumer side -----------------------------------------------------------------------------------
+    def _run(self):
+        held: List[Tuple[str, dict, Optional[dict]]] = []   # items a database error sent back, retried first and in order
+        while not self._stop.is_set():
+            if held:
+                if self._stop.wait(self._backoff_s): break
+                batch = held
+            else:
+                try: first = self._q.get(timeout=0.2)
+                except queue.Empty: continue
+                batch = [first]; deadline = time.monotonic() + self.max_wait_s
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0: break
+                    try: batch.append(self._q.get(timeout=remaining))
+                    except queue.Empty: break
+            held = self._process(batch)
+            with self._lock:
+                if held: self.stats["db_retries"] += 1; self._backoff_s = min(max(2*self._backoff_s, self.retry_min_s), self.retry_max_s)
+                else: self._backoff_s = 0.0
+
+    def _process(self, batch: List[Tuple[str, dict, Optional[dict]]]) -> List[Tuple[str, dict, Optional[dict]]]:
+        """Writes batch in one transaction. Returns the items to retry after a backoff (database error), else []."""
+        dup: set = set()   # retried trips already stored under their natural key: done, with the existing trip id
+        try:
+            with get_session() as s:
+                trip_ids = ingest_trips(s, [t for _, t, _ in batch], [tel for _, _, tel in batch], dup)
+                DB.insert_ingest_jobs(s, [{"id": jid, "driver_id": t["driver_id"], "status": "done", "trip_id": tid, "error": None}
+                                          for (jid, t, _), tid in zip(batch, trip_ids)])
+        except OperationalError:
+            return batch   # database unavailable/locked, not the trips' fault: they stay queued (and in the spill file)
+        except Exception as e:
+            if len(batch) > 1:
+                for i, item in enumerate(batch):   # isolate the bad trip(s)
+                    held = self._process([item])
+                    if held: return held + batch[i+1:]
+                return []
+            jid, t, _ = batch[0]
+            try:
+                with get_session() as s:
+                    DB.insert_ingest_jobs(s, [{"id": jid, "driver_id": t["driver_id"], "status": "failed", "trip_id": None, "error": repr(e)}])
+            except OperationalError:
+                return batch   # the failure could not be recorded either: retry the trip once the database is back
+            except Exception: pass
+            self._finish([(jid, t["driver_id"], {"status": "failed", "error": repr(e)})]); return []
+        self.stats["batches"] += 1
+        self._finish([(jid, t["driver_id"], {"status": "done", "trip_id": tid, **({"duplicate": True} if i in dup else {})})
+                      for i, ((jid, t, _), tid) in enumerate(zip(batch, trip_ids))])
+        return []
+
+    def _finish(self, results):
+        CACHE.invalidate(*{d for _, d, _ in results})
+        with self._lock:
+            for jid, driver_id, st in results:
+                self._set_status(jid, {**st, "driver_id": driver_id})
+                self.stats["committed" if st["status"] == "done" else "failed"] += 1
+            self._pending -= len(results)
+            self._write_spill({"ack": [jid for jid, _, _ in results]})
+            if self._pending == 0 and self._spill is not None:
+                self._spill.seek(0); self._spill.truncate()  # everything acked: compact
+
+    def _set_status(self, ingest_id: str, st: dict):
+        self._status[ingest_id] = st; self._status.move_to_end(ingest_id)
+        while len(self._status) > self.max_status: self._status.popitem(last=False)
+
+    # -- spill file --------------------------------------------------------------------------------------
+    def _open_spill(self):
+        d = pathlib.Path(self.spill_dir); d.mkdir(parents=True, exist_ok=True)
+        self._spill = open(d / f"spill-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl", "a+")
+        fcntl.flock(self._spill, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _write_spill(self, record: dict):
+        if self._spill is None: return
+        self._spill.write(json.dumps(record, separators=(",", ":")) + "\n"); self._spill.flush()
+        if self.fsync: os.fsync(self._spill.fileno())
+
+    def _replay_orphans(self):
+        for path in sorted(pathlib.Path(self.spill_dir).glob("spill-*.jsonl")):
+            if self._spill is not None and path.name == pathlib.Path(self._spill.name).name: continue
+            with open(path, "r") as f:
+                try: fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError: continue  # owned by a live worker
+                entries, acked = OrderedDict(), set()
+                for line in f:
+                    try: rec = json.loads(line)
+                    except ValueError: continue  # torn last line from a crash
+                    if "ack" in rec: acked.update(rec["ack"])
+                    else: entries[rec["id"]] = rec
+                todo = {k: v for k, v in entries.items() if k not in acked}
+                if todo:
+                    with get_session() as s: done = DB.existing_ingest_jobs(s, todo)
+                    for jid, rec in todo.items():
+                        if jid in done: continue
+                        trip = TripIn.model_validate(rec["trip"])
+                        tel = telemetry_codec.from_json(rec["telemetry"]) if rec.get("telemetry") else None
+                        with self._lock:
+                            self._write_spill(rec); self._pending += 1; self.stats["replayed"] += 1
+                            self._set_status(jid, {"status": "queued", "driver_id": trip.driver_id})
+                        self._q.put((jid, trip.model_dump(), tel))
+            path.unlink(missing_ok=True)
+
+QUEUE = WriteBehindQueue(max_pending=int(os.getenv("INGEST_QUEUE_MAX", "10000")),
+                         batch_size=int(os.getenv("INGEST_BATCH_SIZE", "500")),
+                         max_wait_s=float(os.getenv("INGEST_BATCH_WAIT_MS", "50"))/1000.0,
+                         spill_dir=os.getenv("INGEST_SPILL_DIR", "./data/spill") or None,
+                         fsync=os.getenv("INGEST_SPILL_FSYNC", "false").lower() == "true",
+                         retry_max_s=float(os.getenv("INGEST_RETRY_MAX_S", "10")))
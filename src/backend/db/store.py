@@ -1,13 +1,38 @@
 from contextlib import contextmanager
 from typing import Optional, List
-from sqlalchemy import create_engine, String, Integer, Float, DateTime, ForeignKey, func, select
+from sqlalchemy import create_engine, event, Index, String, Integer, BigInteger, Float, DateTime, ForeignKey, LargeBinary, select, insert, update, delete, func, tuple_, exists, literal, text
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Mapped, mapped_column
 from datetime import datetime
-import os, json
+import os, json, threading, zlib
+from ..utils.metrics import instrument, span
 
 DB_URL = os.environ.get("DB_URL", "sqlite:///./telematics.db")
-engine = create_engine(DB_URL, echo=False, future=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+# init_db() creates missing tables from the models (local/SQLite); set false where alembic owns the schema
+DB_CREATE_SCHEMA = os.getenv("DB_CREATE_SCHEMA","true").lower()=="true"
+
+def make_engine(url: str):
+    if url.startswith("sqlite"):
+        eng = create_engine(url, echo=False, future=True)
+        if ":memory:" not in url and url.rstrip("/") != "sqlite:":
+            @event.listens_for(eng, "connect")
+            def _sqlite_pragmas(dbapi_conn, _):
+                # WAL lets readers run alongside the writer; NORMAL only fsyncs at checkpoints under WAL
+                cur = dbapi_conn.cursor()
+                cur.execute(f"PRAGMA journal_mode={os.getenv('SQLITE_JOURNAL_MODE','WAL')}")
+                cur.execute(f"PRAGMA synchronous={os.getenv('SQLITE_SYNCHRONOUS','NORMAL')}")
+                cur.execute(f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS','5000'))}")
+                cur.close()
+        return eng
+    return create_engine(url, echo=False, future=True, pool_pre_ping=True,
+                         pool_size=int(os.getenv("DB_POOL_SIZE","5")), max_overflow=int(os.getenv("DB_MAX_OVERFLOW","10")),
+                         pool_timeout=float(os.getenv("DB_POOL_TIMEOUT","30")), pool_recycle=int(os.getenv("DB_POOL_RECYCLE","1800")))
+
+# nothing touches the database at import time: init_db() (app lifespan, jobs, benches) builds the engine once
+# per process and binds SessionLocal; get_session() falls back to it lazily, without schema work
+engine = None
+SessionLocal = sessionmaker(autoflush=False, autocommit=False, expire_on_commit=False)
+_init_lock = threading.Lock()
+_schema_ready = False
 
 class Base(DeclarativeBase): pass
 
@@ -20,6 +45,10 @@ class Driver(Base):
 
 class Trip(Base):
     __tablename__ = "trips"
+    # per-driver scans: newest-by-id (aggregates/rescoring) and newest-by-start keyset pages (GET /trips, /summary);
+    # (driver_id, start_ts, end_ts) is the trip's natural key, unique so a retried ingest cannot store it twice
+    __table_args__ = (Index("ix_trips_driver_id_id", "driver_id", "id"), Index("ix_trips_driver_id_start_ts_id", "driver_id", "start_ts", "id"),
+                      Index("uq_trips_driver_id_start_ts_end_ts", "driver_id", "start_ts", "end_ts", unique=True))
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     driver_id: Mapped[str] = mapped_column(ForeignKey("drivers.id"))
     start_ts: Mapped[datetime] = mapped_column(DateTime)
@@ -41,15 +70,28 @@ class TripScore(Base):
 
 class DriverScore(Base):
     __tablename__ = "driver_scores"
+    __table_args__ = (Index("ix_driver_scores_score_driver_id", "score", "driver_id"),)  # fleet top-K (keyset)
     driver_id: Mapped[str] = mapped_column(ForeignKey("drivers.id"), primary_key=True)
     score: Mapped[float] = mapped_column(Float)
     breakdown: Mapped[str] = mapped_column(String)
     updated_at: Mapped[datetime] = mapped_column(DateTime)
 
+class DriverAggregate(Base):
+    # running distance-weighted accumulator over the last WINDOW_TRIPS trip scores (see ml/scoring.py)
+    __tablename__ = "driver_aggregates"
+    driver_id: Mapped[str] = mapped_column(ForeignKey("drivers.id"), primary_key=True)
+    weighted_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    total_distance: Mapped[float] = mapped_column(Float, default=0.0)
+    window: Mapped[str] = mapped_column(String, default="[]")
+    updated_at: Mapped[datetime] = mapped_column(DateTime)
+
 class Premium(Base):
     __tablename__ = "premiums"
+    __table_args__ = (Index("ix_premiums_premium_change_driver_id", "premium_change", "driver_id"),)
     driver_id: Mapped[str] = mapped_column(ForeignKey("drivers.id"), primary_key=True)
     monthly_premium: Mapped[float] = mapped_column(Float)
+    previous_premium: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # value before the last upsert
+    premium_change: Mapped[Optional[float]] = mapped_column(Float, nullable=True)    # monthly_premium - previous_premium
     breakdown: Mapped[str] = mapped_column(String)
     updated_at: Mapped[datetime] = mapped_column(DateTime)
 
@@ -61,22 +103,156 @@ class Enrichment(Base):
     local_crime_index: Mapped[float] = mapped_column(Float, default=0.0)
     local_crash_rate: Mapped[float] = mapped_column(Float, default=0.0)
     weather_risk: Mapped[float] = mapped_column(Float, default=0.0)
+    # risk-grid values (ml/risk_grid.py) blended over location_km km of the driver's trips. Ingest and
+    # jobs/enrich_locations write only these, POST /enrich only the columns above; a non-zero value set
+    # through /enrich takes precedence (DB.get_enrichment)
+    grid_crash_rate: Mapped[float] = mapped_column(Float, default=0.0)
+    grid_crime_index: Mapped[float] = mapped_column(Float, default=0.0)
+    location_km: Mapped[Optional[float]] = mapped_column(Float, nullable=True, default=0.0)
 
 class Gamification(Base):
     __tablename__ = "gamification"
+    __table_args__ = (Index("ix_gamification_points_driver_id", "points", "driver_id"),)
     driver_id: Mapped[str] = mapped_column(ForeignKey("drivers.id"), primary_key=True)
     safe_streak_days: Mapped[int] = mapped_column(Integer, default=0)
     last_safe_date: Mapped[str] = mapped_column(String, default="")
     points: Mapped[int] = mapped_column(Integer, default=0)
 
-Base.metadata.create_all(bind=engine)
+class ScoreHistogram(Base):
+    # driver count per 5-point score bucket, kept current by DB.upsert_driver_score. Sharded by driver_id so
+    # concurrent writers rarely touch the same counter row; readers sum the shards (bucket x shard rows).
+    __tablename__ = "score_histogram"
+    bucket: Mapped[int] = mapped_column(Integer, primary_key=True)
+    shard: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+HIST_BUCKET_WIDTH, HIST_BUCKETS, HIST_SHARDS = 5.0, 20, 16
+def score_bucket(score: float) -> int: return min(max(int(score // HIST_BUCKET_WIDTH), 0), HIST_BUCKETS - 1)
+def _hist_shard(driver_id: str) -> int: return zlib.crc32(driver_id.encode()) % HIST_SHARDS
+
+# fleet top-K orderings: name -> (model, value column); all keyset-paginated on (value, driver_id) indexes
+TOP_BY = {"score": (DriverScore, DriverScore.score), "premium_change": (Premium, Premium.premium_change),
+          "points": (Gamification, Gamification.points)}
+
+class TripTelemetry(Base):
+    # raw points of a trip as packed little-endian arrays (see db/telemetry.py): 20 bytes per point
+    __tablename__ = "trip_telemetry"
+    __table_args__ = (Index("ix_trip_telemetry_driver_id_trip_id", "driver_id", "trip_id"),)
+    trip_id: Mapped[int] = mapped_column(ForeignKey("trips.id"), primary_key=True)
+    driver_id: Mapped[str] = mapped_column(String)
+    n_points: Mapped[int] = mapped_column(Integer)
+    start_ms: Mapped[int] = mapped_column(BigInteger)       # epoch ms (UTC) of the first point
+    tz_offset_s: Mapped[int] = mapped_column(Integer)       # wall clock - UTC, for night-hour features
+    ts_ms: Mapped[bytes] = mapped_column(LargeBinary)       # int32 ms since start_ms
+    speed_kph: Mapped[bytes] = mapped_column(LargeBinary)   # float32
+    accel_mps2: Mapped[bytes] = mapped_column(LargeBinary)  # float32
+    lat: Mapped[bytes] = mapped_column(LargeBinary)         # float32
+    lon: Mapped[bytes] = mapped_column(LargeBinary)         # float32
+    nbytes: Mapped[int] = mapped_column(Integer)
+
+class IngestJob(Base):
+    # outcome of a trip accepted by the write-behind queue (api/writebehind.py), written in its group commit
+    __tablename__ = "ingest_jobs"
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    driver_id: Mapped[str] = mapped_column(String)
+    status: Mapped[str] = mapped_column(String)
+    trip_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime)
+
+class TripSession(Base):
+    # an open streamed trip (api/sessions.py): O(1) running accumulators, see ml/trip_summary.ACC_FIELDS
+    __tablename__ = "trip_sessions"
+    __table_args__ = (Index("ix_trip_sessions_status_last_seen_at", "status", "last_seen_at"),)
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    driver_id: Mapped[str] = mapped_column(String)
+    status: Mapped[str] = mapped_column(String, default="open")  # open | closed | expired | discarded
+    tz_offset_s: Mapped[int] = mapped_column(Integer, default=0)
+    opened_at: Mapped[datetime] = mapped_column(DateTime)
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime)
+    closed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    chunks: Mapped[int] = mapped_column(Integer, default=0)  # accepted appends; also the optimistic-lock version
+    trip_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    n_points: Mapped[int] = mapped_column(Integer, default=0)
+    late_points: Mapped[int] = mapped_column(Integer, default=0)
+    first_t: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # epoch seconds (UTC)
+    last_t: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    last_speed: Mapped[float] = mapped_column(Float, default=0.0)
+    distance_km: Mapped[float] = mapped_column(Float, default=0.0)
+    speed_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    speed_max: Mapped[float] = mapped_column(Float, default=0.0)
+    harsh_brakes: Mapped[int] = mapped_column(Integer, default=0)
+    speeding_events: Mapped[int] = mapped_column(Integer, default=0)
+    over_count: Mapped[int] = mapped_column(Integer, default=0)
+    night_count: Mapped[int] = mapped_column(Integer, default=0)
+    lat_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    lon_sum: Mapped[float] = mapped_column(Float, default=0.0)
+
+class ScoreVersion(Base):
+    # one historical rescoring run (jobs/rescore.py): scorer + checkpoints; status scoring -> staging -> ready -> live -> retired
+    __tablename__ = "score_versions"
+    version: Mapped[str] = mapped_column(String, primary_key=True)
+    scorer: Mapped[str] = mapped_column(String)                                  # rules | ml
+    model_version: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    status: Mapped[str] = mapped_column(String, default="scoring")
+    target_trip_id: Mapped[int] = mapped_column(Integer, default=0)              # max trips.id when the run started
+    after_trip_id: Mapped[int] = mapped_column(Integer, default=0)               # checkpoint: trips with id <= this are scored
+    after_driver_id: Mapped[Optional[str]] = mapped_column(String, nullable=True) # checkpoint: drivers <= this are staged
+    trips_scored: Mapped[int] = mapped_column(Integer, default=0)
+    drivers_staged: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    updated_at: Mapped[datetime] = mapped_column(DateTime)
+    cutover_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+class TripScoreVersion(Base):
+    # trip_scores as computed by one score version; copied into trip_scores at cutover
+    __tablename__ = "trip_score_versions"
+    version: Mapped[str] = mapped_column(String, primary_key=True)
+    trip_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    score: Mapped[float] = mapped_column(Float)
+    contrib: Mapped[str] = mapped_column(String)
+
+class DriverScoreVersion(Base):
+    # staged driver_aggregates + driver_scores + premiums row of one score version; copied into the live tables at cutover
+    __tablename__ = "driver_score_versions"
+    version: Mapped[str] = mapped_column(String, primary_key=True)
+    driver_id: Mapped[str] = mapped_column(String, primary_key=True)
+    weighted_sum: Mapped[float] = mapped_column(Float)
+    total_distance: Mapped[float] = mapped_column(Float)
+    window: Mapped[str] = mapped_column(String)
+    score: Mapped[float] = mapped_column(Float)
+    breakdown: Mapped[str] = mapped_column(String)
+    monthly_premium: Mapped[float] = mapped_column(Float)
+    premium_breakdown: Mapped[str] = mapped_column(String)
+
+def init_db(url: Optional[str] = None, create_schema: Optional[bool] = None):
+    """Create (once) the process engine and bind SessionLocal; with create_schema (default DB_CREATE_SCHEMA)
+    also create missing tables. -> engine"""
+    global engine, _schema_ready
+    with _init_lock:
+        if engine is None:
+            engine = make_engine(url or DB_URL); SessionLocal.configure(bind=engine)
+        if (DB_CREATE_SCHEMA if create_schema is None else create_schema) and not _schema_ready:
+            Base.metadata.create_all(bind=engine); _schema_ready = True
+        return engine
+
+def create_schema(url: Optional[str] = None):
+    """create_all on a throwaway engine, e.g. once in a pre-fork master, which must not keep connections."""
+    eng = make_engine(url or DB_URL)
+    try: Base.metadata.create_all(bind=eng)
+    finally: eng.dispose()
+
+def dispose_engine():
+    # forked workers must not reuse the parent's pooled connections
+    if engine is not None: engine.dispose(close=False)
 
 @contextmanager
 def get_session():
+    if engine is None: init_db(create_schema=False)
     s = SessionLocal()
     try:
         yield s
-        s.commit()
+        with span("db.commit"): s.commit()
     except Exception:
         s.rollback(); raise
     finally:
@@ -86,16 +262,48 @@ class DB:
     @staticmethod
     def get_driver(s, driver_id: str) -> Optional[Driver]: return s.get(Driver, driver_id)
     @staticmethod
+    def get_drivers(s, driver_ids)->dict:
+        return {d.id: d for d in s.execute(select(Driver).where(Driver.id.in_(list(driver_ids)))).scalars()}
+    @staticmethod
+    def lock_drivers(s, driver_ids):
+        # row locks on drivers, in id order so two batches cannot deadlock: the per-driver running state (aggregate,
+        # location risk, gamification) is read-modify-write and must not interleave between transactions.
+        # SQLite has no FOR UPDATE; its single writer already serializes these transactions.
+        s.execute(select(Driver.id).where(Driver.id.in_(sorted(set(driver_ids)))).order_by(Driver.id).with_for_update())
+    @staticmethod
     def create_driver(s, driver_id: str, name: str, base_rate: float, vehicle: str):
         s.add(Driver(id=driver_id, name=name, base_rate=base_rate, vehicle=vehicle))
         s.merge(Enrichment(driver_id=driver_id)); s.merge(Gamification(driver_id=driver_id))
+        s.flush()   # autoflush is off: later s.get()s in the same session (DB.set_enrichment) must see these rows
+    @staticmethod
+    def create_drivers_if_missing(s, rows:List[dict]):
+        # rows: [{"id","name","base_rate","vehicle"}]; INSERT .. ON CONFLICT DO NOTHING so two requests
+        # racing to create the same new driver both succeed
+        dialect = s.get_bind().dialect.name
+        if dialect not in ("sqlite", "postgresql"):
+            for r in rows: DB.create_driver(s, driver_id=r["id"], name=r["name"], base_rate=r["base_rate"], vehicle=r["vehicle"])
+            return
+        from importlib import import_module
+        insert = import_module(f"sqlalchemy.dialects.{dialect}").insert
+        ids = [{"driver_id": r["id"]} for r in rows]
+        for model, values in ((Driver, rows), (Enrichment, ids), (Gamification, ids)):
+            s.execute(insert(model).on_conflict_do_nothing(), values)
     @staticmethod
     def create_trip(s, **kwargs):
         t = Trip(**kwargs); s.add(t); s.flush(); return t.id
     @staticmethod
-    def last_trip_id(s) -> int:
-        tid = s.execute(select(func.max(Trip.id))).scalar_one()
-        return int(tid) if tid is not None else 0
+    def create_trips(s, rows:List[dict])->List[int]:
+        # one multi-row INSERT ... RETURNING; ids come back in the order of rows
+        if not rows: return []
+        return list(s.scalars(insert(Trip).returning(Trip.id, sort_by_parameter_order=True), rows))
+    @staticmethod
+    def existing_trip_ids(s, keys)->dict:
+        """natural keys (driver_id, start_ts, end_ts), naive UTC datetimes -> {key: trip id} for those already stored."""
+        keys = list(set(keys))
+        if not keys: return {}
+        rows = s.execute(select(Trip.driver_id, Trip.start_ts, Trip.end_ts, Trip.id)
+                         .where(tuple_(Trip.driver_id, Trip.start_ts, Trip.end_ts).in_(keys))).all()
+        return {(d, st, en): tid for d, st, en, tid in rows}
     @staticmethod
     def features_for_trip(trip_dict)->dict:
         return {k: trip_dict[k] for k in ["distance_km","avg_speed","max_speed","harsh_brakes","night_ratio","speeding_events"]}
@@ -103,6 +311,10 @@ class DB:
     def upsert_trip_score(s, trip_id:int, score:float, contrib:dict):
         s.merge(TripScore(trip_id=trip_id, score=score, contrib=json.dumps(contrib)))
     @staticmethod
+    def insert_trip_scores(s, rows:List[dict]):
+        # rows: [{"trip_id","score","contrib"(dict)}] for freshly created trips
+        if rows: s.execute(insert(TripScore), [{"trip_id":r["trip_id"],"score":r["score"],"contrib":json.dumps(r["contrib"])} for r in rows])
+    @staticmethod
     def aggregate_trip_features(s, driver_id:str)->list:
         rows = s.execute(select(Trip).where(Trip.driver_id==driver_id).order_by(Trip.id.desc()).limit(60)).scalars().all()
         return [{
@@ -111,23 +323,130 @@ class DB:
         } for r in rows]
     @staticmethod
     def upsert_driver_score(s, driver_id:str, score:float, breakdown:dict):
-        s.merge(DriverScore(driver_id=driver_id, score=score, breakdown=json.dumps(breakdown), updated_at=datetime.utcnow()))
+        ds = s.get(DriverScore, driver_id)
+        old = score_bucket(ds.score) if ds is not None else None
+        if ds is None: s.add(DriverScore(driver_id=driver_id, score=score, breakdown=json.dumps(breakdown), updated_at=datetime.utcnow()))
+        else: ds.score, ds.breakdown, ds.updated_at = score, json.dumps(breakdown), datetime.utcnow()
+        new = score_bucket(score)
+        if old != new: DB._bump_histogram(s, driver_id, old, new)
+    @staticmethod
+    def _bump_histogram(s, driver_id:str, old:Optional[int], new:int):
+        # histogram rows are never loaded as objects, so skip the ORM's identity-map sync (it scans the whole session)
+        shard = _hist_shard(driver_id)
+        if old is not None:
+            s.execute(update(ScoreHistogram).where(ScoreHistogram.bucket==old, ScoreHistogram.shard==shard).values(count=ScoreHistogram.count - 1)
+                      .execution_options(synchronize_session=False))
+        r = s.execute(update(ScoreHistogram).where(ScoreHistogram.bucket==new, ScoreHistogram.shard==shard).values(count=ScoreHistogram.count + 1)
+                      .execution_options(synchronize_session=False))
+        if r.rowcount == 0: DB._seed_histogram(s); DB._bump_histogram(s, driver_id, None, new)
+    @staticmethod
+    def _seed_histogram(s):
+        # creates the (bucket, shard) rows once; ON CONFLICT DO NOTHING so racing workers both succeed
+        rows = [{"bucket": b, "shard": k, "count": 0} for b in range(HIST_BUCKETS) for k in range(HIST_SHARDS)]
+        dialect = s.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            from importlib import import_module
+            s.execute(import_module(f"sqlalchemy.dialects.{dialect}").insert(ScoreHistogram).on_conflict_do_nothing(), rows)
+        else:
+            for r in rows: s.merge(ScoreHistogram(**r))
+            s.flush()
+    @staticmethod
+    def score_histogram(s)->List[dict]:
+        counts = dict(s.execute(select(ScoreHistogram.bucket, func.sum(ScoreHistogram.count)).group_by(ScoreHistogram.bucket)).all())
+        return [{"lo": b*HIST_BUCKET_WIDTH, "hi": (b+1)*HIST_BUCKET_WIDTH, "count": int(counts.get(b) or 0)} for b in range(HIST_BUCKETS)]
+    @staticmethod
+    def top_drivers(s, by:str, limit:int, desc:bool=True, after:Optional[tuple]=None)->List[dict]:
+        """Keyset page of drivers ordered by TOP_BY[by] then driver_id; after = (value, driver_id) of the last row seen.
+        Each page is an index range scan, so cost depends on limit, not fleet size."""
+        model, col = TOP_BY[by]
+        q = select(model).where(col.is_not(None))
+        if after is not None:
+            key = tuple_(col, model.driver_id)
+            q = q.where(key < tuple_(*after) if desc else key > tuple_(*after))
+        q = q.order_by(col.desc(), model.driver_id.desc()) if desc else q.order_by(col, model.driver_id)
+        rows = s.execute(q.limit(limit)).scalars().all()
+        if by == "score": return [{"driver_id": r.driver_id, "score": r.score, "updated_at": r.updated_at.isoformat()} for r in rows]
+        if by == "premium_change": return [{"driver_id": r.driver_id, "premium_change": r.premium_change, "monthly_premium": round(r.monthly_premium, 2),
+                                            "previous_premium": r.previous_premium, "updated_at": r.updated_at.isoformat()} for r in rows]
+        return [{"driver_id": r.driver_id, "points": r.points, "safe_streak_days": r.safe_streak_days} for r in rows]
     @staticmethod
     def get_driver_score(s, driver_id:str)->Optional[dict]:
         ds = s.get(DriverScore, driver_id); 
         if not ds: return None
         return {"driver_id":driver_id,"score":ds.score,"breakdown":json.loads(ds.breakdown),"updated_at":ds.updated_at.isoformat()}
     @staticmethod
+    def get_driver_aggregate(s, driver_id:str)->Optional[dict]:
+        a = s.get(DriverAggregate, driver_id)
+        if not a: return None
+        return {"weighted_sum":a.weighted_sum,"total_distance":a.total_distance,"window":json.loads(a.window)}
+    @staticmethod
+    def upsert_driver_aggregate(s, driver_id:str, weighted_sum:float, total_distance:float, window:list):
+        s.merge(DriverAggregate(driver_id=driver_id, weighted_sum=weighted_sum, total_distance=total_distance,
+                                window=json.dumps(window), updated_at=datetime.utcnow()))
+    @staticmethod
+    def recent_trip_scores(s, driver_id:str, limit:int=60)->list:
+        rows = s.execute(select(Trip.id, Trip.distance_km, TripScore.score, TripScore.contrib)
+                         .join(TripScore, TripScore.trip_id==Trip.id)
+                         .where(Trip.driver_id==driver_id).order_by(Trip.id.desc()).limit(limit)).all()
+        return [{"trip_id": r.id, "distance_km": r.distance_km, "score": r.score, "breakdown": json.loads(r.contrib)} for r in rows]
+    @staticmethod
+    def driver_ids(s)->List[str]:
+        return list(s.execute(select(Driver.id).order_by(Driver.id)).scalars())
+    @staticmethod
     def upsert_premium(s, driver_id:str, premium:float, breakdown:dict):
-        s.merge(Premium(driver_id=driver_id, monthly_premium=premium, breakdown=json.dumps(breakdown), updated_at=datetime.utcnow()))
+        p = s.get(Premium, driver_id)
+        if p is None: s.add(Premium(driver_id=driver_id, monthly_premium=premium, breakdown=json.dumps(breakdown), updated_at=datetime.utcnow()))
+        else:
+            p.previous_premium, p.premium_change = p.monthly_premium, premium - p.monthly_premium
+            p.monthly_premium, p.breakdown, p.updated_at = premium, json.dumps(breakdown), datetime.utcnow()
+    @staticmethod
+    def bulk_upsert_premiums(s, rows:List[dict]):
+        # rows: [{"driver_id","monthly_premium","breakdown"(json str)}]; one INSERT .. ON CONFLICT per call
+        if not rows: return
+        now = datetime.utcnow(); rows = [dict(r, updated_at=now) for r in rows]
+        dialect = s.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            from importlib import import_module
+            stmt = import_module(f"sqlalchemy.dialects.{dialect}").insert(Premium)
+            stmt = stmt.on_conflict_do_update(index_elements=[Premium.driver_id], set_={
+                "previous_premium": Premium.monthly_premium, "premium_change": stmt.excluded.monthly_premium - Premium.monthly_premium,
+                "monthly_premium": stmt.excluded.monthly_premium, "breakdown": stmt.excluded.breakdown, "updated_at": stmt.excluded.updated_at})
+            s.execute(stmt, rows)
+        else:
+            for r in rows: DB.upsert_premium(s, r["driver_id"], r["monthly_premium"], json.loads(r["breakdown"]))
+    @staticmethod
+    def pricing_inputs(s, after:Optional[str], upto:Optional[str], limit:int)->list:
+        # keyset page of (driver_id, score, base_rate, current premium) for drivers with a score, driver_id in (after, upto]
+        q = (select(DriverScore.driver_id, DriverScore.score, Driver.base_rate, Premium.monthly_premium)
+             .join(Driver, Driver.id==DriverScore.driver_id).outerjoin(Premium, Premium.driver_id==DriverScore.driver_id))
+        if after is not None: q = q.where(DriverScore.driver_id > after)
+        if upto is not None: q = q.where(DriverScore.driver_id <= upto)
+        return s.execute(q.order_by(DriverScore.driver_id).limit(limit)).all()
+    @staticmethod
+    def driver_score_bounds(s, parts:int)->List[Optional[str]]:
+        # split driver_scores into `parts` driver_id ranges (after, upto]: [None, id_1, ..., None]
+        n = s.execute(select(func.count()).select_from(DriverScore)).scalar_one()
+        step = -(-n // max(parts, 1)) if n else 0
+        cuts = [s.execute(select(DriverScore.driver_id).order_by(DriverScore.driver_id).offset(k*step - 1).limit(1)).scalar_one()
+                for k in range(1, parts) if k*step < n]
+        return [None, *cuts, None]
+    @staticmethod
+    def get_driver_summary(s, driver_id:str, trips:int=20, before:Optional[tuple]=None)->Optional[dict]:
+        """Score, premium, gamification and one page of trips in one session; None for an unknown driver."""
+        if not s.get(Driver, driver_id): return None
+        return {"driver_id": driver_id, "score": DB.get_driver_score(s, driver_id), "premium": DB.get_premium(s, driver_id),
+                "gamification": DB.get_gamification(s, driver_id), "trips": DB.get_trips(s, driver_id, trips, before)}
     @staticmethod
     def get_premium(s, driver_id:str)->Optional[dict]:
         p = s.get(Premium, driver_id); 
         if not p: return None
         return {"driver_id":driver_id,"monthly_premium":round(p.monthly_premium,2),"breakdown":json.loads(p.breakdown),"updated_at":p.updated_at.isoformat()}
     @staticmethod
-    def get_trips(s, driver_id:str)->List[dict]:
-        rows = s.execute(select(Trip).where(Trip.driver_id==driver_id).order_by(Trip.start_ts.desc()).limit(50)).scalars().all()
+    def get_trips(s, driver_id:str, limit:int=50, before:Optional[tuple]=None)->List[dict]:
+        """Keyset page of a driver's trips, newest first; before = (start_ts, id) of the last trip seen."""
+        q = select(Trip).where(Trip.driver_id==driver_id)
+        if before is not None: q = q.where(tuple_(Trip.start_ts, Trip.id) < tuple_(*before))
+        rows = s.execute(q.order_by(Trip.start_ts.desc(), Trip.id.desc()).limit(limit)).scalars().all()
         return [{
             "id": r.id, "start_ts": r.start_ts.isoformat(), "end_ts": r.end_ts.isoformat(),
             "distance_km": r.distance_km, "avg_speed": r.avg_speed, "max_speed": r.max_speed,
@@ -135,17 +454,112 @@ class DB:
             "centroid":[r.centroid_lat, r.centroid_lon]
         } for r in rows]
     @staticmethod
+    def insert_trip_telemetry(s, rows:List[dict]):
+        # rows: db/telemetry.pack_columns() output + trip_id/driver_id
+        if rows: s.execute(insert(TripTelemetry), rows)
+    @staticmethod
+    def get_trip_telemetry(s, trip_id:int)->Optional[TripTelemetry]:
+        return s.get(TripTelemetry, trip_id)
+    @staticmethod
+    def get_trip_telemetry_many(s, trip_ids:List[int])->List[TripTelemetry]:
+        return list(s.execute(select(TripTelemetry).where(TripTelemetry.trip_id.in_(trip_ids)).order_by(TripTelemetry.trip_id)).scalars())
+    @staticmethod
+    def telemetry_trip_ids(s, driver_id:Optional[str]=None)->List[int]:
+        q = select(TripTelemetry.trip_id).order_by(TripTelemetry.trip_id)
+        if driver_id: q = q.where(TripTelemetry.driver_id==driver_id)
+        return list(s.execute(q).scalars())
+    @staticmethod
+    def enforce_telemetry_retention(s, driver_id:str, max_bytes:int)->int:
+        # keep the newest trips' points within max_bytes for this driver; older points are dropped, trips stay
+        rows = s.execute(select(TripTelemetry.trip_id, TripTelemetry.nbytes).where(TripTelemetry.driver_id==driver_id)
+                         .order_by(TripTelemetry.trip_id.desc())).all()
+        total, drop = 0, []
+        for trip_id, nbytes in rows:
+            total += nbytes
+            if total > max_bytes: drop.append(trip_id)
+        if drop: s.execute(delete(TripTelemetry).where(TripTelemetry.trip_id.in_(drop)))
+        return len(drop)
+    @staticmethod
+    def telemetry_bytes(s, driver_id:Optional[str]=None)->int:
+        q = select(func.coalesce(func.sum(TripTelemetry.nbytes), 0))
+        if driver_id: q = q.where(TripTelemetry.driver_id==driver_id)
+        return int(s.execute(q).scalar_one())
+    @staticmethod
+    def update_trip_features(s, trip_id:int, **features):
+        t = s.get(Trip, trip_id)
+        for k, v in features.items(): setattr(t, k, v)
+    @staticmethod
     def set_enrichment(s, driver_id:str, **kwargs):
         row = s.get(Enrichment, driver_id) or Enrichment(driver_id=driver_id)
         for k,v in kwargs.items():
             if hasattr(row,k) and v is not None: setattr(row,k,float(v))
         s.merge(row)
     @staticmethod
+    def blend_location_risk(s, driver_id:str, crash_rate:float, crime_index:float, km:float, horizon_km:float):
+        # distance-weighted running mean of the risk-grid values seen on the driver's trips (ml/risk_grid.blend)
+        from ..ml.risk_grid import blend
+        row = s.get(Enrichment, driver_id)
+        if row is None: row = Enrichment(driver_id=driver_id); s.add(row)
+        row.grid_crash_rate, _ = blend(row.grid_crash_rate or 0.0, row.location_km, crash_rate, km, horizon_km)
+        row.grid_crime_index, row.location_km = blend(row.grid_crime_index or 0.0, row.location_km, crime_index, km, horizon_km)
+    @staticmethod
+    def set_location_risk(s, rows:List[dict]):
+        # rows: [{"driver_id","grid_crash_rate","grid_crime_index","location_km"}] (backfill); creates missing enrichment rows
+        if not rows: return
+        have = set(s.execute(select(Enrichment.driver_id).where(Enrichment.driver_id.in_([r["driver_id"] for r in rows]))).scalars())
+        if len(have) < len(rows): s.execute(insert(Enrichment), [r for r in rows if r["driver_id"] not in have])
+        if have: s.execute(update(Enrichment), [r for r in rows if r["driver_id"] in have])
+    @staticmethod
+    def trip_centroids(s, after_id:int, limit:int)->list:
+        # keyset page of (id, driver_id, distance_km, centroid_lat, centroid_lon) by trip id
+        return s.execute(select(Trip.id, Trip.driver_id, Trip.distance_km, Trip.centroid_lat, Trip.centroid_lon)
+                         .where(Trip.id > after_id).order_by(Trip.id).limit(limit)).all()
+    @staticmethod
     def get_enrichment(s, driver_id:str)->dict:
         row = s.get(Enrichment, driver_id)
         if not row: return {}
         return {"vehicle_risk":row.vehicle_risk,"driver_history_risk":row.driver_history_risk,
-                "local_crime_index":row.local_crime_index,"local_crash_rate":row.local_crash_rate,"weather_risk":row.weather_risk}
+                "local_crime_index":row.local_crime_index or row.grid_crime_index,"local_crash_rate":row.local_crash_rate or row.grid_crash_rate,
+                "weather_risk":row.weather_risk}
+    @staticmethod
+    def insert_ingest_jobs(s, rows:List[dict]):
+        # rows: [{"id","driver_id","status","trip_id","error"}]
+        if rows:
+            now = datetime.utcnow(); s.execute(insert(IngestJob), [dict(r, updated_at=now) for r in rows])
+    @staticmethod
+    def existing_ingest_jobs(s, ingest_ids)->set:
+        return set(s.execute(select(IngestJob.id).where(IngestJob.id.in_(list(ingest_ids)))).scalars())
+    @staticmethod
+    def get_ingest_job(s, ingest_id:str)->Optional[dict]:
+        j = s.get(IngestJob, ingest_id)
+        if not j: return None
+        return {"ingest_id":j.id,"driver_id":j.driver_id,"status":j.status,"trip_id":j.trip_id,"error":j.error,"updated_at":j.updated_at.isoformat()}
+    @staticmethod
+    def create_trip_session(s, session_id:str, driver_id:str, tz_offset_s:int)->TripSession:
+        now = datetime.utcnow()
+        row = TripSession(id=session_id, driver_id=driver_id, status="open", tz_offset_s=tz_offset_s, opened_at=now, last_seen_at=now, chunks=0)
+        s.add(row); return row
+    @staticmethod
+    def get_trip_session(s, session_id:str)->Optional[TripSession]: return s.get(TripSession, session_id)
+    @staticmethod
+    def update_trip_session(s, session_id:str, chunks:int, values:dict)->bool:
+        # compare-and-set on chunks so two concurrent appends to one session cannot both apply to the same state
+        r = s.execute(update(TripSession).where(TripSession.id==session_id, TripSession.status=="open", TripSession.chunks==chunks)
+                      .values(chunks=chunks+1, last_seen_at=datetime.utcnow(), **values))
+        return r.rowcount == 1
+    @staticmethod
+    def claim_trip_session(s, session_id:str, status:str, idle_before:Optional[datetime]=None)->bool:
+        """open -> status, once: the caller that gets True owns turning the session into a trip."""
+        q = update(TripSession).where(TripSession.id==session_id, TripSession.status=="open")
+        if idle_before is not None: q = q.where(TripSession.last_seen_at < idle_before)
+        return s.execute(q.values(status=status, closed_at=datetime.utcnow())).rowcount == 1
+    @staticmethod
+    def finish_trip_session(s, session_id:str, status:str, trip_id:Optional[int]):
+        s.execute(update(TripSession).where(TripSession.id==session_id).values(status=status, trip_id=trip_id))
+    @staticmethod
+    def idle_trip_session_ids(s, idle_before:datetime, limit:int)->List[str]:
+        return list(s.execute(select(TripSession.id).where(TripSession.status=="open", TripSession.last_seen_at < idle_before)
+                              .order_by(TripSession.last_seen_at).limit(limit)).scalars())
     @staticmethod
     def get_gamification(s, driver_id:str)->dict:
         g = s.get(Gamification, driver_id)
@@ -163,3 +577,121 @@ class DB:
         else:
             g.safe_streak_days = 0
         s.merge(g)
+
+    # -- versioned rescoring (jobs/rescore.py) ------------------------------------------------------------------
+    @staticmethod
+    def get_score_version(s, version:str)->Optional[dict]:
+        v = s.get(ScoreVersion, version)
+        if v is None: return None
+        return {c.name: getattr(v, c.name) for c in ScoreVersion.__table__.columns}
+    @staticmethod
+    def score_versions(s)->List[dict]:
+        return [{c.name: getattr(v, c.name) for c in ScoreVersion.__table__.columns}
+                for v in s.execute(select(ScoreVersion).order_by(ScoreVersion.created_at)).scalars()]
+    @staticmethod
+    def create_score_version(s, version:str, scorer:str, model_version:Optional[str])->dict:
+        now = datetime.utcnow(); target = s.execute(select(func.max(Trip.id))).scalar_one() or 0
+        s.add(ScoreVersion(version=version, scorer=scorer, model_version=model_version, status="scoring", target_trip_id=target,
+                           after_trip_id=0, trips_scored=0, drivers_staged=0, created_at=now, updated_at=now))
+        s.flush(); return DB.get_score_version(s, version)
+    @staticmethod
+    def update_score_version(s, version:str, expect:Optional[str]=None, **values)->bool:
+        # values: status/checkpoint/counter columns; with expect=, only a version still in that status is updated (claim)
+        q = update(ScoreVersion).where(ScoreVersion.version==version)
+        if expect is not None: q = q.where(ScoreVersion.status==expect)
+        return s.execute(q.values(updated_at=datetime.utcnow(), **values).execution_options(synchronize_session=False)).rowcount == 1
+    @staticmethod
+    def trip_feature_chunk(s, after_id:int, upto_id:Optional[int], limit:int)->list:
+        # keyset page of (id, driver_id, distance_km, avg_speed, max_speed, harsh_brakes, night_ratio, speeding_events) by trip id
+        q = select(Trip.id, Trip.driver_id, Trip.distance_km, Trip.avg_speed, Trip.max_speed, Trip.harsh_brakes,
+                   Trip.night_ratio, Trip.speeding_events).where(Trip.id > after_id)
+        if upto_id is not None: q = q.where(Trip.id <= upto_id)
+        return s.execute(q.order_by(Trip.id).limit(limit)).all()
+    @staticmethod
+    def scored_trip_bounds(s)->tuple:
+        """(number of scored trips, newest scored trip id): a fixed snapshot to stream training rows up to."""
+        n, upto = s.execute(select(func.count(), func.max(TripScore.trip_id))).one()
+        return n, upto or 0
+    @staticmethod
+    def scored_trip_chunk(s, after_id:int, upto_id:int, limit:int)->list:
+        # keyset page of (id, distance_km, avg_speed, max_speed, harsh_brakes, night_ratio, speeding_events, stored score)
+        # by trip id: model training rows
+        return s.execute(select(Trip.id, Trip.distance_km, Trip.avg_speed, Trip.max_speed, Trip.harsh_brakes, Trip.night_ratio,
+                                Trip.speeding_events, TripScore.score).join(TripScore, TripScore.trip_id==Trip.id)
+                         .where(Trip.id > after_id, Trip.id <= upto_id).order_by(Trip.id).limit(limit)).all()
+    @staticmethod
+    def insert_trip_score_versions(s, version:str, rows:List[dict]):
+        # rows: [{"trip_id","score","contrib"(json str)}]
+        # Core insert: skips the ORM bulk-insert bookkeeping, which costs more than the INSERT itself at job volumes
+        if rows: s.execute(insert(TripScoreVersion.__table__), [dict(r, version=version) for r in rows])
+    @staticmethod
+    def scored_driver_ids(s, after:Optional[str], limit:int)->List[str]:
+        # keyset page of drivers that have trips (ix_trips_driver_id_id)
+        q = select(Trip.driver_id).distinct()
+        if after is not None: q = q.where(Trip.driver_id > after)
+        return list(s.execute(q.order_by(Trip.driver_id).limit(limit)).scalars())
+    @staticmethod
+    def version_trip_windows(s, version:str, driver_ids:List[str], limit:int)->dict:
+        # {driver_id: newest-first [{"trip_id","distance_km","score","breakdown"}]} over the version's trip scores, <= limit per driver
+        rn = func.row_number().over(partition_by=Trip.driver_id, order_by=Trip.id.desc()).label("rn")
+        sub = (select(Trip.driver_id, Trip.id, Trip.distance_km, TripScoreVersion.score, TripScoreVersion.contrib, rn)
+               .join(TripScoreVersion, (TripScoreVersion.trip_id==Trip.id) & (TripScoreVersion.version==version))
+               .where(Trip.driver_id.in_(driver_ids)).subquery())
+        out = {d: [] for d in driver_ids}
+        for r in s.execute(select(sub).where(sub.c.rn <= limit).order_by(sub.c.driver_id, sub.c.rn)):
+            out[r.driver_id].append({"trip_id": r.id, "distance_km": r.distance_km, "score": r.score, "breakdown": json.loads(r.contrib)})
+        return out
+    @staticmethod
+    def get_enrichments(s, driver_ids)->dict:
+        # loads the rows into the session, so DB.get_enrichment on them is an identity-map hit
+        return {e.driver_id: e for e in s.execute(select(Enrichment).where(Enrichment.driver_id.in_(list(driver_ids)))).scalars()}
+    @staticmethod
+    def stage_driver_score_versions(s, version:str, rows:List[dict]):
+        # rows: DriverScoreVersion columns minus version (JSON already encoded); replaces earlier staging of the same drivers
+        if not rows: return
+        s.execute(delete(DriverScoreVersion).where(DriverScoreVersion.version==version,
+                                                   DriverScoreVersion.driver_id.in_([r["driver_id"] for r in rows])))
+        s.execute(insert(DriverScoreVersion.__table__), [dict(r, version=version) for r in rows])
+    @staticmethod
+    def lock_trips(s):
+        # cutover: hold off concurrent ingest until commit. Postgres: block trip inserts; SQLite: the transaction's
+        # first write (the status claim before this call) already holds the database write lock
+        if s.get_bind().dialect.name == "postgresql": s.execute(text("LOCK TABLE trips IN SHARE ROW EXCLUSIVE MODE"))
+    @staticmethod
+    def apply_score_version(s, version:str)->dict:
+        # set-based copy of a staged version into trip_scores / driver_aggregates / driver_scores / premiums, in the caller's transaction
+        now = datetime.utcnow(); v, d = TripScoreVersion, DriverScoreVersion; n = {}
+        def copy(model, key, src, src_key, values, insert_cols):
+            up = s.execute(update(model).where(key==src_key, src.version==version).values(**values)
+                           .execution_options(synchronize_session=False)).rowcount
+            new = s.execute(insert(model).from_select(list(insert_cols), select(*insert_cols.values())
+                            .where(src.version==version, ~exists().where(key==src_key)))).rowcount
+            n[model.__tablename__] = up + max(new, 0)
+        copy(TripScore, TripScore.trip_id, v, v.trip_id, {"score": v.score, "contrib": v.contrib},
+             {"trip_id": v.trip_id, "score": v.score, "contrib": v.contrib})
+        copy(DriverAggregate, DriverAggregate.driver_id, d, d.driver_id,
+             {"weighted_sum": d.weighted_sum, "total_distance": d.total_distance, "window": d.window, "updated_at": now},
+             {"driver_id": d.driver_id, "weighted_sum": d.weighted_sum, "total_distance": d.total_distance, "window": d.window,
+              "updated_at": literal(now)})
+        copy(DriverScore, DriverScore.driver_id, d, d.driver_id, {"score": d.score, "breakdown": d.breakdown, "updated_at": now},
+             {"driver_id": d.driver_id, "score": d.score, "breakdown": d.breakdown, "updated_at": literal(now)})
+        copy(Premium, Premium.driver_id, d, d.driver_id,
+             {"previous_premium": Premium.monthly_premium, "premium_change": d.monthly_premium - Premium.monthly_premium,
+              "monthly_premium": d.monthly_premium, "breakdown": d.premium_breakdown, "updated_at": now},
+             {"driver_id": d.driver_id, "monthly_premium": d.monthly_premium, "breakdown": d.premium_breakdown, "updated_at": literal(now)})
+        DB.rebuild_score_histogram(s)
+        return n
+    @staticmethod
+    def rebuild_score_histogram(s):
+        counts = [[0]*HIST_SHARDS for _ in range(HIST_BUCKETS)]
+        for driver_id, score in s.execute(select(DriverScore.driver_id, DriverScore.score).execution_options(yield_per=10000)):
+            counts[score_bucket(score)][_hist_shard(driver_id)] += 1
+        s.execute(delete(ScoreHistogram))
+        s.execute(insert(ScoreHistogram), [{"bucket": b, "shard": k, "count": counts[b][k]} for b in range(HIST_BUCKETS) for k in range(HIST_SHARDS)])
+    @staticmethod
+    def drop_score_version(s, version:str):
+        s.execute(delete(TripScoreVersion).where(TripScoreVersion.version==version))
+        s.execute(delete(DriverScoreVersion).where(DriverScoreVersion.version==version))
+        s.execute(delete(ScoreVersion).where(ScoreVersion.version==version))
+
+instrument(DB)  # per-method latency histograms on /metrics
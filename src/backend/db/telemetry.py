@@ -0,0 +1,42 @@
+# src/backend/db/telemetry.py
+# compact columnar encoding of a trip's raw points (trip_telemetry table).
+#
+# Layout per point, little-endian, time-sorted:  ts int32 (ms since start_ms) | speed, accel, lat, lon float32
+#   = 20 bytes/point (a 1 Hz one-hour trip is ~72 KB) plus one row of fixed columns per trip.
+# float32 keeps ~7 significant digits: speeds/accels to well under 0.01, lat/lon to ~0.5 m.
+# Reads are zero-copy: np.frombuffer views straight over the stored bytes.
+import base64
+from typing import Dict, Optional
+import numpy as np
+
+BYTES_PER_POINT = 20
+_F32, _I32 = np.dtype("<f4"), np.dtype("<i4")
+VALUE_COLUMNS = ("speed_kph", "accel_mps2", "lat", "lon")
+
+def pack_columns(cols: Dict[str, np.ndarray]) -> Optional[dict]:
+    """trip_summary columns -> trip_telemetry row fields; None if the trip spans more than int32 ms (~24 days)."""
+    order = np.argsort(cols["t"], kind="stable")
+    t_ms = np.round(cols["t"][order] * 1000.0).astype(np.int64)
+    start_ms = int(t_ms[0]); offsets = t_ms - start_ms
+    if offsets[-1] > np.iinfo(np.int32).max: return None
+    row = {"n_points": int(len(order)), "start_ms": start_ms,
+           "tz_offset_s": int(round(float(cols["wall"][order[0]] - cols["t"][order[0]]))),
+           "ts_ms": offsets.astype(_I32).tobytes()}
+    for k in VALUE_COLUMNS: row[k] = cols[k][order].astype(_F32).tobytes()
+    row["nbytes"] = BYTES_PER_POINT * row["n_points"]
+    return row
+
+def unpack_row(row) -> Dict[str, np.ndarray]:
+    """trip_telemetry row (ORM object or dict) -> trip_summary columns; value columns are views over the blobs."""
+    get = row.get if isinstance(row, dict) else (lambda k: getattr(row, k))
+    t = get("start_ms") / 1000.0 + np.frombuffer(get("ts_ms"), dtype=_I32) / 1000.0
+    cols = {"t": t, "wall": t + get("tz_offset_s")}
+    for k in VALUE_COLUMNS: cols[k] = np.frombuffer(get(k), dtype=_F32)
+    return cols
+
+def to_json(row: dict) -> dict:
+    # spill-file form for the write-behind queue
+    return {k: base64.b64encode(v).decode() if isinstance(v, bytes) else v for k, v in row.items()}
+
+def from_json(d: dict) -> dict:
+    return {k: base64.b64decode(v) if k in ("ts_ms",) + VALUE_COLUMNS else v for k, v in d.items()}
@@ -0,0 +1,55 @@
+# src/backend/jobs/enrich_locations.py
+# backfills grid_crash_rate/grid_crime_index for every driver from the risk grid (ml/risk_grid.py): streams trip
+# centroids in id (= ingest) order, looks each chunk up in one vectorized call and replays the ingest blend one trip
+# at a time, then writes the enrichment rows (and optionally the driver scores/premiums, not gamification) in bulk.
+# The result equals what ingesting the trips one by one produces. Trips that came in one batch were blended as a
+# single distance-weighted mean, which differs once LOCATION_RISK_HORIZON_KM caps the weight mid-batch.
+# Values set through POST /enrich live in their own columns and are left alone.
+#   python -m src.backend.jobs.enrich_locations [--grid data/risk_grid.npz] [--chunk 50000] [--refresh-scores]
+import argparse, time
+from typing import Dict, List
+from ..db.store import DB, get_session
+from ..ml.risk_grid import LOCATION_RISK_HORIZON_KM, RiskGrid, blend, get_grid
+from ..ml.scoring import rebuild_driver_aggregate
+from ..api.pipeline import publish_driver_score
+
+def location_risk(grid: RiskGrid, chunk=50000, horizon_km=LOCATION_RISK_HORIZON_KM) -> Dict[str, List[float]]:
+    """-> {driver_id: [crash_rate, crime_index, location_km]} over all stored trips, oldest first."""
+    out: Dict[str, List[float]] = {}; after = 0
+    while True:
+        with get_session() as s: rows = DB.trip_centroids(s, after, chunk)
+        if not rows: break
+        after = rows[-1][0]
+        crash, crime = grid.lookup([r[3] for r in rows], [r[4] for r in rows])
+        for (_, d, km, _, _), c, r in zip(rows, crash.tolist(), crime.tolist()):
+            if c != c or r != r: continue   # NaN: off-grid or no data, as at ingest
+            km = max(km, 0.1); acc = out.setdefault(d, [0.0, 0.0, 0.0])
+            acc[0], _ = blend(acc[0], acc[2], c, km, horizon_km); acc[1], acc[2] = blend(acc[1], acc[2], r, km, horizon_km)
+    return out
+
+def enrich(grid_path=None, chunk=50000, refresh_scores=False, write_chunk=5000):
+    t0 = time.perf_counter()
+    grid = RiskGrid.load(grid_path) if grid_path else get_grid()
+    if grid is None: raise SystemExit("[jobs] no risk grid: set RISK_GRID_PATH or pass --grid (bin/build_risk_grid.py builds one)")
+    risk = location_risk(grid, chunk); ids = sorted(risk)
+    for i in range(0, len(ids), write_chunk):
+        with get_session() as s:
+            drivers = DB.get_drivers(s, ids[i:i+write_chunk]); DB.lock_drivers(s, drivers)
+            part = [d for d in ids[i:i+write_chunk] if d in drivers]
+            DB.set_location_risk(s, [{"driver_id": d, "grid_crash_rate": risk[d][0], "grid_crime_index": risk[d][1],
+                                      "location_km": risk[d][2]} for d in part])
+            if refresh_scores:
+                for d in part:
+                    agg = DB.get_driver_aggregate(s, d) or rebuild_driver_aggregate(s, d)
+                    if agg["window"]: publish_driver_score(s, drivers[d], agg)
+    return {"drivers": len(ids), "seconds": time.perf_counter() - t0, "grid": repr(grid)}
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--grid", default=None, help="risk layer .npz/.csv (default RISK_GRID_PATH)")
+    ap.add_argument("--chunk", type=int, default=50000)
+    ap.add_argument("--refresh-scores", action="store_true", help="also republish driver score and premium with the new enrichment")
+    args = ap.parse_args()
+    r = enrich(args.grid, args.chunk, args.refresh_scores)
+    print(f"[jobs] {r['grid']}\n[jobs] set location risk for {r['drivers']} driver(s) in {r['seconds']:.1f}s")
+
+if __name__ == "__main__": main()
@@ -0,0 +1,31 @@
+# src/backend/jobs/rebuild_aggregates.py
+# recomputes driver_aggregates from trip_scores (run when the running sums drift or rows are missing);
+# --refresh-scores also republishes score and premium the way ingest does (gamification is left alone: no trip was
+# driven). One commit per chunk of drivers.
+#   python -m src.backend.jobs.rebuild_aggregates [--driver-id D001] [--refresh-scores] [--chunk 500]
+import argparse
+from ..db.store import DB, get_session
+from ..ml.scoring import rebuild_driver_aggregate
+from ..api.pipeline import publish_driver_score
+
+def rebuild(driver_ids=None, refresh_scores=False, chunk=500):
+    if not driver_ids:
+        with get_session() as s: driver_ids = DB.driver_ids(s)
+    for i in range(0, len(driver_ids), chunk):
+        ids = driver_ids[i:i+chunk]
+        with get_session() as s:
+            drivers = DB.get_drivers(s, ids); DB.lock_drivers(s, drivers)
+            for driver_id in ids:
+                agg = rebuild_driver_aggregate(s, driver_id)
+                if refresh_scores and agg["window"] and driver_id in drivers: publish_driver_score(s, drivers[driver_id], agg)
+    return len(driver_ids)
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--driver-id", action="append", default=None)
+    ap.add_argument("--refresh-scores", action="store_true", help="also rewrite driver score and premium from the rebuilt aggregate")
+    ap.add_argument("--chunk", type=int, default=500, help="drivers per transaction")
+    args = ap.parse_args()
+    n = rebuild(args.driver_id, args.refresh_scores, args.chunk)
+    print(f"[jobs] rebuilt driver aggregates for {n} driver(s)")
+
+if __name__ == "__main__": main()
@@ -0,0 +1,47 @@
+# src/backend/jobs/replay_telemetry.py
+# re-summarizes trips from their stored raw points (trip_telemetry) with the current feature rules and model,
+# rewrites trip features + trip_scores, then rebuilds the affected drivers' aggregates, scores and premiums.
+#   python -m src.backend.jobs.replay_telemetry [--driver-id D001] [--dry-run]
+import argparse, time
+from ..db.store import DB, get_session
+from ..db.telemetry import unpack_row
+from ..ml.trip_summary import summarize_columns
+from ..ml.scoring import score_trips, rebuild_driver_aggregate, driver_score_from_aggregate
+from ..ml.pricing import premium_from_score
+from ..api.pipeline import use_ml
+
+FEATURE_KEYS = ("distance_km","avg_speed","max_speed","harsh_brakes","night_ratio","speeding_events","centroid_lat","centroid_lon")
+
+def replay(driver_id=None, chunk=500, dry_run=False):
+    t0 = time.perf_counter(); n = 0; drivers = set()
+    with get_session() as s:
+        trip_ids = DB.telemetry_trip_ids(s, driver_id)
+    for i in range(0, len(trip_ids), chunk):
+        with get_session() as s:
+            rows = DB.get_trip_telemetry_many(s, trip_ids[i:i+chunk])
+            feats = [{k: v for k, v in summarize_columns(unpack_row(r)).items() if k in FEATURE_KEYS} for r in rows]
+            scored = score_trips(feats, use_ml=use_ml())
+            for r, f, (sc, contrib) in zip(rows, feats, scored):
+                drivers.add(r.driver_id)
+                if dry_run: continue
+                DB.update_trip_features(s, r.trip_id, **f)
+                DB.upsert_trip_score(s, trip_id=r.trip_id, score=sc, contrib=contrib)
+            if dry_run: s.rollback()
+        n += len(rows)
+    if not dry_run:
+        with get_session() as s:
+            for d in sorted(drivers):
+                agg = rebuild_driver_aggregate(s, d)
+                score, breakdown = driver_score_from_aggregate(s, d, agg)
+                DB.upsert_driver_score(s, driver_id=d, score=score, breakdown=breakdown)
+                premium, pb = premium_from_score(base_rate=DB.get_driver(s, d).base_rate, score=score)
+                DB.upsert_premium(s, driver_id=d, premium=premium, breakdown=pb)
+    return n, len(drivers), time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--driver-id", default=None); ap.add_argument("--chunk", type=int, default=500)
+    ap.add_argument("--dry-run", action="store_true"); args = ap.parse_args()
+    n, d, secs = replay(args.driver_id, args.chunk, args.dry_run)
+    print(f"[jobs] replayed {n} trip(s) for {d} driver(s) in {secs:.1f}s ({n/max(secs,1e-9):.0f} trips/s){' (dry run)' if args.dry_run else ''}")
+
+if __name__ == "__main__": main()
@@ -0,0 +1,72 @@
+# src/backend/jobs/reprice.py
+# reprices the whole book after a change to the pricing curve or to Driver.base_rate: streams
+# (driver score, base rate) in keyset chunks, applies the vectorized curve and bulk-upserts premiums.
+# Driver-id ranges are spread over a process pool.
+#   python -m src.backend.jobs.reprice [--workers 4] [--chunk 5000] [--dry-run]
+import argparse, json, time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ..db import store
+from ..db.store import DB, get_session
+from ..ml.pricing import premiums_from_scores
+
+def _init_worker():
+    store.dispose_engine()
+
+def reprice_range(after, upto, chunk=5000, dry_run=False, top=5):
+    stats = {"rows": 0, "changed": 0, "delta_sum": 0.0, "max_abs_delta": 0.0, "top": []}
+    while True:
+        with get_session() as s:
+            rows = DB.pricing_inputs(s, after, upto, chunk)
+            if not rows: break
+            ids = [r[0] for r in rows]
+            scores = np.fromiter((r[1] for r in rows), np.float64, len(rows))
+            base = np.fromiter((r[2] for r in rows), np.float64, len(rows))
+            old = np.array([np.nan if r[3] is None else r[3] for r in rows], dtype=np.float64)
+            premiums, mult = premiums_from_scores(base, scores)
+            delta = premiums - np.nan_to_num(old, nan=0.0)
+            changed = np.isnan(old) | (np.abs(np.round(old, 2) - premiums) >= 0.005)
+            stats["rows"] += len(rows); stats["changed"] += int(changed.sum()); stats["delta_sum"] += float(delta[changed].sum())
+            if changed.any():
+                stats["max_abs_delta"] = max(stats["max_abs_delta"], float(np.abs(delta[changed]).max()))
+                for i in np.argsort(-np.abs(np.where(changed, delta, 0.0)))[:top]:
+                    if changed[i]: stats["top"].append((ids[i], None if np.isnan(old[i]) else float(old[i]), float(premiums[i])))
+                stats["top"] = sorted(stats["top"], key=lambda t: -abs(t[2] - (t[1] or 0.0)))[:top]
+            if not dry_run:
+                DB.bulk_upsert_premiums(s, [{"driver_id": ids[i], "monthly_premium": float(premiums[i]),
+                                             "breakdown": json.dumps({"base_rate": round(float(base[i]),2), "risk_score": round(float(scores[i]),2),
+                                                                      "multiplier": round(float(mult[i]),3)})}
+                                            for i in np.flatnonzero(changed)])
+            else:
+                s.rollback()
+        after = ids[-1]
+    return stats
+
+def _run(args):
+    return reprice_range(*args)
+
+def reprice(workers=1, chunk=5000, dry_run=False):
+    t0 = time.perf_counter()
+    with get_session() as s:
+        bounds = DB.driver_score_bounds(s, workers)
+    ranges = [(bounds[i], bounds[i+1], chunk, dry_run) for i in range(len(bounds)-1)]
+    if workers > 1 and len(ranges) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as ex: parts = list(ex.map(_run, ranges))
+    else:
+        parts = [_run(r) for r in ranges]
+    total = {"rows": sum(p["rows"] for p in parts), "changed": sum(p["changed"] for p in parts),
+             "delta_sum": sum(p["delta_sum"] for p in parts), "max_abs_delta": max([p["max_abs_delta"] for p in parts] or [0.0]),
+             "top": sorted([t for p in parts for t in p["top"]], key=lambda t: -abs(t[2] - (t[1] or 0.0)))[:5]}
+    total["seconds"] = time.perf_counter() - t0
+    return total
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--workers", type=int, default=1); ap.add_argument("--chunk", type=int, default=5000)
+    ap.add_argument("--dry-run", action="store_true", help="report what would change without writing"); args = ap.parse_args()
+    r = reprice(args.workers, args.chunk, args.dry_run)
+    print(f"[jobs] {'would reprice' if args.dry_run else 'repriced'} {r['changed']}/{r['rows']} driver(s) in {r['seconds']:.1f}s "
+          f"({r['rows']/max(r['seconds'],1e-9):.0f} drivers/s); total delta {r['delta_sum']:+.2f}, max |delta| {r['max_abs_delta']:.2f}")
+    for driver_id, old, new in r["top"]:
+        print(f"  {driver_id}: {'-' if old is None else f'{old:.2f}'} -> {new:.2f}")
+
+if __name__ == "__main__": main()
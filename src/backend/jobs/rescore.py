@@ -0,0 +1,201 @@
+# src/backend/jobs/rescore.py
+# versioned historical rescoring: after a change to the rules or a retrained model, rescore every stored trip
+# into version-tagged rows next to the live ones, stage each driver's aggregate/score/premium under the same tag,
+# then cut over in one transaction. Until the cutover the API keeps serving the previous scores.
+#   python -m src.backend.jobs.rescore run --version rules-2 [--scorer rules|ml] [--workers 4] [--chunk 5000]
+#   python -m src.backend.jobs.rescore status [--version rules-2]
+#   python -m src.backend.jobs.rescore cutover --version rules-2
+#   python -m src.backend.jobs.rescore drop --version rules-1
+# `run` is resumable: trips are read in keyset chunks by id and scored across a process pool while the main process
+# writes finished chunks in order, each commit carrying its checkpoint; re-running continues from the last one.
+# `cutover` first scores trips ingested since the run (and restages their drivers) under the same lock as the swap.
+import argparse, json, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+import numpy as np
+from ..db import store
+from ..db.store import DB, get_session
+from ..ml.features import TRIP_FEATURES
+from ..ml.pricing import premium_from_score
+from ..ml.scoring import WINDOW_TRIPS, driver_score_from_aggregate, score_columns
+from ..api.pipeline import use_ml
+
+def _init_worker():
+    store.dispose_engine()
+
+def score_chunk(args):
+    """(feature columns, use_ml) -> (scores, contrib JSON strings); runs in a pool worker."""
+    cols, ml = args
+    scores, contribs = score_columns(cols, use_ml=ml)
+    return scores.tolist(), [json.dumps(c) for c in contribs]
+
+def _columns(rows) -> Dict[str, np.ndarray]:
+    # DB.trip_feature_chunk rows: (id, driver_id, *TRIP_FEATURES)
+    return {k: np.fromiter((r[i+2] for r in rows), np.float64, len(rows)) for i, k in enumerate(TRIP_FEATURES)}
+
+def _progress(label, done, total, t0):
+    rate = done / max(time.perf_counter() - t0, 1e-9)
+    print(f"[rescore] {label} {done}/{total} ({100*done/max(total,1):.0f}%) {rate:,.0f} rows/s", flush=True)
+
+def _pipelined(pages, fn, write, ex=None, depth=2):
+    """fn(payload) for each (key, payload) of pages, up to `depth` chunks ahead in the pool; write(key, result) in page order."""
+    pending = deque()
+    for key, payload in pages:
+        pending.append((key, ex.submit(fn, payload) if ex else fn(payload)))
+        if len(pending) >= depth:
+            k, r = pending.popleft(); write(k, r.result() if ex else r)
+    while pending:
+        k, r = pending.popleft(); write(k, r.result() if ex else r)
+
+def _trip_pages(after, upto, chunk, ml):
+    while True:
+        with get_session() as s: rows = DB.trip_feature_chunk(s, after, upto, chunk)
+        if not rows: return
+        after = rows[-1][0]; yield rows, (_columns(rows), ml)
+
+def _score_rows(rows, scores, contribs) -> List[dict]:
+    return [{"trip_id": r[0], "score": sc, "contrib": c} for r, sc, c in zip(rows, scores, contribs)]
+
+def score_trips_phase(version: str, ml: bool, ex=None, depth=2, chunk=5000, report_s=5.0) -> int:
+    """Scores the version's trips after its checkpoint (up to its target) into trip_score_versions."""
+    with get_session() as s: v = DB.get_score_version(s, version)
+    total = max(v["target_trip_id"] - v["after_trip_id"], 0); done = [0, time.perf_counter()]; t0 = time.perf_counter()
+    def write(rows, res):
+        with get_session() as s:   # rows + checkpoint in one commit
+            DB.insert_trip_score_versions(s, version, _score_rows(rows, *res))
+            DB.update_score_version(s, version, after_trip_id=rows[-1][0], trips_scored=store.ScoreVersion.trips_scored + len(rows))
+        done[0] += len(rows)
+        if time.perf_counter() - done[1] >= report_s: _progress(f"{version} trips", done[0], total, t0); done[1] = time.perf_counter()
+    _pipelined(_trip_pages(v["after_trip_id"], v["target_trip_id"], chunk, ml), score_chunk, write, ex, depth)
+    return done[0]
+
+def stage_rows(s, version: str, driver_ids: List[str]) -> List[dict]:
+    """driver_score_versions rows for drivers, from the version's trip scores: the aggregate rebuild_driver_aggregate
+    would build from trip_scores, the score driver_score_from_aggregate gives for it, and its premium."""
+    windows = DB.version_trip_windows(s, version, driver_ids, WINDOW_TRIPS)
+    drivers = DB.get_drivers(s, driver_ids)
+    enrich = DB.get_enrichments(s, driver_ids)   # held so DB.get_enrichment below is an identity-map hit
+    rows = []
+    for d in driver_ids:
+        window = [dict(e, distance_km=max(e["distance_km"], 0.1)) for e in windows[d]]
+        if not window: continue
+        agg = {"weighted_sum": sum(e["score"]*e["distance_km"] for e in window), "total_distance": sum(e["distance_km"] for e in window), "window": window}
+        score, breakdown = driver_score_from_aggregate(s, d, agg)
+        premium, pb = premium_from_score(base_rate=drivers[d].base_rate, score=score)
+        rows.append({"driver_id": d, "weighted_sum": agg["weighted_sum"], "total_distance": agg["total_distance"], "window": json.dumps(window),
+                     "score": score, "breakdown": json.dumps(breakdown), "monthly_premium": premium, "premium_breakdown": json.dumps(pb)})
+    return rows
+
+def stage_chunk(args):
+    """(version, driver_ids) -> staged rows; runs in a pool worker with its own read-only session."""
+    version, driver_ids = args
+    with get_session() as s: return stage_rows(s, version, driver_ids)
+
+def _driver_pages(version, after, chunk):
+    while True:
+        with get_session() as s: ids = DB.scored_driver_ids(s, after, chunk)
+        if not ids: return
+        after = ids[-1]; yield ids, (version, ids)
+
+def stage_drivers_phase(version: str, ex=None, depth=2, chunk=1000, report_s=5.0) -> int:
+    with get_session() as s: after = DB.get_score_version(s, version)["after_driver_id"]
+    done = [0, time.perf_counter()]; t0 = time.perf_counter()
+    def write(ids, rows):
+        with get_session() as s:
+            DB.stage_driver_score_versions(s, version, rows)
+            DB.update_score_version(s, version, after_driver_id=ids[-1], drivers_staged=store.ScoreVersion.drivers_staged + len(rows))
+        done[0] += len(rows)
+        if time.perf_counter() - done[1] >= report_s: _progress(f"{version} drivers", done[0], done[0], t0); done[1] = time.perf_counter()
+    _pipelined(_driver_pages(version, after, chunk), stage_chunk, write, ex, depth)
+    return done[0]
+
+def run(version: str, scorer=None, workers=1, chunk=5000):
+    t0 = time.perf_counter(); ml = (scorer or ("ml" if use_ml() else "rules")) == "ml"
+    if ml:
+        from ..ml.registry import load_model
+        model_version = load_model()["version"]   # loaded before the pool forks, so workers share it
+    else: model_version = None
+    with get_session() as s:
+        v = DB.get_score_version(s, version) or DB.create_score_version(s, version, "ml" if ml else "rules", model_version)
+    if v["scorer"] != ("ml" if ml else "rules") or v["model_version"] != model_version:
+        raise SystemExit(f"[rescore] {version} was started with {v['scorer']} {v['model_version'] or ''}; use a new --version")
+    if v["status"] in ("ready", "live", "retired"): raise SystemExit(f"[rescore] {version} is already {v['status']}")
+    ex = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 else None
+    depth = 2*workers if ex else 1
+    try:
+        trips = 0; t_trips = time.perf_counter()
+        if v["status"] == "scoring":
+            trips = score_trips_phase(version, ml, ex, depth, chunk)
+            with get_session() as s: DB.update_score_version(s, version, expect="scoring", status="staging")
+        t_trips = time.perf_counter() - t_trips; t_drivers = time.perf_counter()
+        drivers = stage_drivers_phase(version, ex, depth)
+        with get_session() as s: DB.update_score_version(s, version, expect="staging", status="ready")
+    finally:
+        if ex: ex.shutdown(cancel_futures=True)
+    return {"version": version, "trips": trips, "trips_per_s": trips / max(t_trips, 1e-9), "drivers": drivers,
+            "drivers_per_s": drivers / max(time.perf_counter() - t_drivers, 1e-9), "seconds": time.perf_counter() - t0}
+
+def cutover(version: str, chunk=5000):
+    """Catch up trips ingested since the run, then swap the version into the live tables in one transaction."""
+    t0 = time.perf_counter()
+    with get_session() as s:
+        v = DB.get_score_version(s, version)
+        if v is None or v["status"] != "ready": raise SystemExit(f"[rescore] {version} is {v and v['status']}, not ready")
+        ml = v["scorer"] == "ml"
+        if ml:
+            from ..ml.registry import load_model
+            if load_model()["version"] != v["model_version"]:
+                raise SystemExit(f"[rescore] loaded model is {load_model()['version']}, {version} was scored with {v['model_version']}")
+        if not DB.update_score_version(s, version, expect="ready", status="cutover"): raise SystemExit(f"[rescore] {version} changed under us")
+        DB.lock_trips(s)
+        after, caught_up, touched = v["after_trip_id"], 0, set()
+        while True:
+            rows = DB.trip_feature_chunk(s, after, None, chunk)
+            if not rows: break
+            DB.insert_trip_score_versions(s, version, _score_rows(rows, *score_chunk((_columns(rows), ml))))
+            after = rows[-1][0]; caught_up += len(rows); touched.update(r[1] for r in rows)
+        s.flush()
+        touched = sorted(touched)
+        for i in range(0, len(touched), 1000): DB.stage_driver_score_versions(s, version, stage_rows(s, version, touched[i:i+1000]))
+        copied = DB.apply_score_version(s, version)
+        for old in DB.score_versions(s):
+            if old["status"] == "live": DB.update_score_version(s, old["version"], expect="live", status="retired")
+        DB.update_score_version(s, version, after_trip_id=after, trips_scored=store.ScoreVersion.trips_scored + caught_up,
+                                cutover_at=datetime.utcnow(), status="live")
+    return {"version": version, "caught_up_trips": caught_up, "restaged_drivers": len(touched), "copied": copied, "seconds": time.perf_counter() - t0}
+
+def main():
+    ap = argparse.ArgumentParser(); sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="score all trips into a new version and stage driver scores/premiums")
+    r.add_argument("--version", required=True); r.add_argument("--scorer", choices=("rules", "ml"), default=None, help="default: USE_ML")
+    r.add_argument("--workers", type=int, default=1); r.add_argument("--chunk", type=int, default=5000)
+    st = sub.add_parser("status"); st.add_argument("--version", default=None)
+    c = sub.add_parser("cutover", help="make a ready version live"); c.add_argument("--version", required=True)
+    d = sub.add_parser("drop", help="delete a version's rows (not the live one)"); d.add_argument("--version", required=True)
+    args = ap.parse_args()
+    if args.cmd == "run":
+        out = run(args.version, args.scorer, args.workers, args.chunk)
+        print(f"[rescore] {out['version']} ready: {out['trips']} trip(s) at {out['trips_per_s']:,.0f} rows/s, "
+              f"{out['drivers']} driver(s) at {out['drivers_per_s']:,.0f}/s, {out['seconds']:.1f}s total. "
+              f"Cut over with: python -m src.backend.jobs.rescore cutover --version {out['version']}")
+    elif args.cmd == "status":
+        with get_session() as s: rows = [DB.get_score_version(s, args.version)] if args.version else DB.score_versions(s)
+        for v in filter(None, rows):
+            print(f"{v['version']:<20}{v['status']:<10}{v['scorer']} {v['model_version'] or '':<14} trips {v['trips_scored']} "
+                  f"(checkpoint {v['after_trip_id']}/{v['target_trip_id']})  drivers {v['drivers_staged']}"
+                  f"{'  live since ' + v['cutover_at'].isoformat() if v['cutover_at'] else ''}")
+    elif args.cmd == "cutover":
+        out = cutover(args.version)
+        print(f"[rescore] {out['version']} is live in {out['seconds']:.1f}s (caught up {out['caught_up_trips']} trip(s), "
+              f"restaged {out['restaged_drivers']} driver(s); rows copied {out['copied']})")
+    else:
+        with get_session() as s:
+            v = DB.get_score_version(s, args.version)
+            if v is None: raise SystemExit(f"[rescore] no version {args.version}")
+            if v["status"] == "live": raise SystemExit(f"[rescore] {args.version} is live; cut over to another version first")
+            DB.drop_score_version(s, args.version)
+        print(f"[rescore] dropped {args.version}")
+
+if __name__ == "__main__": main()
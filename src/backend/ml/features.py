@@ -0,0 +1,25 @@
+# src/backend/ml/features.py
+# columnar trip features shared by the batch scorers and the model registry
+from typing import Dict, List, Mapping, Sequence, Union
+import numpy as np
+
+TRIP_FEATURES = ["distance_km","avg_speed","max_speed","harsh_brakes","night_ratio","speeding_events"]  # = models/feature_list.json
+DEFAULTS = {"distance_km": 0.1}
+
+def feature_columns(feats: Union[Sequence[Dict], Mapping[str, Sequence]]) -> Dict[str, np.ndarray]:
+    """List of feature dicts, or a mapping/DataFrame of columns -> float64 arrays for TRIP_FEATURES
+    plus the derived harsh_per_100km / speeding_per_100km / night_clamped used by the scorers."""
+    if isinstance(feats, Mapping) or hasattr(feats, "columns"):
+        n = len(next(iter(feats.values()))) if isinstance(feats, Mapping) else len(feats)
+        cols = {k: np.asarray(feats[k], dtype=np.float64) if k in feats else np.full(n, DEFAULTS.get(k, 0.0)) for k in TRIP_FEATURES}
+    else:
+        n = len(feats)
+        cols = {k: np.fromiter((f.get(k, DEFAULTS.get(k, 0.0)) for f in feats), np.float64, n) for k in TRIP_FEATURES}
+    dist = np.maximum(cols["distance_km"], 0.1)
+    cols["harsh_per_100km"] = 100.0*cols["harsh_brakes"]/dist
+    cols["speeding_per_100km"] = 100.0*cols["speeding_events"]/dist
+    cols["night_clamped"] = np.minimum(np.maximum(cols["night_ratio"], 0.0), 1.0)
+    return cols
+
+def feature_matrix(cols: Dict[str, np.ndarray], names: List[str], dtype=np.float64) -> np.ndarray:
+    return np.column_stack([cols[k] for k in names]).astype(dtype, copy=False)
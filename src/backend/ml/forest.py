@@ -0,0 +1,49 @@
+# src/backend/ml/forest.py
+# flat-array random forest inference: every tree of a fitted sklearn forest is exported into one set of
+# contiguous node arrays and all trees are walked at once with vectorized NumPy indexing.
+# Skips sklearn's per-call input validation and per-tree dispatch, which dominate single-row latency.
+import numpy as np
+
+class FlatForest:
+    """Node arrays for all trees: feature, threshold, left, right, value; roots[t] is tree t's root node.
+    Leaves point to themselves (left == right == node) so a fixed number of steps reaches every leaf."""
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, n_features):
+        self.feature, self.threshold, self.left, self.right, self.value = feature, threshold, left, right, value
+        self.roots, self.max_depth, self.n_features = roots, int(max_depth), int(n_features)
+        self._children = np.stack([left, right], axis=1).ravel()  # child of node i: [2*i + went_right]
+
+    @classmethod
+    def from_sklearn(cls, model) -> "FlatForest":
+        trees = [est.tree_ for est in getattr(model, "estimators_", [model])]
+        sizes = np.array([t.node_count for t in trees]); offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        feature, threshold, left, right, value = [], [], [], [], []
+        for t, off in zip(trees, offsets):
+            idx = np.arange(t.node_count, dtype=np.intp)
+            leaf = t.children_left == -1
+            feature.append(np.where(leaf, 0, t.feature).astype(np.intp))
+            threshold.append(t.threshold.astype(np.float64))
+            left.append((np.where(leaf, idx, t.children_left) + off).astype(np.intp))
+            right.append((np.where(leaf, idx, t.children_right) + off).astype(np.intp))
+            value.append(t.value[:, 0, 0].astype(np.float64))
+        return cls(np.concatenate(feature), np.concatenate(threshold), np.concatenate(left), np.concatenate(right),
+                   np.concatenate(value), offsets.astype(np.intp), max(t.max_depth for t in trees), model.n_features_in_)
+
+    def predict(self, X, chunk: int = 128) -> np.ndarray:
+        # sklearn compares float32 inputs against float64 thresholds; cast the same way to land in the same leaves
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1: X = X[None, :]
+        if X.shape[1] != self.n_features: raise ValueError(f"expected {self.n_features} features, got {X.shape[1]}")
+        X = X.astype(np.float64)
+        if X.shape[0] <= chunk: return self._predict_block(X)
+        # row blocks keep the (rows x trees) node matrix cache-sized
+        return np.concatenate([self._predict_block(X[i:i+chunk]) for i in range(0, X.shape[0], chunk)])
+
+    def _predict_block(self, X: np.ndarray) -> np.ndarray:
+        n, nf = X.shape
+        flat = X.ravel(); row_base = (np.arange(n, dtype=np.intp)*nf)[:, None]
+        node = np.broadcast_to(self.roots, (n, self.roots.shape[0]))
+        for _ in range(self.max_depth):
+            went_right = flat.take(row_base + self.feature.take(node)) > self.threshold.take(node)
+            node = self._children.take(2*node + went_right)
+        return self.value.take(node).mean(axis=1)
@@ -9,3 +9,15 @@ def premium_from_score(base_rate: float, score: float) -> Tuple[float, Dict]:
     premium = base_rate * multiplier
     breakdown = {"base_rate": round(base_rate,2), "risk_score": round(score,2), "multiplier": round(multiplier,3)}
     return float(round(premium,2)), breakdown
+
+def multipliers_from_scores(scores):
+    # same piecewise curve as premium_from_score, over whole arrays
+    import numpy as np
+    s = np.asarray(scores, dtype=np.float64)
+    return np.where(s <= 25, 0.8 + 0.2*(s/25.0), np.where(s >= 85, 1.4 + 0.2*((s-85)/15.0), 1.0 + 0.4*((s-25)/60.0)))
+
+def premiums_from_scores(base_rates, scores):
+    """Vectorized premium_from_score: (premiums rounded to the cent, multipliers) as arrays."""
+    import numpy as np
+    m = multipliers_from_scores(scores)
+    return np.round(np.asarray(base_rates, dtype=np.float64)*m, 2), m
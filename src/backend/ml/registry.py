@@ -0,0 +1,83 @@
+# src/backend/ml/registry.py
+# process-wide model registry: loads the models/train.py artifact once (at app startup, or in a pre-fork
+# master), validates its feature order against feature_list.json and serves batched predictions.
+# Workers share the loaded forest copy-on-write when a pre-fork master loaded it (gunicorn.conf.py preload).
+import json, logging, os, pathlib, threading
+from typing import Dict, List, Optional
+import numpy as np
+from .features import TRIP_FEATURES, feature_columns, feature_matrix
+
+MODEL_DIR = pathlib.Path(os.getenv("MODEL_DIR", pathlib.Path(__file__).resolve().parents[3] / "models"))
+ARTIFACT = "baseline_rf.pkl"
+# ML_BACKEND=flat serves up to FLAT_MAX_ROWS rows per call from the compiled node arrays (ml/forest.py);
+# larger batches still go through sklearn, which is faster once the per-call overhead is amortized
+ML_BACKEND = os.getenv("ML_BACKEND", "sklearn").lower()
+FLAT_MAX_ROWS = int(os.getenv("FLAT_MAX_ROWS", "1024"))
+# the in-process synthetic forest stands in for a missing artifact only when ML_ALLOW_SYNTHETIC=true (local dev);
+# otherwise USE_ML=true without models/baseline_rf.pkl fails at startup instead of scoring with made-up data
+ML_ALLOW_SYNTHETIC = os.getenv("ML_ALLOW_SYNTHETIC", "false").lower() == "true"
+SYNTHETIC_FEATURES = ["avg_speed","max_speed","harsh_per_100km","night_clamped","speeding_per_100km"]
+
+_lock = threading.Lock()
+_state: Optional[Dict] = None
+
+def _train_synthetic():
+    from sklearn.ensemble import RandomForestRegressor
+    rng = np.random.RandomState(42)
+    X = rng.uniform([40,70,0,0,0],[85,130,20,1,20], size=(1200,5))
+    y = (0.35*np.clip((X[:,0]-60)/40,0,1) + 0.45*np.clip((X[:,1]-80)/40,0,1)
+         + 0.4*(1/(1+np.exp(-(X[:,2]-6)/2))) + 0.3*X[:,3]
+         + 0.45*(1/(1+np.exp(-(X[:,4]-5)/2)))) * 25
+    rf = RandomForestRegressor(n_estimators=120, random_state=42); rf.fit(X,y)
+    return rf
+
+def _load_artifact(model_dir: pathlib.Path) -> Dict:
+    import joblib
+    features = json.loads((model_dir / "feature_list.json").read_text())
+    version = (model_dir / "VERSION").read_text().strip() if (model_dir / "VERSION").exists() else "unversioned"
+    model = joblib.load(model_dir / ARTIFACT)
+    unknown = [f for f in features if f not in TRIP_FEATURES]
+    if unknown: raise RuntimeError(f"feature_list.json has features the API cannot compute: {unknown}")
+    if getattr(model, "n_features_in_", len(features)) != len(features):
+        raise RuntimeError(f"{ARTIFACT} expects {model.n_features_in_} features, feature_list.json lists {len(features)}")
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None:
+        if list(names) != features: raise RuntimeError(f"{ARTIFACT} feature order {list(names)} != feature_list.json {features}")
+        # order is verified; drop the names so predict() on plain arrays does not warn on every call
+        del model.feature_names_in_
+    return {"model": model, "features": features, "version": version, "source": str(model_dir / ARTIFACT)}
+
+def load_model(model_dir=None, force: bool = False) -> Dict:
+    """Load (once) and return {"model","features","version","source"}. Without a trained artifact
+    (python models/train.py) raises, or falls back to the synthetic 5-feature forest when ML_ALLOW_SYNTHETIC."""
+    global _state
+    with _lock:
+        if _state is not None and not force: return _state
+        model_dir = pathlib.Path(model_dir or MODEL_DIR)
+        if (model_dir / ARTIFACT).exists():
+            _state = _load_artifact(model_dir)
+        elif not ML_ALLOW_SYNTHETIC:
+            raise RuntimeError(f"USE_ML=true but {model_dir / ARTIFACT} does not exist: train it (python models/train.py) "
+                               "or set ML_ALLOW_SYNTHETIC=true for a synthetic dev model")
+        else:
+            logging.getLogger(__name__).warning("no %s in %s: scoring with the synthetic dev forest", ARTIFACT, model_dir)
+            _state = {"model": _train_synthetic(), "features": SYNTHETIC_FEATURES, "version": "synthetic", "source": "in-process"}
+        if ML_BACKEND == "flat":
+            from .forest import FlatForest
+            _state["flat"] = FlatForest.from_sklearn(_state["model"])
+        return _state
+
+def get_model() -> Dict:
+    return _state if _state is not None else load_model()
+
+def model_label() -> str:
+    st = get_model(); return f"{type(st['model']).__name__} ({st['version']})"
+
+def predict_batch(feats) -> np.ndarray:
+    """Score N trips (list of feature dicts or columnar mapping) with a single predict() call; clipped to [0,100]."""
+    st = get_model()
+    X = feature_matrix(feature_columns(feats), st["features"])
+    if X.shape[0] == 0: return np.empty(0)
+    flat = st.get("flat")
+    preds = flat.predict(X) if flat is not None and X.shape[0] <= FLAT_MAX_ROWS else st["model"].predict(X)
+    return np.clip(preds, 0, 100)
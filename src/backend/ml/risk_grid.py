@@ -0,0 +1,109 @@
+# src/backend/ml/risk_grid.py
+# regional risk layer: crash/crime rates on a uniform lat/lon grid, held in memory as two float32 arrays,
+# so a trip centroid -> (crash rate, crime index) lookup is two floors and an array read.
+#   source CSV   lat,lon,crash_rate,crime_index   one row per cell (its centre; rows falling in the same cell are averaged)
+#   binary .npz  lat0, lon0, cell_deg, crash[ny,nx], crime[ny,nx]   (NaN = no data)   <- bin/build_risk_grid.py
+# Values are used as-is, on the same scale as POST /enrich. Centroids outside the grid or on a NaN cell get
+# no location risk. RISK_GRID_PATH points at either file; unset/missing file turns the feature off.
+import math, os, pathlib, threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+RISK_GRID_PATH = os.getenv("RISK_GRID_PATH", str(pathlib.Path(__file__).resolve().parents[3] / "data" / "risk_grid.npz"))
+# trips blend into a driver's location risk as a distance-weighted mean over roughly the last HORIZON km
+LOCATION_RISK_HORIZON_KM = float(os.getenv("LOCATION_RISK_HORIZON_KM", "1000"))
+
+class RiskGrid:
+    def __init__(self, lat0: float, lon0: float, cell_deg: float, crash: np.ndarray, crime: np.ndarray):
+        if crash.shape != crime.shape or crash.ndim != 2: raise ValueError("crash/crime must be 2-D arrays of the same shape")
+        if not cell_deg > 0: raise ValueError("cell_deg must be > 0")
+        self.lat0, self.lon0, self.cell_deg = float(lat0), float(lon0), float(cell_deg)
+        self.ny, self.nx = crash.shape; self._inv = 1.0 / self.cell_deg
+        # flat float32 storage with one trailing NaN cell: off-grid points index the sentinel instead of being masked afterwards
+        self._crash_flat = np.append(np.asarray(crash, dtype=np.float32).ravel(), np.float32(np.nan))
+        self._crime_flat = np.append(np.asarray(crime, dtype=np.float32).ravel(), np.float32(np.nan))
+        self.crash = self._crash_flat[:-1].reshape(self.ny, self.nx); self.crime = self._crime_flat[:-1].reshape(self.ny, self.nx)
+
+    def __repr__(self):
+        return (f"RiskGrid({self.ny}x{self.nx} cells of {self.cell_deg:g} deg from ({self.lat0:g}, {self.lon0:g}), "
+                f"{int(np.isfinite(self.crash).sum())} with data)")
+
+    def lookup(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        """Batch lookup: lat/lon arrays -> (crash_rate, crime_index) float32 arrays, NaN where there is no data."""
+        i = np.subtract(np.asarray(lat, dtype=np.float64), self.lat0); i *= self._inv; np.floor(i, out=i)
+        j = np.subtract(np.asarray(lon, dtype=np.float64), self.lon0); j *= self._inv; np.floor(j, out=j)
+        ok = (i >= 0) & (i < self.ny) & (j >= 0) & (j < self.nx)   # also False for NaN coordinates
+        i *= self.nx; i += j
+        flat = np.where(ok, i, self.ny*self.nx).astype(np.int64)
+        return self._crash_flat.take(flat), self._crime_flat.take(flat)
+
+    def lookup_one(self, lat: float, lon: float) -> Optional[Tuple[float, float]]:
+        """Scalar lookup without NumPy dispatch overhead -> (crash_rate, crime_index) or None."""
+        try: i = math.floor((lat - self.lat0) * self._inv); j = math.floor((lon - self.lon0) * self._inv)
+        except (ValueError, OverflowError): return None   # NaN / inf coordinates
+        if not (0 <= i < self.ny and 0 <= j < self.nx): return None
+        crash, crime = self.crash.item(i, j), self.crime.item(i, j)
+        return None if crash != crash or crime != crime else (crash, crime)
+
+    @classmethod
+    def from_points(cls, lat, lon, crash, crime, cell_deg: float) -> "RiskGrid":
+        """Grid over the bounding box of the given cells; several values in one cell are averaged."""
+        lat = np.asarray(lat, dtype=np.float64); lon = np.asarray(lon, dtype=np.float64)
+        if not len(lat): raise ValueError("risk layer has no rows")
+        lat0 = math.floor(lat.min() / cell_deg) * cell_deg; lon0 = math.floor(lon.min() / cell_deg) * cell_deg
+        i = np.floor((lat - lat0) / cell_deg).astype(np.int64); j = np.floor((lon - lon0) / cell_deg).astype(np.int64)
+        ny, nx = int(i.max()) + 1, int(j.max()) + 1; flat = i*nx + j
+        n = np.bincount(flat, minlength=ny*nx)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            grids = [(np.bincount(flat, weights=np.asarray(v, dtype=np.float64), minlength=ny*nx) / n).reshape(ny, nx) for v in (crash, crime)]
+        return cls(lat0, lon0, cell_deg, *grids)
+
+    @classmethod
+    def from_csv(cls, path, cell_deg: float = 0.01) -> "RiskGrid":
+        import pandas as pd
+        df = pd.read_csv(path, usecols=["lat", "lon", "crash_rate", "crime_index"], dtype="float64")
+        return cls.from_points(df["lat"], df["lon"], df["crash_rate"], df["crime_index"], cell_deg)
+
+    @classmethod
+    def load(cls, path, cell_deg: float = 0.01) -> "RiskGrid":
+        path = pathlib.Path(path)
+        if path.suffix == ".csv": return cls.from_csv(path, cell_deg)
+        with np.load(path, allow_pickle=False) as z:
+            return cls(float(z["lat0"]), float(z["lon0"]), float(z["cell_deg"]), z["crash"], z["crime"])
+
+    def save(self, path):
+        # uncompressed: loading is a straight read of the two arrays
+        with open(path, "wb") as f:
+            np.savez(f, lat0=self.lat0, lon0=self.lon0, cell_deg=self.cell_deg, crash=self.crash, crime=self.crime)
+
+_lock = threading.Lock()
+_grid: Optional[RiskGrid] = None
+_loaded = False
+
+def get_grid(path=None, force: bool = False) -> Optional[RiskGrid]:
+    """Load (once) and return the process-wide risk layer, or None when RISK_GRID_PATH does not exist."""
+    global _grid, _loaded
+    with _lock:
+        if _loaded and not force: return _grid
+        target = path or RISK_GRID_PATH
+        _grid = RiskGrid.load(target) if target and pathlib.Path(target).exists() else None
+        _loaded = True
+        return _grid
+
+def location_risk_by_driver(trips: List[dict], grid: Optional[RiskGrid] = None) -> Dict[str, Tuple[float, float, float]]:
+    """trips (TripIn dicts) -> {driver_id: (crash_rate, crime_index, km)}: distance-weighted means over the
+    trips whose centroid falls on a cell with data, and the km they cover. One batch lookup per call."""
+    grid = grid if grid is not None else get_grid()
+    if grid is None or not trips: return {}
+    crash, crime = grid.lookup([t["centroid_lat"] for t in trips], [t["centroid_lon"] for t in trips])
+    out: Dict[str, List[float]] = {}
+    for t, c, r in zip(trips, crash.tolist(), crime.tolist()):
+        if math.isnan(c) or math.isnan(r): continue
+        km = max(t["distance_km"], 0.1); acc = out.setdefault(t["driver_id"], [0.0, 0.0, 0.0])
+        acc[0] += c*km; acc[1] += r*km; acc[2] += km
+    return {d: (c/km, r/km, km) for d, (c, r, km) in out.items()}
+
+def blend(old: float, old_km: float, new: float, km: float, horizon_km: float = LOCATION_RISK_HORIZON_KM) -> Tuple[float, float]:
+    """Running distance-weighted mean: exact over the first horizon_km, then older km decay out. -> (value, weight_km)."""
+    w = min(old_km or 0.0, horizon_km)
+    return (old*w + new*km) / (w + km), min(w + km, horizon_km)
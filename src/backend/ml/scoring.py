@@ -1,5 +1,8 @@
-from typing import Dict, Tuple
+from collections.abc import Sequence
+from typing import Dict, List, Tuple
 import math, os
+import numpy as np
+from .features import feature_columns
 
 def clamp(x, lo, hi): return max(lo, min(hi, x))
 def sigmoid(x): return 1/(1+math.exp(-x))
@@ -10,41 +13,65 @@ def _base_features(f:Dict):
             100.0*f.get("speeding_events",0)/dist,
             clamp(f.get("night_ratio",0.0),0.0,1.0))
 
+class RuleContribs(Sequence):
+    """Per-trip contrib dicts of a rules batch, built on access from the component arrays (x100, unrounded)."""
+    __slots__=("arrays",)
+    def __init__(self, arrays:Dict[str,np.ndarray]): self.arrays=arrays
+    def __len__(self): return len(self.arrays["avg_speed_over_60"])
+    def __getitem__(self, i):
+        if isinstance(i, slice): return [self[j] for j in range(*i.indices(len(self)))]
+        a=self.arrays
+        return {"model":"rules","avg_speed_over_60":round(float(a["avg_speed_over_60"][i]),1),
+                "harsh_brakes_per_100km":round(float(a["harsh_brakes_per_100km"][i]),1),"night_ratio":round(float(a["night_ratio"][i]),1),
+                "speeding_events_per_100km":round(float(a["speeding_events_per_100km"][i]),1),
+                "norms":{"harsh_per_100km":round(float(a["harsh_per_100km"][i]),2),"speeding_per_100km":round(float(a["speeding_per_100km"][i]),2)}}
+
+def score_trips_rules_batch(feats)->Tuple[np.ndarray,RuleContribs]:
+    """Rules score for many trips in one NumPy pass. feats: list of feature dicts or columns/DataFrame of TRIP_FEATURES.
+    Returns (scores float64[n], contribs) where contribs[i] is the same dict score_trip_rules gives."""
+    cols=feature_columns(feats)
+    # np.minimum/np.maximum rather than np.clip: same values, far less per-call overhead on small batches
+    c_speed=0.25*np.minimum(np.maximum(cols["avg_speed"]-60,0)/40,1) + 0.35*np.minimum(np.maximum(cols["max_speed"]-80,0)/40,1)
+    c_brake=0.30/(1+np.exp(-(cols["harsh_per_100km"]-6)/2.0))
+    c_night=0.20*cols["night_clamped"]
+    c_speeding=0.35/(1+np.exp(-(cols["speeding_per_100km"]-5)/2.0))
+    scores=np.minimum(np.maximum(30*c_speed + 25*c_brake + 20*c_night + 25*c_speeding,0),100)
+    return scores, RuleContribs({"avg_speed_over_60":c_speed*100,"harsh_brakes_per_100km":c_brake*100,"night_ratio":c_night*100,
+                                 "speeding_events_per_100km":c_speeding*100,"harsh_per_100km":cols["harsh_per_100km"],
+                                 "speeding_per_100km":cols["speeding_per_100km"]})
+
 def score_trip_rules(f:Dict)->Tuple[float,Dict]:
-    avg_speed, max_speed = f.get("avg_speed",0.0), f.get("max_speed",0.0)
-    harsh_per_100, speeding_per_100, night = _base_features(f)
-    c_speed = 0.25*clamp(max(avg_speed-60,0)/40,0,1) + 0.35*clamp(max(max_speed-80,0)/40,0,1)
-    c_brake = 0.30*sigmoid((harsh_per_100-6)/2.0)
-    c_night = 0.20*night
-    c_speeding = 0.35*sigmoid((speeding_per_100-5)/2.0)
-    linear = 30*c_speed + 25*c_brake + 20*c_night + 25*c_speeding
-    score = float(clamp(linear,0,100))
-    contrib = {"model":"rules","avg_speed_over_60":round(c_speed*100,1),
-               "harsh_brakes_per_100km":round(c_brake*100,1),"night_ratio":round(c_night*100,1),
-               "speeding_events_per_100km":round(c_speeding*100,1),
-               "norms":{"harsh_per_100km":round(harsh_per_100,2),"speeding_per_100km":round(speeding_per_100,2)}}
-    return score, contrib
-
-_model=None
-def _load_or_train_model():
-    import numpy as np
-    from sklearn.ensemble import RandomForestRegressor
-    global _model
-    if _model is not None: return _model
-    rng = np.random.RandomState(42)
-    X = rng.uniform([40,70,0,0,0],[85,130,20,1,20], size=(1200,5))
-    y = (0.35*np.clip((X[:,0]-60)/40,0,1) + 0.45*np.clip((X[:,1]-80)/40,0,1)
-         + 0.4*(1/(1+np.exp(-(X[:,2]-6)/2))) + 0.3*X[:,3]
-         + 0.45*(1/(1+np.exp(-(X[:,4]-5)/2)))) * 25
-    rf = RandomForestRegressor(n_estimators=120, random_state=42); rf.fit(X,y); _model=rf; return _model
+    scores, contribs = score_trips_rules_batch([f])
+    return float(scores[0]), contribs[0]
 
 def score_trip_ml(f:Dict)->Tuple[float,Dict]:
-    import numpy as np
-    harsh_per_100, speeding_per_100, night = _base_features(f)
-    x = np.array([[f.get("avg_speed",0.0), f.get("max_speed",0.0), harsh_per_100, night, speeding_per_100]])
-    model = _load_or_train_model()
-    score = float(np.clip(model.predict(x)[0],0,100))
-    return score, {"model":"RandomForestRegressor (synthetic)","norms":{"harsh_per_100km":round(harsh_per_100,2),"speeding_per_100km":round(speeding_per_100,2)}}
+    return score_trips_ml([f])[0]
+
+def score_trips_ml(feats:List[Dict])->List[Tuple[float,Dict]]:
+    # one predict() over the whole batch via the preloaded model registry
+    from .registry import model_label, predict_batch
+    if not feats: return []
+    preds=predict_batch(feats); label=model_label()
+    out=[]
+    for p,f in zip(preds,feats):
+        harsh_per_100, speeding_per_100, _ = _base_features(f)
+        out.append((float(p), {"model":label,"norms":{"harsh_per_100km":round(harsh_per_100,2),"speeding_per_100km":round(speeding_per_100,2)}}))
+    return out
+
+def score_trips(feats:List[Dict], use_ml:bool=False)->List[Tuple[float,Dict]]:
+    if use_ml: return score_trips_ml(feats)
+    if not feats: return []
+    scores, contribs = score_trips_rules_batch(feats)
+    return list(zip(scores.tolist(), contribs))
+
+def score_columns(cols, use_ml:bool=False)->Tuple[np.ndarray,Sequence]:
+    """Columnar counterpart of score_trips for bulk jobs: feature columns -> (scores float64[n], contrib dicts),
+    without building a dict per trip on the way in."""
+    if not use_ml: return score_trips_rules_batch(cols)
+    from .registry import model_label, predict_batch
+    c=feature_columns(cols); preds=np.asarray(predict_batch(c), dtype=np.float64); label=model_label()
+    return preds, [{"model":label,"norms":{"harsh_per_100km":round(h,2),"speeding_per_100km":round(sp,2)}}
+                   for h,sp in zip(c["harsh_per_100km"].tolist(), c["speeding_per_100km"].tolist())]
 
 def apply_enrichment_offsets(score:float, enrich:Dict)->Tuple[float,Dict]:
     weights={"vehicle_risk":5.0,"driver_history_risk":7.0,"local_crime_index":3.0,"local_crash_rate":4.0,"weather_risk":6.0}
@@ -55,27 +82,67 @@ def apply_enrichment_offsets(score:float, enrich:Dict)->Tuple[float,Dict]:
     score=float(clamp(score,0,100))
     return score, {"enrichment_offsets":offsets}
 
-def aggregate_driver_score(db_session, driver_id:str)->Tuple[float,Dict]:
+WINDOW_TRIPS=60
+
+def push_trip_to_aggregate(agg, trip_id:int, score:float, distance_km:float, breakdown:Dict)->Dict:
+    # O(1) update of the running accumulator; window is newest-first, like the old rescoring loop
+    agg = agg or {"weighted_sum":0.0,"total_distance":0.0,"window":[]}
+    d=max(distance_km,0.1); window=agg["window"]
+    window.insert(0, {"trip_id":trip_id,"score":score,"distance_km":d,"breakdown":breakdown})
+    weighted=agg["weighted_sum"]+score*d; total=agg["total_distance"]+d
+    while len(window)>WINDOW_TRIPS:
+        old=window.pop(); weighted-=old["score"]*old["distance_km"]; total-=old["distance_km"]
+    return {"weighted_sum":weighted,"total_distance":total,"window":window}
+
+def rebuild_driver_aggregate(db_session, driver_id:str)->Dict:
+    # recompute the accumulator from stored trip_scores (fixes float drift / missing rows)
     from ..db.store import DB
-    feats = DB.aggregate_trip_features(db_session, driver_id)
-    if not feats: return 0.0, {"note":"no trips"}
-    total=0.0; weighted=0.0; parts={"trips":[]}
-    use_ml=(os.getenv("USE_ML","false").lower()=="true")
-    for f in feats:
-        s, br = (score_trip_ml if use_ml else score_trip_rules)(f)
-        d=max(f.get("distance_km",0.1),0.1); weighted+=s*d; total+=d; parts["trips"].append({"score":s,"distance_km":d,"breakdown":br})
-    overall=weighted/max(total,0.1)
+    window=[{"trip_id":r["trip_id"],"score":r["score"],"distance_km":max(r["distance_km"],0.1),"breakdown":r["breakdown"]}
+            for r in DB.recent_trip_scores(db_session, driver_id, WINDOW_TRIPS)]
+    agg={"weighted_sum":sum(e["score"]*e["distance_km"] for e in window),
+         "total_distance":sum(e["distance_km"] for e in window),"window":window}
+    DB.upsert_driver_aggregate(db_session, driver_id, **agg)
+    return agg
+
+def update_driver_aggregate(db_session, driver_id:str, entries:List[Dict])->Dict:
+    # entries: [{"trip_id","score","distance_km","breakdown"}] oldest-first, already written to trip_scores.
+    # The caller holds the driver's row lock (DB.lock_drivers) so concurrent ingests cannot lose a trip from the sums.
+    from ..db.store import DB
+    agg = DB.get_driver_aggregate(db_session, driver_id)
+    if agg is None:
+        db_session.flush(); return rebuild_driver_aggregate(db_session, driver_id)
+    for e in entries:
+        agg = push_trip_to_aggregate(agg, e["trip_id"], e["score"], e["distance_km"], e["breakdown"])
+    DB.upsert_driver_aggregate(db_session, driver_id, **agg)
+    return agg
+
+def driver_score_from_aggregate(db_session, driver_id:str, agg:Dict)->Tuple[float,Dict]:
+    from ..db.store import DB
+    if not agg or not agg["window"]: return 0.0, {"note":"no trips"}
+    parts={"trips":[{"score":e["score"],"distance_km":e["distance_km"],"breakdown":e["breakdown"]} for e in agg["window"]]}
+    overall=agg["weighted_sum"]/max(agg["total_distance"],0.1)
     enrich = DB.get_enrichment(db_session, driver_id)
     overall2, enr = apply_enrichment_offsets(overall, enrich)
     parts.update(enr)
     return float(round(overall2,2)), parts
 
+def aggregate_driver_score(db_session, driver_id:str)->Tuple[float,Dict]:
+    # reads the persisted accumulator instead of rescoring the last WINDOW_TRIPS trips
+    from ..db.store import DB
+    agg = DB.get_driver_aggregate(db_session, driver_id)
+    if agg is None: agg = rebuild_driver_aggregate(db_session, driver_id)
+    return driver_score_from_aggregate(db_session, driver_id, agg)
+
 def coaching_hints(points):
-    hints=[]; 
-    if not points: return hints
+    if not points: return []
     over = sum(1 for p in points if p.get("speed_kph",0)>75)
     hard = sum(1 for p in points if p.get("accel_mps2",0)<-3.5)
     night = sum(1 for p in points if p["ts"].hour<6 or p["ts"].hour>=22)/len(points)
+    return hints_from_counts(over, hard, night)
+
+def hints_from_counts(over:int, hard:int, night:float):
+    # over: points >75 kph, hard: points below -3.5 m/s2, night: share of night points (see trip_summary.py)
+    hints=[]
     if over>5: hints.append("You're frequently over the limit—ease off to reduce risk and premium.")
     if hard>3: hints.append("Lots of hard braking—leave more following distance and plan earlier.")
     if night>0.5: hints.append("High share of night driving—consider avoiding late hours when possible.")
@@ -0,0 +1,95 @@
+# src/backend/ml/trip_summary.py
+# vectorized trip summarizer: telemetry points -> columnar NumPy arrays (once) -> trip features + coaching counts
+from datetime import datetime
+from operator import attrgetter
+from typing import Dict, Sequence
+import numpy as np
+
+SPEED_LIMIT_KPH = 70.0     # speeding_events threshold
+COACH_OVER_KPH = 75.0      # coaching "over the limit" threshold
+HARSH_BRAKE_MPS2 = -3.5
+EPOCH = datetime(1970, 1, 1)
+
+def _split_ts(ts: datetime):
+    # (absolute epoch seconds, wall-clock epoch seconds); naive timestamps are taken as UTC
+    off = ts.utcoffset()
+    wall = (ts.replace(tzinfo=None) - EPOCH).total_seconds()
+    return wall - (off.total_seconds() if off else 0.0), wall
+
+_values = attrgetter("speed_kph", "accel_mps2", "lat", "lon")
+
+def columns_from_points(points: Sequence) -> Dict[str, np.ndarray]:
+    """TripPoint objects -> {t, wall, speed_kph, accel_mps2, lat, lon} float64 arrays."""
+    n = len(points)
+    ts = [p.ts for p in points]
+    if all(x.tzinfo is None for x in ts):
+        t = wall = np.fromiter(((x - EPOCH).total_seconds() for x in ts), np.float64, n)
+    else:
+        t, wall = np.array([_split_ts(x) for x in ts], dtype=np.float64).reshape(n, 2).T
+    vals = np.array([_values(p) for p in points], dtype=np.float64).reshape(n, 4).T.copy()
+    return {"t": t, "wall": wall, "speed_kph": vals[0], "accel_mps2": vals[1], "lat": vals[2], "lon": vals[3]}
+
+def local_hours(wall: np.ndarray) -> np.ndarray:
+    return (np.floor_divide(wall, 3600.0) % 24).astype(np.int8)
+
+def summarize_columns(cols: Dict[str, np.ndarray]) -> Dict:
+    """Trip features (same definitions as the old per-point loops) plus coaching counts, in one vectorized pass.
+    start_idx/end_idx point at the earliest/latest sample so callers can recover the original timestamps."""
+    t, speed, accel = cols["t"], cols["speed_kph"], cols["accel_mps2"]
+    n = t.shape[0]
+    order = np.argsort(t, kind="stable")
+    dt_h = np.diff(t[order]) / 3600.0
+    hours = local_hours(cols["wall"])
+    hard = int(np.count_nonzero(accel < HARSH_BRAKE_MPS2))
+    night_ratio = float(np.count_nonzero((hours < 6) | (hours >= 22)) / n)
+    return {
+        "distance_km": float(np.dot(speed[order][:-1], dt_h)),
+        "avg_speed": float(speed.mean()), "max_speed": float(speed.max()),
+        "harsh_brakes": hard, "night_ratio": night_ratio,
+        "speeding_events": int(np.count_nonzero(speed > SPEED_LIMIT_KPH)),
+        "centroid_lat": float(cols["lat"].mean()), "centroid_lon": float(cols["lon"].mean()),
+        "start_idx": int(order[0]), "end_idx": int(order[-1]),
+        "coaching": {"over": int(np.count_nonzero(speed > COACH_OVER_KPH)), "hard": hard, "night": night_ratio},
+    }
+
+# -- streaming accumulators (trip sessions, api/sessions.py) ------------------------------------------------------
+# O(1) state per open trip; chunks are folded in as they arrive. Points must arrive in time order across chunks
+# (any order within a chunk): points older than the last accepted one are counted in late_points and dropped.
+ACC_FIELDS = ("n_points", "late_points", "first_t", "last_t", "last_speed", "distance_km", "speed_sum", "speed_max",
+              "harsh_brakes", "speeding_events", "over_count", "night_count", "lat_sum", "lon_sum")
+
+def empty_accumulator() -> Dict:
+    return {"n_points": 0, "late_points": 0, "first_t": None, "last_t": None, "last_speed": 0.0, "distance_km": 0.0,
+            "speed_sum": 0.0, "speed_max": 0.0, "harsh_brakes": 0, "speeding_events": 0, "over_count": 0,
+            "night_count": 0, "lat_sum": 0.0, "lon_sum": 0.0}
+
+def accumulate_columns(acc: Dict, cols: Dict[str, np.ndarray]) -> Dict:
+    """Fold one chunk of columns into acc (returns a new dict); same per-point definitions as summarize_columns."""
+    order = np.argsort(cols["t"], kind="stable")
+    t = cols["t"][order]
+    keep = slice(None) if acc["last_t"] is None else t >= acc["last_t"]
+    t = t[keep]; acc = dict(acc, late_points=acc["late_points"] + int(order.shape[0] - t.shape[0]))
+    if not t.shape[0]: return acc
+    speed, accel = cols["speed_kph"][order][keep], cols["accel_mps2"][order][keep]
+    hours = local_hours(cols["wall"][order][keep])
+    distance = float(np.dot(speed[:-1], np.diff(t) / 3600.0))
+    if acc["last_t"] is not None: distance += acc["last_speed"] * (float(t[0]) - acc["last_t"]) / 3600.0
+    acc.update({"n_points": acc["n_points"] + int(t.shape[0]),
+                "first_t": float(t[0]) if acc["first_t"] is None else acc["first_t"], "last_t": float(t[-1]), "last_speed": float(speed[-1]),
+                "distance_km": acc["distance_km"] + distance, "speed_sum": acc["speed_sum"] + float(speed.sum()),
+                "speed_max": max(acc["speed_max"], float(speed.max())) if acc["n_points"] else float(speed.max()),
+                "harsh_brakes": acc["harsh_brakes"] + int(np.count_nonzero(accel < HARSH_BRAKE_MPS2)),
+                "speeding_events": acc["speeding_events"] + int(np.count_nonzero(speed > SPEED_LIMIT_KPH)),
+                "over_count": acc["over_count"] + int(np.count_nonzero(speed > COACH_OVER_KPH)),
+                "night_count": acc["night_count"] + int(np.count_nonzero((hours < 6) | (hours >= 22))),
+                "lat_sum": acc["lat_sum"] + float(cols["lat"][order][keep].sum()), "lon_sum": acc["lon_sum"] + float(cols["lon"][order][keep].sum())})
+    return acc
+
+def summarize_accumulator(acc: Dict) -> Dict:
+    """acc -> the summarize_columns() dict (first_t/last_t in place of start_idx/end_idx); needs n_points >= 1."""
+    n = acc["n_points"]; night_ratio = acc["night_count"] / n
+    return {"distance_km": acc["distance_km"], "avg_speed": acc["speed_sum"] / n, "max_speed": acc["speed_max"],
+            "harsh_brakes": acc["harsh_brakes"], "night_ratio": night_ratio, "speeding_events": acc["speeding_events"],
+            "centroid_lat": acc["lat_sum"] / n, "centroid_lon": acc["lon_sum"] / n,
+            "first_t": acc["first_t"], "last_t": acc["last_t"],
+            "coaching": {"over": acc["over_count"], "hard": acc["harsh_brakes"], "night": night_ratio}}
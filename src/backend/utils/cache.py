@@ -0,0 +1,77 @@
+# src/backend/utils/cache.py
+# in-process LRU + TTL cache for the per-driver GET payloads (score / premium / trips).
+# Entries are grouped by driver so ingest/enrich can drop everything for a driver in one call.
+# Pre-forked workers (gunicorn.conf.py) each hold their own cache; share() in the master before the fork gives them a
+# shared-memory array of per-driver epochs (hashed slots), so an invalidate in one worker makes the driver's entries
+# in every worker stale at their next read. Without it (e.g. `uvicorn --workers N`) other workers serve the old
+# value until CACHE_TTL_S runs out.
+import hashlib, json, multiprocessing, os, threading, time, zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+def etag_for(value: Any) -> str:
+    return '"' + hashlib.blake2b(json.dumps(value, sort_keys=True, default=str).encode(), digest_size=12).hexdigest() + '"'
+
+class DriverCache:
+    def __init__(self, max_drivers: int = 10000, ttl_s: float = 30.0):
+        self.max_drivers, self.ttl_s = max_drivers, ttl_s
+        self._data: "OrderedDict[str, Dict[str, Tuple[Any, str, float, int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.invalidations = self.evictions = 0
+        self._epoch = 0  # bumped by every invalidate(); a load that overlaps one is returned but not stored
+        self._slots = None   # share(): per-driver-slot epochs in memory shared with forked workers
+
+    def share(self, slots: int = 1 << 16):
+        """Call once before forking workers; a no-op when already shared."""
+        if self._slots is None: self._slots = multiprocessing.RawArray("q", slots)
+
+    def _token(self, driver_id: str) -> int:
+        # the epoch a load starts from: the driver's shared slot, else this process's invalidation count
+        if self._slots is None: return self._epoch
+        return self._slots[zlib.crc32(driver_id.encode()) % len(self._slots)]
+
+    def get(self, driver_id: str, kind: str) -> Optional[Tuple[Any, str]]:
+        with self._lock:
+            entry = self._data.get(driver_id, {}).get(kind)
+            if entry is None or entry[2] < time.monotonic() or (self._slots is not None and entry[3] != self._token(driver_id)):
+                self.misses += 1; return None
+            self._data.move_to_end(driver_id); self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, driver_id: str, kind: str, value: Any, epoch: Optional[int] = None) -> Tuple[Any, str]:
+        etag = etag_for(value)
+        if self.ttl_s <= 0: return value, etag
+        with self._lock:
+            token = self._token(driver_id)
+            if epoch is not None and epoch != token: return value, etag
+            self._data.setdefault(driver_id, {})[kind] = (value, etag, time.monotonic() + self.ttl_s, token)
+            self._data.move_to_end(driver_id)
+            while len(self._data) > self.max_drivers:
+                self._data.popitem(last=False); self.evictions += 1
+        return value, etag
+
+    def get_or_load(self, driver_id: str, kind: str, loader: Callable[[], Any]) -> Tuple[Any, Optional[str]]:
+        """(value, etag) from cache, else from loader(); None results (404s) are not cached."""
+        hit = self.get(driver_id, kind)
+        if hit is not None: return hit
+        epoch = self._token(driver_id)
+        value = loader()
+        return (None, None) if value is None else self.put(driver_id, kind, value, epoch)
+
+    def invalidate(self, *driver_ids: str):
+        with self._lock:
+            self._epoch += 1
+            for d in driver_ids:
+                # after the write committed: a worker whose load began before this bump does not keep the result
+                if self._slots is not None: self._slots[zlib.crc32(d.encode()) % len(self._slots)] += 1
+                if self._data.pop(d, None) is not None: self.invalidations += 1
+
+    def clear(self):
+        with self._lock: self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations, "evictions": self.evictions,
+                    "drivers": len(self._data), "ttl_s": self.ttl_s, "max_drivers": self.max_drivers, "shared": self._slots is not None}
+
+CACHE = DriverCache(max_drivers=int(os.getenv("CACHE_MAX_DRIVERS", "10000")), ttl_s=float(os.getenv("CACHE_TTL_S", "30")))
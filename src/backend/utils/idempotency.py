@@ -0,0 +1,67 @@
+# src/backend/utils/idempotency.py
+# recent-key cache for ingest retries: (route, key) -> the response the first attempt got, LRU + TTL.
+# Keys are the client's Idempotency-Key header and/or the trip's natural key (driver_id, start_ts, end_ts), so a
+# retried POST is answered from here without scoring or writing. Trips that miss it (another worker, evicted, TTL)
+# are still caught by the unique trips index via pipeline.ingest_trips, which counts them under "db".
+import os, threading, time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+def utc_naive(ts: datetime) -> datetime:
+    """Aware -> the same instant as naive UTC, the form trips are stored in (pipeline.ingest_trips); naive = already UTC."""
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo is not None else ts
+
+def natural_key(driver_id: str, start_ts: datetime, end_ts: datetime) -> Tuple[str, datetime, datetime]:
+    return driver_id, utc_naive(start_ts), utc_naive(end_ts)
+
+class RecentKeys:
+    def __init__(self, max_keys: int = 100000, ttl_s: float = 600.0):
+        self.max_keys, self.ttl_s = max_keys, ttl_s
+        self._data: "OrderedDict[Tuple[str, Any], Tuple[dict, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.suppressed = {"cache": 0, "db": 0}
+
+    def get(self, route: str, *keys, valid: Optional[Callable[[dict], bool]] = None) -> Optional[Tuple[dict, int]]:
+        """(body, status_code) stored under any of keys (None keys are skipped); a hit counts as a suppressed duplicate.
+        valid(body) False drops the entry instead (e.g. an async ingest that has since failed)."""
+        now = time.monotonic()
+        with self._lock:
+            for k in keys:
+                if k is None: continue
+                entry = self._data.get((route, k))
+                if entry is None: continue
+                if entry[2] < now: del self._data[(route, k)]; continue
+                self._data.move_to_end((route, k)); hit = entry
+                break
+            else: return None
+        if valid is not None and not valid(hit[0]):
+            self.forget(route, *keys); return None
+        with self._lock: self.suppressed["cache"] += 1
+        return hit[0], hit[1]
+
+    def put(self, route: str, body: dict, status_code: int, *keys):
+        if self.ttl_s <= 0: return
+        expires = time.monotonic() + self.ttl_s
+        with self._lock:
+            for k in keys:
+                if k is None: continue
+                self._data[(route, k)] = (body, status_code, expires); self._data.move_to_end((route, k))
+            while len(self._data) > self.max_keys: self._data.popitem(last=False)
+
+    def forget(self, route: str, *keys):
+        with self._lock:
+            for k in keys: self._data.pop((route, k), None)
+
+    def clear(self):
+        with self._lock: self._data.clear()
+
+    def count_db(self, n: int):
+        if n:
+            with self._lock: self.suppressed["db"] += n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"keys": len(self._data), "max_keys": self.max_keys, "ttl_s": self.ttl_s, "suppressed": dict(self.suppressed)}
+
+RECENT = RecentKeys(max_keys=int(os.getenv("IDEMPOTENCY_MAX_KEYS", "100000")), ttl_s=float(os.getenv("IDEMPOTENCY_TTL_S", "600")))
@@ -0,0 +1,179 @@
+# src/backend/utils/metrics.py
+# in-process latency histograms for the hot path, rendered as Prometheus text on GET /metrics.
+#   span("pipeline.score")      -> telematics_stage_seconds{stage="pipeline.score"}
+#   instrument(DB)              -> telematics_db_seconds{op="create_trips"} around every DB staticmethod
+#   MetricsMiddleware           -> telematics_http_request_seconds{method,route,status}
+# A span costs two perf_counter() calls and one short lock; METRICS_ENABLED=false turns them into no-ops.
+#
+# Opt-in sampling profiler: with PROFILING_ENABLED=true a request carrying `x-profile: 1` (and the API key)
+# is sampled every PROFILE_INTERVAL_MS; the collapsed stacks (flamegraph.pl / speedscope input) are kept
+# in memory and served at GET /debug/profiles/{id}, whose id comes back in the X-Profile-Id header.
+import os, sys, threading, time, uuid
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_INTERVAL_S = float(os.getenv("PROFILE_INTERVAL_MS", "2")) / 1000.0
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], buckets=BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self._series: Dict[tuple, list] = {}   # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(label_values)
+            if s is None: s = self._series[label_values] = [0]*(len(self.buckets)+1) + [0.0]
+            s[i] += 1; s[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock: series = {k: list(v) for k, v in self._series.items()}
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, s in sorted(series.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values))
+            sep = "," if base else ""; acc = 0
+            for le, n in zip(self.buckets + ("+Inf",), s[:-1]):
+                acc += n; out.append(f'{self.name}_bucket{{{base}{sep}le="{le}"}} {acc}')
+            out.append(f"{self.name}_sum{{{base}}} {s[-1]:.6f}"); out.append(f"{self.name}_count{{{base}}} {acc}")
+        return out
+
+    def clear(self):
+        with self._lock: self._series.clear()
+
+def _escape(v) -> str: return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+STAGES = Histogram("telematics_stage_seconds", "Time spent in one ingest/scoring stage.", ("stage",))
+DB_OPS = Histogram("telematics_db_seconds", "Time spent in one DB helper call (nested calls are counted in both).", ("op",))
+HTTP = Histogram("telematics_http_request_seconds", "End-to-end request latency as seen by the app.", ("method", "route", "status"))
+_COLLECTORS: List[Callable[[], List[str]]] = []
+_REQUEST_T0: ContextVar[Optional[float]] = ContextVar("request_t0", default=None)
+
+@contextmanager
+def span(stage: str):
+    if not ENABLED: yield; return
+    p = _PROFILE.get()
+    if p is not None: p.attach(threading.get_ident())
+    t = time.perf_counter()
+    try: yield
+    finally: STAGES.observe(time.perf_counter() - t, stage)
+
+def observe_since_request(stage: str):
+    """Time from the request entering the app to now, e.g. body parsing + pydantic validation before the endpoint runs."""
+    t0 = _REQUEST_T0.get()
+    if ENABLED and t0 is not None: STAGES.observe(time.perf_counter() - t0, stage)
+
+def instrument(cls, hist: Histogram = DB_OPS):
+    """Wrap every staticmethod of cls so each call lands in hist (label = method name)."""
+    if not ENABLED: return cls
+    for name, attr in list(vars(cls).items()):
+        if isinstance(attr, staticmethod) and not name.startswith("_"):
+            setattr(cls, name, staticmethod(_timed(attr.__func__, name, hist)))
+    return cls
+
+def _timed(fn, label, hist):
+    @wraps(fn)
+    def wrapper(*a, **kw):
+        p = _PROFILE.get()
+        if p is not None: p.attach(threading.get_ident())
+        t = time.perf_counter()
+        try: return fn(*a, **kw)
+        finally: hist.observe(time.perf_counter() - t, label)
+    return wrapper
+
+def register_collector(fn: Callable[[], List[str]]):
+    """fn() -> extra exposition lines (gauges/counters owned by other modules), appended on every scrape."""
+    _COLLECTORS.append(fn)
+
+def render() -> str:
+    lines = STAGES.render() + DB_OPS.render() + HTTP.render()
+    for fn in _COLLECTORS: lines += fn()
+    return "\n".join(lines) + "\n"
+
+def reset():
+    for h in (STAGES, DB_OPS, HTTP): h.clear()
+
+# -- sampling profiler ---------------------------------------------------------------------------------------
+class SamplingProfiler:
+    """Samples the stacks of the threads serving one request (the event loop thread plus any worker thread
+    that enters a span/DB call); overhead is one sys._current_frames() per interval, none when inactive.
+    Samples of the event loop thread can include other requests interleaved on it."""
+    def __init__(self, interval_s: float = PROFILE_INTERVAL_S):
+        self.interval_s, self.threads = interval_s, set()
+        self.stacks: Counter = Counter(); self.samples = 0
+        self._stop = threading.Event(); self._thread: Optional[threading.Thread] = None
+        self._t0 = self._t1 = 0.0
+
+    def attach(self, ident: int): self.threads.add(ident)
+
+    def start(self):
+        self._t0 = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True); self._thread.start()
+        return self
+
+    def stop(self):
+        if self._stop.is_set(): return
+        self._stop.set()
+        if self._thread is not None: self._thread.join()
+        self._t1 = time.perf_counter()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            frames = sys._current_frames()
+            for ident in tuple(self.threads):
+                f = frames.get(ident); stack = []
+                while f is not None:
+                    c = f.f_code; stack.append(f"{c.co_name} ({os.path.basename(c.co_filename)}:{f.f_lineno})"); f = f.f_back
+                if stack: self.stacks[";".join(reversed(stack))] += 1; self.samples += 1
+
+    def folded(self) -> str:
+        head = f"# samples={self.samples} interval_ms={self.interval_s*1000:g} wall_ms={(self._t1-self._t0)*1000:.1f}\n"
+        return head + "".join(f"{k} {v}\n" for k, v in self.stacks.most_common())
+
+_PROFILE: ContextVar[Optional[SamplingProfiler]] = ContextVar("profile", default=None)
+PROFILES: "OrderedDict[str, str]" = OrderedDict()
+MAX_PROFILES = int(os.getenv("PROFILE_KEEP", "20"))
+
+def _keep_profile(p: SamplingProfiler) -> str:
+    pid = uuid.uuid4().hex[:12]; PROFILES[pid] = p.folded()
+    while len(PROFILES) > MAX_PROFILES: PROFILES.popitem(last=False)
+    return pid
+
+# -- ASGI middleware -----------------------------------------------------------------------------------------
+class MetricsMiddleware:
+    """Times every HTTP request by route template and runs the sampling profiler when asked to."""
+    def __init__(self, app, api_key: Optional[str] = None):
+        self.app, self.api_key = app, api_key
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED: return await self.app(scope, receive, send)
+        t0 = time.perf_counter(); tok = _REQUEST_T0.set(t0)
+        profiler = self._profiler_for(scope); ptok = _PROFILE.set(profiler) if profiler else None
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if profiler is not None:
+                    profiler.stop(); message.setdefault("headers", []).append((b"x-profile-id", _keep_profile(profiler).encode()))
+            await send(message)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None: profiler.stop(); _PROFILE.reset(ptok)
+            _REQUEST_T0.reset(tok)
+            route = scope.get("route"); path = getattr(route, "path", None) or "unmatched"
+            HTTP.observe(time.perf_counter() - t0, scope["method"], path, status[0])
+
+    def _profiler_for(self, scope) -> Optional[SamplingProfiler]:
+        if not PROFILING_ENABLED: return None
+        headers = dict(scope.get("headers") or ())
+        if headers.get(b"x-profile") not in (b"1", b"true") or headers.get(b"x-api-key", b"").decode() != self.api_key: return None
+        p = SamplingProfiler(); p.attach(threading.get_ident()); return p.start()
@@ -1,63 +1,76 @@
-import streamlit as st, requests, pandas as pd, os
+import streamlit as st, requests, os
 API = os.environ.get("API_URL","http://localhost:8000")
+CACHE_TTL_S = int(os.environ.get("DASHBOARD_CACHE_TTL_S","15"))
+TRIPS_PER_PAGE = 20
+
+@st.cache_resource
+def http():
+    # one keep-alive connection pool shared by every rerun and browser session
+    return requests.Session()
+
+@st.cache_data(ttl=CACHE_TTL_S, show_spinner=False)
+def load_summary(driver_id, cursor=None):
+    """GET /drivers/{id}/summary: score, premium, gamification and one page of trips in one request; None = unknown driver."""
+    r = http().get(f"{API}/drivers/{driver_id}/summary", params={"trips": TRIPS_PER_PAGE, "cursor": cursor}, timeout=(2, 5))
+    if r.status_code == 404: return None
+    r.raise_for_status(); return r.json()
+
 st.set_page_config(page_title="Telematics (POC+)", layout="wide")
 st.title("Telematics Insurance – Driver Dashboard (POC+)")
 driver_id = st.text_input("Driver ID", value="D001")
+if st.session_state.get("driver_id") != driver_id:
+    st.session_state.driver_id, st.session_state.cursors = driver_id, [None]   # trip page cursors, newest page first
+cursors = st.session_state.cursors
 
 colA, colB = st.columns(2)
 with colA:
-    if st.button("Refresh Score & Premium"): pass
+    if st.button("Refresh Score & Premium"): load_summary.clear()
     try:
-        score = requests.get(f"{API}/drivers/{driver_id}/score", timeout=5).json()
-        premium = requests.get(f"{API}/drivers/{driver_id}/premium", timeout=5).json()
-    except Exception:
+        summary = load_summary(driver_id, cursors[-1]) or {}
+    except requests.RequestException:
         st.warning("Could not reach API. Start FastAPI on :8000 and try again."); st.stop()
+    score, premium = summary.get("score") or {}, summary.get("premium") or {}
     if "score" in score: st.metric("Risk Score (0-100)", score["score"])
     if "monthly_premium" in premium: st.metric("Current Monthly Premium ($)", premium["monthly_premium"])
 
 with colB:
     st.subheader("Why this score?")
-    if score and "breakdown" in score:
-        trips = score["breakdown"].get("trips", [])
-        if trips:
-            df = pd.DataFrame([{
-                "Trip Score": t["score"],
-                "Distance (km)": t["distance_km"],
-                "Harsh per 100km": t["breakdown"]["norms"]["harsh_per_100km"],
-                "Speeding per 100km": t["breakdown"]["norms"]["speeding_per_100km"]
-            } for t in trips])
-            st.dataframe(df, use_container_width=True, height=280)
-        else:
-            st.info("No trips yet. Ingest a trip with the simulator.")
+    trips = score.get("breakdown", {}).get("trips", [])
+    if trips:
+        rows = [{
+            "Trip Score": t["score"],
+            "Distance (km)": t["distance_km"],
+            "Harsh per 100km": t["breakdown"]["norms"]["harsh_per_100km"],
+            "Speeding per 100km": t["breakdown"]["norms"]["speeding_per_100km"]
+        } for t in trips]
+        st.dataframe(rows, use_container_width=True, height=280)
+    else:
+        st.info("No trips yet. Ingest a trip with the simulator.")
 
 st.divider()
 st.subheader("Recent trips")
-try:
-    trips = requests.get(f"{API}/drivers/{driver_id}/trips", timeout=5).json().get("trips", [])
-    if trips:
-        st.dataframe(pd.DataFrame(trips), use_container_width=True, height=300)
-    else:
-        st.info("No trips yet.")
-except Exception:
-    st.warning("Could not load trips.")
+trips = summary.get("trips", [])
+if trips:
+    st.dataframe(trips, use_container_width=True, height=300)
+else:
+    st.info("No trips yet.")
+newer, older = st.columns(2)
+if newer.button("Newer trips", disabled=len(cursors) == 1): cursors.pop(); st.rerun()
+if older.button("Older trips", disabled=not summary.get("next_cursor")): cursors.append(summary["next_cursor"]); st.rerun()
 
 st.divider()
 col1, col2 = st.columns(2)
 with col1:
     st.subheader("Gamification")
-    try:
-        p = requests.get(f"{API}/drivers/{driver_id}/premium", timeout=5).json()
-        gam = p.get("gamification", {})
-        st.write(f"Safe streak days: **{gam.get('safe_streak_days',0)}**")
-        st.write(f"Points: **{gam.get('points',0)}**")
-    except Exception:
-        st.info("Start the API to see gamification.")
+    gam = summary.get("gamification") or {}
+    st.write(f"Safe streak days: **{gam.get('safe_streak_days',0)}**")
+    st.write(f"Points: **{gam.get('points',0)}**")
 
 with col2:
     st.subheader("Coach")
     if st.button("Coach me on last trip"):
         try:
-            hints = requests.get(f"{API}/drivers/{driver_id}/coach", timeout=5).json().get("hints", [])
+            hints = http().get(f"{API}/drivers/{driver_id}/coach", timeout=(2, 5)).json().get("hints", [])
             for h in hints:
                 st.write("• " + h)
         except Exception:
@@ -0,0 +1,40 @@
+# tests/conftest.py
+# one throwaway SQLite file for the session, emptied before each test; env is set before anything under src/ is imported
+import os, sys, tempfile
+from datetime import datetime, timedelta
+
+_TMP = tempfile.mkdtemp(prefix="telematics_tests_")
+os.environ.update(DB_URL=f"sqlite:///{_TMP}/test.db", INGEST_SPILL_DIR=f"{_TMP}/spill", DB_CREATE_SCHEMA="true", USE_ML="false",
+                  API_KEY="devkey", RISK_GRID_PATH=f"{_TMP}/no_grid.npz", SESSION_REAP_INTERVAL_S="0")
+
+import pytest
+from fastapi.testclient import TestClient
+from src.backend.db import store
+from src.backend.utils.cache import CACHE
+from src.backend.utils.idempotency import RECENT
+
+H = {"x-api-key": "devkey"}
+
+def make_trip(driver_id="D1", i=0, **over):
+    start = datetime(2024, 1, 1) + timedelta(minutes=37*i)
+    t = {"driver_id": driver_id, "start_ts": start.isoformat(), "end_ts": (start + timedelta(minutes=25)).isoformat(),
+         "distance_km": 10.0 + i % 7, "avg_speed": 45.0, "max_speed": 80.0 + i % 30, "harsh_brakes": i % 3, "night_ratio": 0.1,
+         "speeding_events": i % 2, "centroid_lat": 33.42, "centroid_lon": -111.94}
+    t.update(over); return t
+
+def make_points(start=datetime(2024, 1, 1, 8), n=20, step_s=5.0, speed=50.0):
+    """n time-ordered points heading north-east at a steady speed, with one hard brake in the middle."""
+    return [{"ts": (start + timedelta(seconds=i*step_s)).isoformat(), "speed_kph": speed + i % 5,
+             "accel_mps2": -5.0 if i == n // 2 else 0.2, "lat": 33.42 + i*1e-4, "lon": -111.94 + i*1e-4} for i in range(n)]
+
+@pytest.fixture(autouse=True)
+def db():
+    engine = store.init_db(create_schema=True)
+    store.Base.metadata.drop_all(engine); store.Base.metadata.create_all(engine)
+    CACHE.clear(); RECENT.clear()
+    yield engine
+
+@pytest.fixture
+def client():
+    from src.backend.api.app import app
+    with TestClient(app) as c: yield c
@@ -0,0 +1,28 @@
+import multiprocessing
+import pytest
+from src.backend.utils.cache import DriverCache
+
+def _worker(cache, ready, go, out):
+    cache.get_or_load("D1", "score", lambda: {"score": 10})
+    ready.set(); go.wait(10)
+    out.put(cache.get("D1", "score"))
+
+@pytest.mark.parametrize("shared", [True, False])
+def test_invalidate_in_one_worker_reaches_forked_workers_when_shared(shared):
+    cache = DriverCache(ttl_s=60)
+    if shared: cache.share()
+    ctx = multiprocessing.get_context("fork"); ready, go, out = ctx.Event(), ctx.Event(), ctx.Queue()
+    p = ctx.Process(target=_worker, args=(cache, ready, go, out)); p.start()
+    assert ready.wait(10)
+    cache.invalidate("D1"); go.set()
+    seen = out.get(timeout=10); p.join(10)
+    assert seen is None if shared else seen[0] == {"score": 10}
+
+def test_load_overlapping_an_invalidation_is_not_stored():
+    cache = DriverCache(ttl_s=60); cache.share()
+    def load():
+        cache.invalidate("D1"); return {"score": 1}   # a write lands while the loader reads
+    assert cache.get_or_load("D1", "score", load)[0] == {"score": 1}
+    assert cache.get("D1", "score") is None
+    cache.get_or_load("D1", "score", lambda: {"score": 2})
+    assert cache.get("D1", "score")[0] == {"score": 2} and cache.get("D2", "score") is None
@@ -0,0 +1,38 @@
+import pytest
+from tests.conftest import H, make_trip
+
+@pytest.fixture
+def fleet(client):
+    # D00-D07 drive the same trips (tied values, broken by driver_id); D08-D16 differ. Two batches, so every
+    # driver has a previous premium and a premium_change
+    for i in (0, 1):
+        trips = [make_trip(f"D{d:02d}", i) for d in range(8)] + [make_trip(f"D{d:02d}", d + 20*i) for d in range(8, 17)]
+        assert client.post("/ingest/trips:batch", json=trips, headers=H).json()["ok"]
+    return client
+
+def _walk(client, by, order, limit):
+    items, cursor = [], None
+    while True:
+        body = client.get("/fleet/top", params={"by": by, "order": order, "limit": limit, **({"cursor": cursor} if cursor else {})},
+                          headers=H).json()
+        items += [(i[by], i["driver_id"]) for i in body["items"]]; cursor = body["next_cursor"]
+        if cursor is None: return items
+
+@pytest.mark.parametrize("by", ["score", "premium_change", "points"])
+@pytest.mark.parametrize("order", ["desc", "asc"])
+def test_top_pages_neither_overlap_nor_skip(fleet, by, order):
+    everyone = _walk(fleet, by, order, 1000)
+    assert len(everyone) == 17 and everyone == sorted(everyone, reverse=order == "desc")
+    for limit in (1, 3, 5, 17):
+        assert _walk(fleet, by, order, limit) == everyone
+
+def test_histogram_counts_each_driver_once(fleet):
+    body = fleet.get("/fleet/score-histogram", headers=H).json()
+    assert body["drivers"] == 17
+    scores = [v for v, _ in _walk(fleet, "score", "asc", 100)]
+    for b in body["buckets"]:
+        assert b["count"] == sum(b["lo"] <= v < b["hi"] or (v == b["hi"] == 100) for v in scores)
+
+def test_cursor_of_another_sort_key_is_400(fleet):
+    cursor = fleet.get("/fleet/top", params={"limit": 1}, headers=H).json()["next_cursor"]
+    assert fleet.get("/fleet/top", params={"cursor": cursor[::-1]}, headers=H).status_code == 400
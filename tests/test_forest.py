@@ -0,0 +1,53 @@
+import json
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from src.backend.ml import registry
+from src.backend.ml.features import TRIP_FEATURES, feature_columns, feature_matrix
+from src.backend.ml.forest import FlatForest
+
+def _fit(n_features=6, max_depth=None, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(0, 100, size=(400, n_features)); y = X[:, 0]*0.3 + np.sin(X[:, 1]/10)*20 + rng.normal(0, 2, 400)
+    return RandomForestRegressor(n_estimators=8, max_depth=max_depth, random_state=seed).fit(X, y), X
+
+@pytest.mark.parametrize("max_depth", [1, 4, None])
+def test_flat_forest_matches_sklearn(max_depth):
+    model, X = _fit(max_depth=max_depth); flat = FlatForest.from_sklearn(model)
+    thresholds = model.estimators_[0].tree_.threshold; thresholds = thresholds[thresholds != -2]
+    on_splits = np.tile(thresholds[:, None], (1, X.shape[1]))   # rows sitting exactly on split thresholds
+    for batch in (X[:1], X[:7], X, on_splits):
+        assert flat.predict(batch) == pytest.approx(model.predict(batch), rel=1e-12, abs=1e-12)
+    assert flat.predict(X[5]) == pytest.approx(model.predict(X[5:6]), rel=1e-12, abs=1e-12)   # a single 1-D row
+
+def test_wrong_feature_count_is_rejected():
+    model, X = _fit()
+    with pytest.raises(ValueError): FlatForest.from_sklearn(model).predict(X[:, :5])
+
+@pytest.fixture
+def artifact(tmp_path, monkeypatch):
+    rng = np.random.default_rng(1)
+    rows = [{"distance_km": float(rng.uniform(0.1, 80)), "avg_speed": float(rng.uniform(20, 120)), "max_speed": float(rng.uniform(40, 180)),
+             "harsh_brakes": int(rng.integers(0, 10)), "night_ratio": float(rng.uniform(0, 1)), "speeding_events": int(rng.integers(0, 10))}
+            for _ in range(300)]
+    X = feature_matrix(feature_columns(rows), TRIP_FEATURES)
+    model = RandomForestRegressor(n_estimators=10, random_state=1).fit(X, rng.uniform(0, 100, 300))
+    joblib.dump(model, tmp_path / registry.ARTIFACT); (tmp_path / "feature_list.json").write_text(json.dumps(TRIP_FEATURES))
+    monkeypatch.setattr(registry, "_state", None)
+    yield tmp_path, model, rows, X
+    registry._state = None
+
+def test_registry_flat_backend_predicts_like_sklearn(artifact, monkeypatch):
+    model_dir, model, rows, X = artifact
+    monkeypatch.setattr(registry, "ML_BACKEND", "flat"); monkeypatch.setattr(registry, "FLAT_MAX_ROWS", 64)
+    st = registry.load_model(model_dir)
+    assert isinstance(st["flat"], FlatForest)
+    expected = np.clip(model.predict(X), 0, 100)
+    for n in (1, 64, 300):   # 300 > FLAT_MAX_ROWS goes through sklearn
+        assert registry.predict_batch(rows[:n]) == pytest.approx(expected[:n], rel=1e-12, abs=1e-12)
+    assert np.array_equal(registry.predict_batch(rows[:64]), np.clip(st["flat"].predict(X[:64]), 0, 100))   # served by FlatForest
+
+def test_registry_sklearn_backend_compiles_nothing(artifact, monkeypatch):
+    monkeypatch.setattr(registry, "ML_BACKEND", "sklearn")
+    assert "flat" not in registry.load_model(artifact[0])
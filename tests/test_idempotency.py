@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select
+from src.backend.api.pipeline import ingest_trips
+from src.backend.api.schemas import TripIn
+from src.backend.db.store import SessionLocal, Trip
+from src.backend.utils.idempotency import RECENT, natural_key
+from tests.conftest import H, make_trip
+
+def trip_count():
+    with SessionLocal() as s: return s.scalar(select(func.count()).select_from(Trip))
+
+def test_retried_trip_returns_existing_id(client):
+    first = client.post("/ingest/trip", json=make_trip(), headers=H).json()
+    RECENT.clear()   # as if the retry reached another worker: only the unique index can catch it
+    again = client.post("/ingest/trip", json=make_trip(), headers=H).json()
+    assert again == {"ok": True, "trip_id": first["trip_id"], "duplicate": True}
+    assert trip_count() == 1
+
+def test_idempotency_key_replays_first_response(client):
+    first = client.post("/ingest/trip", json=make_trip(), headers={**H, "idempotency-key": "k1"}).json()
+    again = client.post("/ingest/trip", json=make_trip(distance_km=99.0), headers={**H, "idempotency-key": "k1"}).json()
+    assert again == {**first, "duplicate": True} and trip_count() == 1
+
+def test_batch_flags_duplicates_by_position(client):
+    stored = client.post("/ingest/trip", json=make_trip(i=0), headers=H).json()["trip_id"]
+    r = client.post("/ingest/trips:batch", json=[make_trip(i=1), make_trip(i=0), {"driver_id": "D1"}, make_trip(i=1), make_trip(i=2)],
+                    headers=H).json()
+    res = r["results"]
+    assert (r["accepted"], r["rejected"]) == (4, 1)
+    assert res[1] == {"index": 1, "ok": True, "trip_id": stored, "duplicate": True}
+    assert not res[2]["ok"]
+    assert res[3] == {"index": 3, "ok": True, "trip_id": res[0]["trip_id"], "duplicate": True}
+    assert "duplicate" not in res[0] and "duplicate" not in res[4] and len({res[0]["trip_id"], res[4]["trip_id"], stored}) == 3
+    assert trip_count() == 3
+
+def test_same_instant_with_another_offset_is_a_duplicate():
+    utc = TripIn.model_validate(make_trip(start_ts="2024-01-01T06:00:00Z", end_ts="2024-01-01T06:25:00Z")).model_dump()
+    local = TripIn.model_validate(make_trip(start_ts="2024-01-01T08:00:00+02:00", end_ts="2024-01-01T08:25:00+02:00")).model_dump()
+    assert natural_key(utc["driver_id"], utc["start_ts"], utc["end_ts"]) == natural_key(local["driver_id"], local["start_ts"], local["end_ts"])
+    with SessionLocal() as s:
+        [first] = ingest_trips(s, [local]); s.commit()
+        dup = set(); assert ingest_trips(s, [utc], duplicates=dup) == [first] and dup == {0}
+        stored = s.get(Trip, first)
+        assert (stored.start_ts, stored.end_ts) == (datetime(2024, 1, 1, 6), datetime(2024, 1, 1, 6, 25))
+
+def test_naive_times_are_taken_as_utc():
+    naive = datetime(2024, 1, 1, 6)
+    assert natural_key("D1", naive, naive + timedelta(minutes=25)) == \
+        natural_key("D1", naive.replace(tzinfo=timezone.utc), (naive + timedelta(minutes=25)).replace(tzinfo=timezone.utc))
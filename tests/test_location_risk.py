@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from src.backend.api.pipeline import ingest_trips
+from src.backend.api.schemas import TripIn
+from src.backend.db.store import DB, Enrichment, Gamification, get_session
+from src.backend.jobs.enrich_locations import enrich
+from src.backend.ml import risk_grid
+from src.backend.ml.pricing import premium_from_score
+from tests.conftest import make_trip
+
+@pytest.fixture
+def grid(monkeypatch):
+    g = risk_grid.RiskGrid(33.0, -112.0, 0.5, np.array([[1.0, 2.0], [3.0, 4.0]]), np.array([[10.0, 20.0], [30.0, 40.0]]))
+    monkeypatch.setattr(risk_grid, "_grid", g); monkeypatch.setattr(risk_grid, "_loaded", True)
+    return g
+
+def _ingest(trips):
+    with get_session() as s: ingest_trips(s, [TripIn.model_validate(t).model_dump() for t in trips])
+
+def _location(driver_id):
+    with get_session() as s:
+        e = s.get(Enrichment, driver_id); return e.grid_crash_rate, e.grid_crime_index, e.location_km
+
+def test_backfill_replays_single_trip_ingest_past_the_horizon(grid):
+    # 300 km trips: the 1000 km horizon caps the blend weight after the fourth trip
+    trips = [make_trip("L1", i, distance_km=300.0, centroid_lat=33.2 + 0.5*(i % 2), centroid_lon=-111.8 + 0.5*(i % 3 == 0))
+             for i in range(9)]
+    for t in trips: _ingest([t])
+    ingested = _location("L1")
+    with get_session() as s: DB.set_location_risk(s, [{"driver_id": "L1", "grid_crash_rate": 0.0, "grid_crime_index": 0.0, "location_km": 0.0}])
+    assert enrich()["drivers"] == 1
+    assert _location("L1") == pytest.approx(ingested)
+
+def _effective(driver_id):
+    with get_session() as s: e = DB.get_enrichment(s, driver_id); return e["local_crash_rate"], e["local_crime_index"]
+
+def test_ingest_and_backfill_keep_values_set_through_enrich(grid, client):
+    client.post("/enrich/M1", json={"local_crash_rate": 5.0, "local_crime_index": 5.0}, headers={"x-api-key": "devkey"})
+    _ingest([make_trip("M1", 0), make_trip("G1", 1)])
+    assert _effective("M1") == (5.0, 5.0) and _location("M1") == pytest.approx((1.0, 10.0, 10.0))
+    assert _effective("G1") == (1.0, 10.0)
+    assert enrich()["drivers"] == 2
+    assert _effective("M1") == (5.0, 5.0) and _location("M1") == pytest.approx((1.0, 10.0, 10.0))
+
+def test_enrich_does_not_reset_grid_values(grid, client):
+    _ingest([make_trip("M1", 0)])
+    client.post("/enrich/M1", json={"vehicle_risk": 1.0}, headers={"x-api-key": "devkey"})
+    assert _effective("M1") == (1.0, 10.0) and _location("M1") == pytest.approx((1.0, 10.0, 10.0))
+
+def test_refresh_scores_republishes_score_and_premium_only(grid, monkeypatch):
+    monkeypatch.setattr(risk_grid, "_grid", None)
+    _ingest([make_trip("L1", i) for i in range(3)])
+    with get_session() as s:
+        score = DB.get_driver_score(s, "L1")["score"]
+        g = s.get(Gamification, "L1"); g.points, g.safe_streak_days, g.last_safe_date = 40, 3, "2000-01-01"
+    monkeypatch.setattr(risk_grid, "_grid", grid)
+    enrich(refresh_scores=True)
+    with get_session() as s:
+        new = DB.get_driver_score(s, "L1")["score"]
+        assert new > score and DB.get_premium(s, "L1")["monthly_premium"] == premium_from_score(base_rate=120.0, score=new)[0]
+        assert DB.get_gamification(s, "L1") == {"points": 40, "safe_streak_days": 3, "last_safe_date": "2000-01-01"}
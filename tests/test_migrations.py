@@ -0,0 +1,48 @@
+import os, pathlib, subprocess, sys
+import sqlalchemy as sa
+from src.backend.db.store import Base
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+def alembic(db, *args):
+    env = dict(os.environ, DB_URL=f"sqlite:///{db}", PYTHONPATH=str(ROOT))
+    subprocess.run([sys.executable, "-m", "alembic", *args], cwd=ROOT, env=env, check=True, capture_output=True)
+
+def describe(engine):
+    insp = sa.inspect(engine)
+    return {t: {"columns": {c["name"]: (str(c["type"]), c["nullable"]) for c in insp.get_columns(t)},
+                "pk": insp.get_pk_constraint(t)["constrained_columns"],
+                "indexes": sorted((ix["name"], tuple(ix["column_names"]), bool(ix["unique"])) for ix in insp.get_indexes(t)),
+                "fks": sorted((tuple(f["constrained_columns"]), f["referred_table"]) for f in insp.get_foreign_keys(t))}
+            for t in insp.get_table_names() if t != "alembic_version"}
+
+def test_migrated_schema_matches_models(tmp_path):
+    alembic(tmp_path / "migrated.db", "upgrade", "head")
+    created = sa.create_engine(f"sqlite:///{tmp_path / 'created.db'}"); Base.metadata.create_all(created)
+    migrated, expected = describe(sa.create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")), describe(created)
+    assert sorted(migrated) == sorted(expected)
+    for t in expected: assert migrated[t] == expected[t], t
+
+def test_natural_key_migration_drops_stored_duplicates(tmp_path):
+    db = tmp_path / "dupes.db"; alembic(db, "upgrade", "0009")
+    engine = sa.create_engine(f"sqlite:///{db}")
+    trip = ("INSERT INTO trips VALUES (:id, 'D1', :start, '2024-01-01 08:25:00', 10, 45, 80, 0, 0.1, 0, 33.42, -111.94)")
+    with engine.begin() as c:
+        c.execute(sa.text("INSERT INTO drivers VALUES ('D1', 'Demo Driver', 120, 'Sedan')"))
+        for tid, start in ((1, "2024-01-01 08:00:00"), (2, "2024-01-01 08:00:00"), (3, "2024-01-01 08:05:00")):
+            c.execute(sa.text(trip), {"id": tid, "start": start})
+            c.execute(sa.text("INSERT INTO trip_scores VALUES (:id, 50, '{}')"), {"id": tid})
+    alembic(db, "upgrade", "head")
+    with engine.connect() as c:
+        assert [r[0] for r in c.execute(sa.text("SELECT id FROM trips ORDER BY id"))] == [1, 3]
+        assert [r[0] for r in c.execute(sa.text("SELECT trip_id FROM trip_scores ORDER BY trip_id"))] == [1, 3]
+
+def test_grid_location_risk_moves_to_its_own_columns(tmp_path):
+    db = tmp_path / "grid.db"; alembic(db, "upgrade", "0011")
+    engine = sa.create_engine(f"sqlite:///{db}")
+    with engine.begin() as c:
+        for d in ("M1", "G1"): c.execute(sa.text("INSERT INTO drivers VALUES (:d, 'Demo Driver', 120, 'Sedan')"), {"d": d})
+        c.execute(sa.text("INSERT INTO enrichment VALUES ('M1', 0, 0, 5.0, 5.0, 0, NULL), ('G1', 0, 0, 10.0, 1.0, 0, 250.0)"))
+    alembic(db, "upgrade", "head")
+    q = "SELECT driver_id, local_crash_rate, local_crime_index, grid_crash_rate, grid_crime_index FROM enrichment ORDER BY driver_id"
+    with engine.connect() as c: assert [tuple(r) for r in c.execute(sa.text(q))] == [("G1", 0, 0, 1.0, 10.0), ("M1", 5.0, 5.0, 0, 0)]
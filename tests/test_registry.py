@@ -0,0 +1,17 @@
+import pytest
+from src.backend.ml import registry
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(registry, "_state", None)
+    yield
+    registry._state = None
+
+def test_missing_artifact_fails_without_dev_flag(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "ML_ALLOW_SYNTHETIC", False)
+    with pytest.raises(RuntimeError, match="ML_ALLOW_SYNTHETIC"): registry.load_model(tmp_path)
+
+def test_synthetic_forest_only_behind_dev_flag(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "ML_ALLOW_SYNTHETIC", True)
+    st = registry.load_model(tmp_path)
+    assert st["version"] == "synthetic" and st["features"] == registry.SYNTHETIC_FEATURES
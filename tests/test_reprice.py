@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from src.backend.api.pipeline import ingest_trips
+from src.backend.api.schemas import TripIn
+from src.backend.db.store import DB, Driver, Premium, get_session
+from src.backend.jobs.reprice import reprice
+from src.backend.ml.pricing import premium_from_score, premiums_from_scores
+from tests.conftest import make_trip
+
+DRIVERS = [f"R{k}" for k in range(7)]
+
+def _seed():
+    with get_session() as s:
+        ingest_trips(s, [TripIn.model_validate(make_trip(d, i + k)).model_dump() for k, d in enumerate(DRIVERS) for i in range(3)])
+    with get_session() as s:   # a new base rate for two drivers, and one driver scored but never priced
+        for d in ("R2", "R5"): s.get(Driver, d).base_rate = 150.0
+        s.delete(s.get(Premium, "R4"))
+
+def _premiums():
+    with get_session() as s:
+        return {p.driver_id: (p.monthly_premium, p.previous_premium, p.premium_change, p.updated_at) for p in s.query(Premium)}
+
+def _expected(driver_id):
+    with get_session() as s:
+        return premium_from_score(base_rate=s.get(Driver, driver_id).base_rate, score=DB.get_driver_score(s, driver_id)["score"])[0]
+
+def test_premiums_from_scores_matches_scalar_curve():
+    scores = np.concatenate([np.linspace(0, 100, 1001), [25.0, 85.0, 24.999, 85.001]])
+    base = np.resize([120.0, 99.99, 150.0, 0.0], scores.size)
+    premiums, mult = premiums_from_scores(base, scores)
+    for b, sc, p, m in zip(base, scores, premiums, mult):
+        ref, breakdown = premium_from_score(base_rate=float(b), score=float(sc))
+        assert p == ref and round(m, 3) == breakdown["multiplier"]
+
+def test_dry_run_writes_nothing():
+    _seed(); before = _premiums()
+    r = reprice(workers=1, chunk=2, dry_run=True)
+    assert (r["rows"], r["changed"]) == (len(DRIVERS), 3)
+    assert {t[0] for t in r["top"]} == {"R2", "R4", "R5"}
+    assert _premiums() == before
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_reprice_updates_changed_rows_only(workers):
+    _seed(); before = _premiums()
+    r = reprice(workers=workers, chunk=2)
+    assert (r["rows"], r["changed"]) == (len(DRIVERS), 3)
+    after = _premiums()
+    for d in DRIVERS:
+        assert after[d][0] == _expected(d)
+        if d in ("R2", "R5"):
+            old = before[d][0]
+            assert after[d][1] == old and after[d][2] == pytest.approx(after[d][0] - old) and after[d][3] > before[d][3]
+        elif d == "R4":
+            assert after[d][1:3] == (None, None)
+        else:
+            assert after[d] == before[d]
+    assert reprice(workers=workers, chunk=2)["changed"] == 0
@@ -0,0 +1,51 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from src.backend.ml.features import TRIP_FEATURES
+from src.backend.ml.scoring import score_columns, score_trip_rules, score_trips, score_trips_rules_batch
+
+def _scalar_rules(f):
+    # the per-trip scorer score_trips_rules_batch replaced, kept here as the reference it must match
+    clamp = lambda x, lo, hi: max(lo, min(hi, x)); sigmoid = lambda x: 1/(1+math.exp(-x))
+    dist = max(f.get("distance_km", 0.1), 0.1)
+    harsh, speeding, night = 100.0*f.get("harsh_brakes", 0)/dist, 100.0*f.get("speeding_events", 0)/dist, clamp(f.get("night_ratio", 0.0), 0.0, 1.0)
+    c_speed = 0.25*clamp(max(f.get("avg_speed", 0.0)-60, 0)/40, 0, 1) + 0.35*clamp(max(f.get("max_speed", 0.0)-80, 0)/40, 0, 1)
+    c_brake, c_night, c_speeding = 0.30*sigmoid((harsh-6)/2.0), 0.20*night, 0.35*sigmoid((speeding-5)/2.0)
+    return float(clamp(30*c_speed + 25*c_brake + 20*c_night + 25*c_speeding, 0, 100)), \
+        {"avg_speed_over_60": c_speed*100, "harsh_brakes_per_100km": c_brake*100, "night_ratio": c_night*100,
+         "speeding_events_per_100km": c_speeding*100, "harsh_per_100km": harsh, "speeding_per_100km": speeding}
+
+def _rows(n=2000, seed=7):
+    rng = np.random.default_rng(seed)
+    return [{"distance_km": float(rng.choice([0.0, 0.05, rng.uniform(0.1, 300)])), "avg_speed": float(rng.uniform(0, 140)),
+             "max_speed": float(rng.uniform(0, 200)), "harsh_brakes": int(rng.integers(0, 15)), "night_ratio": float(rng.uniform(-0.2, 1.2)),
+             "speeding_events": int(rng.integers(0, 15))} for _ in range(n)]
+
+def test_batch_matches_scalar_reference():
+    rows = _rows(); scores, contribs = score_trips_rules_batch(rows)
+    ref = [_scalar_rules(f) for f in rows]
+    assert scores.tolist() == pytest.approx([s for s, _ in ref], rel=1e-12, abs=1e-12)
+    for c, (_, r) in zip(contribs, ref):   # contribs are rounded for display: at most one rounding step apart
+        for k in ("avg_speed_over_60", "harsh_brakes_per_100km", "night_ratio", "speeding_events_per_100km"):
+            assert c[k] == pytest.approx(r[k], abs=0.05 + 1e-9)
+        for k in ("harsh_per_100km", "speeding_per_100km"): assert c["norms"][k] == pytest.approx(r[k], abs=0.005 + 1e-9)
+        assert c["model"] == "rules"
+
+def test_columns_dataframe_and_dicts_score_the_same():
+    rows = _rows(200); cols = {k: [f[k] for f in rows] for k in TRIP_FEATURES}
+    by_dicts = score_trips_rules_batch(rows)[0]
+    assert np.array_equal(score_trips_rules_batch(cols)[0], by_dicts) and np.array_equal(score_trips_rules_batch(pd.DataFrame(cols))[0], by_dicts)
+    assert np.array_equal(score_columns(cols)[0], by_dicts)
+    assert [s for s, _ in score_trips(rows)] == by_dicts.tolist() and score_trip_rules(rows[3])[0] == by_dicts[3]
+
+def test_zero_distance_and_missing_features_use_the_floor():
+    zero = {"distance_km": 0.0, "harsh_brakes": 2, "speeding_events": 1}
+    score, contrib = score_trip_rules(zero)
+    assert score == pytest.approx(_scalar_rules(zero)[0], rel=1e-12) and contrib["norms"]["harsh_per_100km"] == 2000.0
+    assert score_trip_rules({})[0] == pytest.approx(_scalar_rules({})[0], rel=1e-12)
+
+def test_empty_batch():
+    scores, contribs = score_trips_rules_batch([])
+    assert scores.shape == (0,) and len(contribs) == 0 and list(contribs) == []
+    assert score_trips([]) == [] and score_columns({k: [] for k in TRIP_FEATURES})[0].shape == (0,)
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+import numpy as np
+from src.backend.api import sessions
+from src.backend.api.wire import VALUE_COLUMNS, columns_from_arrays
+from tests.conftest import H, make_points
+
+def _open(client, driver_id="S1"):
+    r = client.post("/trips/sessions", json={"driver_id": driver_id}, headers=H); assert r.status_code == 201
+    return r.json()["session_id"]
+
+def _chunk(i, n=10):
+    return {"points": make_points(datetime(2024, 1, 1, 8) + timedelta(seconds=50*i), n=n)}
+
+def test_append_reports_stored_chunk_count(client):
+    sid = _open(client)
+    for seq in (1, 2, 3):
+        r = client.post(f"/trips/sessions/{sid}/points", params={"seq": seq}, json=_chunk(seq - 1), headers=H).json()
+        state = client.get(f"/trips/sessions/{sid}", headers=H).json()
+        assert r["chunks"] == state["chunks"] == seq and r["duplicate"] is False
+        assert r["n_points"] == state["n_points"] == 10*seq
+
+def test_next_seq_from_response_is_accepted(client):
+    sid = _open(client)
+    chunks = client.post(f"/trips/sessions/{sid}/points", params={"seq": 1}, json=_chunk(0), headers=H).json()["chunks"]
+    r = client.post(f"/trips/sessions/{sid}/points", params={"seq": chunks + 1}, json=_chunk(1), headers=H)
+    assert r.status_code == 200 and r.json()["chunks"] == 2
+
+def test_retried_seq_is_duplicate_and_gap_is_409(client):
+    sid = _open(client)
+    client.post(f"/trips/sessions/{sid}/points", params={"seq": 1}, json=_chunk(0), headers=H)
+    again = client.post(f"/trips/sessions/{sid}/points", params={"seq": 1}, json=_chunk(0), headers=H).json()
+    assert again["duplicate"] is True and again["chunks"] == 1 and again["n_points"] == 10
+    assert client.post(f"/trips/sessions/{sid}/points", params={"seq": 3}, json=_chunk(2), headers=H).status_code == 409
+
+def test_close_ingests_one_trip(client):
+    sid = _open(client)
+    for seq in (1, 2): client.post(f"/trips/sessions/{sid}/points", params={"seq": seq}, json=_chunk(seq - 1), headers=H)
+    r = client.post(f"/trips/sessions/{sid}/close", headers=H).json()
+    assert r["status"] == "closed" and r["trip_id"]
+    assert [t["id"] for t in client.get("/drivers/S1/trips").json()["trips"]] == [r["trip_id"]]
+    assert client.post(f"/trips/sessions/{sid}/close", headers=H).status_code == 409
+
+def _cols(i, n=10):
+    ts = 1704096000000 + 50000*i + 5000*np.arange(n)
+    return columns_from_arrays(ts, {k: np.full(n, 50.0) if k == "speed_kph" else np.zeros(n) for k in VALUE_COLUMNS})
+
+def test_append_that_loses_the_compare_and_set_reapplies_on_the_new_state(client):
+    sid = _open(client); calls = []
+    def decode_racing(tz_offset_s):
+        # another append to the session commits between this one's read and its UPDATE
+        calls.append(tz_offset_s)
+        if len(calls) == 1: assert sessions.append_chunk(sid, lambda tz: _cols(0))["chunks"] == 1
+        return _cols(1)
+    r = sessions.append_chunk(sid, decode_racing)
+    assert (r["chunks"], r["n_points"], len(calls)) == (2, 20, 1)
+    state = client.get(f"/trips/sessions/{sid}", headers=H).json()
+    assert (state["chunks"], state["n_points"]) == (2, 20)
@@ -0,0 +1,36 @@
+import numpy as np
+from src.backend.api.wire import VALUE_COLUMNS, columns_from_arrays, encode_frame
+from src.backend.db.store import DB, get_session
+from src.backend.db.telemetry import from_json, pack_columns, to_json, unpack_row
+from tests.conftest import H
+
+def _cols(n=50, tz_offset_s=3600, seed=0):
+    rng = np.random.default_rng(seed)
+    ts = 1704096000000 + 1000*rng.permutation(n)   # arrives out of order
+    return columns_from_arrays(ts, {"speed_kph": rng.uniform(0, 120, n), "accel_mps2": rng.normal(0, 2, n),
+                                    "lat": 33.4 + rng.uniform(0, 0.1, n), "lon": -111.9 + rng.uniform(0, 0.1, n)}, tz_offset_s)
+
+def test_pack_unpack_round_trips_time_sorted():
+    cols = _cols(); row = pack_columns(cols); back = unpack_row(row)
+    order = np.argsort(cols["t"], kind="stable")
+    assert row["n_points"] == 50 and row["nbytes"] == 50*20 == sum(len(row[k]) for k in ("ts_ms",) + VALUE_COLUMNS)
+    assert np.array_equal(back["t"], cols["t"][order]) and np.array_equal(back["wall"], cols["wall"][order])
+    for k in VALUE_COLUMNS: assert np.array_equal(back[k], cols[k][order].astype(np.float32))
+
+def test_spill_json_round_trips():
+    row = pack_columns(_cols())
+    assert from_json(to_json(row)) == row
+
+def test_span_beyond_int32_ms_is_not_packed():
+    cols = columns_from_arrays(np.array([0, 2**31], dtype=np.int64), {k: np.zeros(2) for k in VALUE_COLUMNS})
+    assert pack_columns(cols) is None
+
+def test_ingested_frame_is_stored_as_sent(client):
+    cols = _cols(seed=1); order = np.argsort(cols["t"])
+    ts_ms = np.round(cols["t"]*1000).astype(np.int64)
+    r = client.post("/ingest/telemetry", content=encode_frame("T1", ts_ms, {k: cols[k] for k in VALUE_COLUMNS}, 3600),
+                    headers={**H, "content-type": "application/vnd.telematics.frame"})
+    assert r.status_code == 200, r.text
+    with get_session() as s: back = unpack_row(DB.get_trip_telemetry(s, r.json()["trip_id"]))
+    assert np.array_equal(back["t"], cols["t"][order]) and np.array_equal(back["wall"], cols["t"][order] + 3600)
+    for k in VALUE_COLUMNS: assert np.array_equal(back[k], cols[k][order].astype(np.float32))
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+from tests.conftest import H, make_trip
+
+def _trips(n, driver_id="D1"):
+    # three trips per start time, so pages have to break start_ts ties by id
+    out = []
+    for i in range(n):
+        start = datetime(2024, 1, 1) + timedelta(minutes=37*(i // 3))
+        out.append(make_trip(driver_id, i, start_ts=start.isoformat(), end_ts=(start + timedelta(minutes=20 + i)).isoformat()))
+    return out
+
+def _walk(client, path, size_param, size, key="trips", between=None):
+    ids, cursor, pages = [], None, 0
+    while True:
+        r = client.get(path, params={size_param: size, **({"cursor": cursor} if cursor else {})}); assert r.status_code == 200
+        body = r.json(); ids += [t["id"] for t in body[key]]; cursor = body["next_cursor"]; pages += 1
+        if between and pages == 1: between()
+        if cursor is None: return ids
+
+def _newest_first(client):
+    return [t["id"] for t in client.get("/drivers/D1/trips", params={"limit": 500}).json()["trips"]]
+
+def test_trip_pages_neither_overlap_nor_skip(client):
+    assert client.post("/ingest/trips:batch", json=_trips(23), headers=H).json()["accepted"] == 23
+    trips = client.get("/drivers/D1/trips", params={"limit": 500}).json()["trips"]
+    keys = [(t["start_ts"], t["id"]) for t in trips]
+    assert len(keys) == 23 and keys == sorted(keys, reverse=True)
+    expected = [t["id"] for t in trips]
+    for size in (1, 4, 5, 23, 50):
+        assert _walk(client, "/drivers/D1/trips", "limit", size) == expected
+
+def test_summary_pages_the_same_trips(client):
+    client.post("/ingest/trips:batch", json=_trips(11), headers=H)
+    assert _walk(client, "/drivers/D1/summary", "trips", 3) == _newest_first(client)
+
+def test_trip_ingested_between_pages_does_not_shift_them(client):
+    client.post("/ingest/trips:batch", json=_trips(10), headers=H)
+    expected = _newest_first(client)
+    late = lambda: client.post("/ingest/trip", json=make_trip("D1", 99, start_ts="2025-01-01T00:00:00", end_ts="2025-01-01T00:30:00"), headers=H)
+    assert _walk(client, "/drivers/D1/trips", "limit", 4, between=late) == expected
+    assert len(_newest_first(client)) == 11
+
+def test_bad_cursor_is_400(client):
+    client.post("/ingest/trip", json=make_trip(), headers=H)
+    assert client.get("/drivers/D1/trips", params={"cursor": "not-a-cursor"}).status_code == 400
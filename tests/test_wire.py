@@ -0,0 +1,76 @@
+import json
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from src.backend.api import wire
+from src.backend.api.wire import COLUMNS_JSON, FRAME, VALUE_COLUMNS, WireError, decode_columns_json, decode_frame, encode_frame, ts_at
+from tests.conftest import H, make_points
+
+TZ = 7200
+PTS = make_points(datetime(2024, 1, 1, 6), n=30)
+
+def _arrays(points=PTS):
+    ts = np.array([int(datetime.fromisoformat(p["ts"]).replace(tzinfo=timezone.utc).timestamp() * 1000) for p in points], dtype=np.int64)
+    return ts, {k: np.array([p[k] for p in points], dtype=np.float64) for k in VALUE_COLUMNS}
+
+def test_frame_round_trips():
+    ts, values = _arrays()
+    driver_id, ts2, values2, tz = decode_frame(encode_frame("Dé-1", ts, values, TZ))
+    assert (driver_id, tz) == ("Dé-1", TZ) and np.array_equal(ts2, ts)
+    for k in VALUE_COLUMNS: assert np.array_equal(values2[k], values[k])
+
+def test_float32_frame_round_trips_within_float32():
+    ts, values = _arrays()
+    _, ts2, values2, _ = decode_frame(encode_frame("D1", ts, values, float32=True))
+    assert np.array_equal(ts2, ts)
+    for k in VALUE_COLUMNS: assert values2[k].dtype == np.float32 and np.array_equal(values2[k], values[k].astype(np.float32))
+
+def test_columns_json_round_trips():
+    ts, values = _arrays()
+    body = json.dumps({"driver_id": "D1", "tz_offset_s": TZ, "ts": ts.tolist(), **{k: v.tolist() for k, v in values.items()}})
+    driver_id, ts2, values2, tz = decode_columns_json(body.encode())
+    assert (driver_id, tz) == ("D1", TZ) and np.array_equal(ts2, ts)
+    for k in VALUE_COLUMNS: assert np.array_equal(values2[k], values[k])
+
+@pytest.mark.parametrize("mangle", [lambda f: f[:10], lambda f: b"TLM2" + f[4:], lambda f: f[:-1], lambda f: f + b"\0"])
+def test_malformed_frames_are_rejected(mangle):
+    ts, values = _arrays()
+    with pytest.raises(WireError): decode_frame(mangle(encode_frame("D1", ts, values)))
+
+def test_non_finite_values_are_rejected():
+    ts, values = _arrays(); values["speed_kph"][3] = np.nan
+    with pytest.raises(WireError): decode_frame(encode_frame("D1", ts, values))
+
+@pytest.mark.parametrize("ts", [[2**62, 2**62 + 1000], [-2**62, 0], [wire._TS_MAX_MS, wire._TS_MAX_MS + 1]])
+def test_out_of_range_ts_is_rejected(ts):
+    values = {k: np.zeros(2) for k in VALUE_COLUMNS}
+    with pytest.raises(WireError, match="ts out of range"): decode_frame(encode_frame("D1", np.array(ts), values))
+
+def test_ts_at_the_range_ends_converts_with_any_offset():
+    ts = np.array([wire._TS_MIN_MS, wire._TS_MAX_MS]); values = {k: np.zeros(2) for k in VALUE_COLUMNS}
+    _, ts2, _, _ = decode_frame(encode_frame("D1", ts, values))
+    for tz in (-86399, 86399): ts_at(ts2, 0, tz), ts_at(ts2, 1, tz)
+
+def test_out_of_range_ts_is_400(client):
+    body = json.dumps({"driver_id": "D1", "ts": [2**62, 2**62 + 1000], **{k: [0.0, 0.0] for k in VALUE_COLUMNS}})
+    r = client.post("/ingest/telemetry", content=body, headers={**H, "content-type": COLUMNS_JSON})
+    assert r.status_code == 400 and "ts out of range" in r.json()["detail"]
+
+def test_points_columns_and_frame_store_the_same_trip(client):
+    ts, values = _arrays()
+    wall = lambda p: (datetime.fromisoformat(p["ts"]) + timedelta(seconds=TZ)).replace(tzinfo=timezone(timedelta(seconds=TZ))).isoformat()
+    bodies = {
+        "DJ": ("application/json", json.dumps({"driver_id": "DJ", "points": [dict(p, ts=wall(p)) for p in PTS]}).encode()),
+        "DC": (COLUMNS_JSON, json.dumps({"driver_id": "DC", "tz_offset_s": TZ, "ts": ts.tolist(), **{k: v.tolist() for k, v in values.items()}}).encode()),
+        "DF": (FRAME, encode_frame("DF", ts, values, TZ)),
+    }
+    stored = {}
+    for driver_id, (content_type, body) in bodies.items():
+        r = client.post("/ingest/telemetry", content=body, headers={**H, "content-type": content_type}); assert r.status_code == 200, r.text
+        [trip] = client.get(f"/drivers/{driver_id}/trips").json()["trips"]; trip.pop("id"); stored[driver_id] = trip
+    assert stored["DJ"] == stored["DC"] == stored["DF"]
+    assert stored["DF"]["start_ts"] == "2024-01-01T06:00:00"   # stored as UTC
+
+def test_bad_frame_is_400(client):
+    r = client.post("/ingest/telemetry", content=b"TLM1", headers={**H, "content-type": FRAME})
+    assert r.status_code == 400
@@ -0,0 +1,79 @@
+import json
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from src.backend.api import writebehind
+from src.backend.api.schemas import TripIn
+from src.backend.api.writebehind import QueueFull, WriteBehindQueue
+from src.backend.db.store import Trip, get_session
+from tests.conftest import make_trip
+
+def _trip(i, driver_id="W1"): return TripIn.model_validate(make_trip(driver_id, i))
+
+def _trips():
+    with get_session() as s: return s.scalar(select(func.count()).select_from(Trip))
+
+def test_queued_trips_commit_and_spill_is_removed(tmp_path):
+    q = WriteBehindQueue(batch_size=4, max_wait_s=0.01, spill_dir=str(tmp_path))
+    ids = [q.submit(_trip(i)) for i in range(10)]
+    q.stop()
+    statuses = [q.status(i) for i in ids]
+    assert all(st["status"] == "done" for st in statuses) and len({st["trip_id"] for st in statuses}) == 10
+    assert _trips() == 10 and q.snapshot()["pending"] == 0 and not list(tmp_path.glob("spill-*.jsonl"))
+
+def test_retried_trip_in_queue_is_done_with_the_same_trip(tmp_path):
+    q = WriteBehindQueue(max_wait_s=0.01, spill_dir=str(tmp_path))
+    first, again = q.submit(_trip(0)), q.submit(_trip(0))
+    q.stop()
+    assert q.status(again) == {**q.status(first), "ingest_id": again, "duplicate": True} and _trips() == 1
+
+def test_unacked_spill_of_a_dead_worker_is_replayed(tmp_path):
+    record = lambda jid, i: json.dumps({"id": jid, "trip": _trip(i).model_dump(mode="json"), "telemetry": None})
+    (tmp_path / "spill-1-dead.jsonl").write_text("\n".join([record("a", 0), record("b", 1), json.dumps({"ack": ["a"]}), '{"id": "c", "tr']))
+    q = WriteBehindQueue(max_wait_s=0.01, spill_dir=str(tmp_path)); q.start(); q.stop()
+    assert q.snapshot()["replayed"] == 1 and q.status("b")["status"] == "done" and q.status("a") is None
+    assert _trips() == 1 and not list(tmp_path.glob("spill-*.jsonl"))
+
+def test_full_queue_rejects():
+    q = WriteBehindQueue(max_pending=0)
+    with pytest.raises(QueueFull): q.submit(_trip(0))
+    q.stop()
+
+def _flaky(monkeypatch, down_calls, bad_driver=None):
+    """ingest_trips that raises OperationalError on the given call numbers (database down) and ValueError for bad_driver."""
+    calls, ingest = [], writebehind.ingest_trips
+    def ingest_trips(s, trips, *args):
+        calls.append(len(trips))
+        if len(calls) in down_calls: raise OperationalError("INSERT", {}, Exception("database is locked"))
+        if any(t["driver_id"] == bad_driver for t in trips): raise ValueError("bad trip")
+        return ingest(s, trips, *args)
+    monkeypatch.setattr(writebehind, "ingest_trips", ingest_trips)
+    return calls
+
+def test_database_outage_never_fails_accepted_trips(tmp_path, monkeypatch):
+    calls = _flaky(monkeypatch, down_calls=set(range(1, 9)))
+    q = WriteBehindQueue(max_wait_s=0.05, spill_dir=str(tmp_path), retry_min_s=0.001, retry_max_s=0.004)
+    ids = [q.submit(_trip(i)) for i in range(5)]
+    q.stop()
+    assert [q.status(i)["status"] for i in ids] == ["done"]*5 and _trips() == 5
+    snap = q.snapshot()
+    assert (snap["failed"], snap["db_retries"], snap["backoff_s"]) == (0, 8, 0.0) and calls[:9] == [5]*9
+
+def test_outage_while_isolating_a_bad_trip_retries_the_rest(tmp_path, monkeypatch):
+    # call 1: whole batch, bad trip -> isolate; call 2: first trip alone, database down -> hold it and the rest
+    _flaky(monkeypatch, down_calls={2}, bad_driver="BAD")
+    q = WriteBehindQueue(max_wait_s=0.05, spill_dir=str(tmp_path), retry_min_s=0.001)
+    ids = [q.submit(_trip(0)), q.submit(_trip(1, "BAD")), q.submit(_trip(2))]
+    q.stop()
+    assert [q.status(i)["status"] for i in ids] == ["done", "failed", "done"] and _trips() == 2
+    assert "bad trip" in q.status(ids[1])["error"]
+
+def test_worker_stopped_during_an_outage_leaves_trips_for_the_next_start(tmp_path, monkeypatch):
+    _flaky(monkeypatch, down_calls=set(range(1, 10**6)))
+    q = WriteBehindQueue(max_wait_s=0.01, spill_dir=str(tmp_path), retry_min_s=0.001, retry_max_s=0.01)
+    ids = [q.submit(_trip(i)) for i in range(3)]
+    q.stop(timeout=0.2)
+    assert [q.status(i)["status"] for i in ids] == ["queued"]*3 and q.snapshot()["failed"] == 0 and _trips() == 0
+    monkeypatch.undo()
+    q2 = WriteBehindQueue(max_wait_s=0.01, spill_dir=str(tmp_path)); q2.start(); q2.stop()
+    assert q2.snapshot()["replayed"] == 3 and _trips() == 3